@@ -0,0 +1,5 @@
+"""Flet のウィンドウなしで Timer と Alarm の性能を計測するベンチマーク
+
+python -m benchmarks [--sizes 10 1000 10000] [--output result.json]
+python -m benchmarks.simulate [--alarms 5000] [--timers 100] [--hours 24]
+"""
@@ -0,0 +1,420 @@
+import argparse
+import json
+import platform
+import statistics
+import tempfile
+import tracemalloc
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import monotonic, monotonic_ns, perf_counter, process_time, sleep, time_ns
+from types import SimpleNamespace
+
+import flet as ft
+
+from benchmarks.stub_page import SilentSound, StubConnection, stub_page
+from benchmarks.stub_webhook import StubWebhookServer
+from components.alarm import Alarm
+from components.render import Renderer
+from components.stopwatch import Stopwatch
+from components.timer import Timer
+from components.transfer import Transfer
+from components.virtual_list import VirtualList
+from components.types import NS, AlarmType, TimerType
+from utils.scheduler import Scheduler
+from utils import transfer
+from utils.storage import Storage
+from utils.stores import AlarmStore, TimerStore
+from utils.webhooks import Webhooks
+
+OPS = 20
+FIRES = 20
+IDLE_SECONDS = 1.0
+SCROLL_VIEWPORT = 800
+# NOTE: 送信先は応答に WEBHOOK_DELAY 秒かかり、WEBHOOK_FAIL_EVERY 回に 1 回 503 を返す
+WEBHOOK_DELAY = 0.05
+WEBHOOK_FAIL_EVERY = 5
+
+
+def _measure(conn: StubConnection, render: Renderer, operations) -> dict[str, float]:
+    """操作 1 回あたりの時間と Flet に送ったコマンド数・バイト数
+
+    操作ごとに、次のフレームを待たずにその場で描画する。
+    """
+    updates, commands, size = conn.snapshot()
+    start = perf_counter()
+    count = 0
+    for operation in operations:
+        operation()
+        render.flush()
+        count += 1
+    elapsed = perf_counter() - start
+    after = conn.snapshot()
+    return {
+        "ms": elapsed / count * 1000,
+        "updates": (after[0] - updates) / count,
+        "commands": (after[1] - commands) / count,
+        "bytes": (after[2] - size) / count,
+    }
+
+
+def _lateness(samples: list[float]) -> dict[str, float]:
+    samples = sorted(value * 1000 for value in samples)
+    return {
+        "median_ms": statistics.median(samples),
+        "max_ms": samples[-1],
+    }
+
+
+def _idle_cpu() -> float:
+    """スケジューラが待機中の CPU 使用率 (%)"""
+    start_cpu, start = process_time(), perf_counter()
+    sleep(IDLE_SECONDS)
+    return (process_time() - start_cpu) / (perf_counter() - start) * 100
+
+
+def _wait_until(condition, timeout: float = 120) -> None:
+    deadline = monotonic() + timeout
+    while not condition() and monotonic() < deadline:
+        sleep(0.05)
+
+
+def _scrolls(rows: VirtualList, size: int, ops: int):
+    """リストの先頭から末尾までを ops 回に分けてスクロールする操作"""
+    extent = rows._item_extent
+    for i in range(ops):
+        pixels = size * extent * (i + 1) / ops
+        event = SimpleNamespace(pixels=pixels, viewport_dimension=SCROLL_VIEWPORT)
+        yield lambda event=event: rows._on_scroll(event)
+
+
+def _new_timer(timer: Timer, index: int, seconds: int) -> TimerType:
+    entry = TimerType(f"bench-{index}", f"Timer {index}", seconds * NS)
+    timer._add_timer(entry)
+    return entry
+
+
+def bench_timers(size: int, directory: Path, ops: int = OPS) -> dict:
+    page, conn = stub_page()
+    scheduler = Scheduler()
+    scheduler.start()
+    path = directory / f"timers-{size}.sqlite3"
+    seed = Storage(path)
+    for i in range(size):
+        seconds = 60 + i % 3600
+        seed.save_timer(f"bench-{i}", f"Timer {i}", seconds, seconds, None, False)
+    seed.close()
+    storage = Storage(path)
+
+    # NOTE: 起動時と同じく、保存済みのタイマーを読み込んでから画面に追加する
+    start = perf_counter()
+    # NOTE: 描画は _measure の中で明示的に行うので、Renderer のスケジューラは動かさない
+    render = Renderer(page, Scheduler())
+    store = TimerStore(storage, scheduler)
+    timer = Timer(SilentSound(), page, scheduler, store, render=render)
+    page.add(timer.timer())
+    result = {"build_ms": (perf_counter() - start) * 1000}
+    entries = list(timer.timers.values())
+
+    extra = iter(range(size, size + ops))
+    result["add"] = _measure(
+        conn, render, (lambda: _new_timer(timer, next(extra), 90) for _ in range(ops))
+    )
+    targets = entries[:ops]
+    result["toggle"] = _measure(
+        conn, render, ((lambda t=t: timer._toggle_timer(t)) for t in targets)
+    )
+    result["tick"] = _measure(conn, render, (timer._tick for _ in range(ops)))
+    result["scroll"] = _measure(conn, render, _scrolls(timer._timer_rows, size, ops))
+    result["delete"] = _measure(
+        conn, render, ((lambda t=t: timer._delete_timer(t)) for t in targets)
+    )
+
+    # NOTE: 残りのタイマーを動かした状態で待機中の CPU を測る
+    for entry in entries[ops:]:
+        timer._start_timer(entry)
+    result["idle_cpu_percent"] = _idle_cpu()
+
+    lateness: list[float] = []
+    finish = store._finish_timer
+
+    def record(entry: TimerType) -> None:
+        if entry.end is not None:
+            lateness.append((monotonic_ns() - entry.end) / NS)
+        finish(entry)
+
+    store._finish_timer = record
+    # NOTE: 発火は別スレッドで画面を更新するので、行を追加し終えてから開始する
+    fires = [_new_timer(timer, size + ops + i, 1) for i in range(FIRES)]
+    for i, entry in enumerate(fires):
+        entry.remaining = (200 + 10 * i) * 1_000_000
+        timer._start_timer(entry)
+    _wait_until(lambda: len(lateness) >= FIRES)
+    result["fire_lateness"] = _lateness(lateness)
+
+    timer.close()
+    store.close()
+    storage.close()
+    return result
+
+
+def bench_alarms(size: int, directory: Path, ops: int = OPS) -> dict:
+    page, conn = stub_page()
+    scheduler = Scheduler(wall=True, max_wait=60)
+    scheduler.start()
+    now = datetime.now()
+    path = directory / f"alarms-{size}.sqlite3"
+    seed = Storage(path)
+    for i in range(size):
+        at = now + timedelta(minutes=5 + i % 1000)
+        seed.save_alarm(f"bench-{i}", at.timestamp(), True)
+    seed.close()
+    storage = Storage(path)
+
+    start = perf_counter()
+    render = Renderer(page, Scheduler())
+    store = AlarmStore(storage, scheduler)
+    alarm = Alarm(SilentSound(), page, scheduler, store, render=render)
+    page.add(alarm.alarm())
+    result = {"build_ms": (perf_counter() - start) * 1000}
+
+    result["add"] = _measure(
+        conn,
+        render,
+        (
+            lambda: alarm._add_alarm((now + timedelta(minutes=10)).time())
+            for _ in range(ops)
+        ),
+    )
+    targets = list(alarm.alarms.values())[:ops]
+    off = SimpleNamespace(control=SimpleNamespace(value=False))
+    result["toggle"] = _measure(
+        conn, render, ((lambda a=a: alarm._toggle_alarm(off, a)) for a in targets)
+    )
+    result["scroll"] = _measure(conn, render, _scrolls(alarm._alarm_rows, size, ops))
+    result["delete"] = _measure(
+        conn, render, ((lambda a=a: alarm._delete_alarm(None, a)) for a in targets)
+    )
+    result["idle_cpu_percent"] = _idle_cpu()
+
+    lateness: list[float] = []
+    fire = store._fire_alarm
+
+    def record(entry: AlarmType) -> None:
+        lateness.append((time_ns() - entry.time) / NS)
+        fire(entry)
+
+    store._fire_alarm = record
+    for _ in range(FIRES):
+        alarm._add_alarm((now + timedelta(minutes=10)).time())
+    for i, entry in enumerate(list(alarm.alarms.values())[-FIRES:]):
+        entry.time = time_ns() + (200 + 10 * i) * 1_000_000
+        store._schedule_alarm(entry)
+    _wait_until(lambda: len(lateness) >= FIRES)
+    result["fire_lateness"] = _lateness(lateness)
+
+    alarm.close()
+    store.close()
+    storage.close()
+    return result
+
+
+def bench_burst(size: int, directory: Path) -> dict:
+    """size 件のアラームが同時に発火したときの時間と画面更新・ダイアログ・音の数"""
+    page, conn = stub_page()
+    scheduler = Scheduler(wall=True)
+    render = Renderer(page, Scheduler())
+    sound = SilentSound()
+    storage = Storage(directory / f"burst-{size}.sqlite3")
+    store = AlarmStore(storage, scheduler)
+    alarm = Alarm(sound, page, scheduler, store, render=render)
+    page.add(alarm.alarm())
+    at = (datetime.now() + timedelta(minutes=10)).time()
+    for _ in range(size):
+        alarm._add_alarm(at)
+    # NOTE: すべて同じ時刻に期限が来たことにして、まとめて発火させる
+    due = time_ns() - NS
+    for entry in alarm.alarms.values():
+        entry.time = due
+        store._schedule_alarm(entry)
+    render.flush()
+    updates, commands, size_bytes = conn.snapshot()
+    start = perf_counter()
+    fired = scheduler.run_pending()
+    render.flush()
+    elapsed = perf_counter() - start
+    after = conn.snapshot()
+    alarm.close()
+    store.close()
+    storage.close()
+    return {
+        "fired": fired,
+        "ms": elapsed * 1000,
+        "updates": after[0] - updates,
+        "commands": after[1] - commands,
+        "bytes": after[2] - size_bytes,
+        "dialogs": sum(isinstance(c, ft.AlertDialog) for c in page.overlay),
+        "sounds": sound.played,
+    }
+
+
+def bench_webhooks(size: int, directory: Path) -> dict:
+    """size 件のアラームが同時に発火したときの、発火の処理時間と Webhook の送信"""
+    page, _ = stub_page()
+    scheduler = Scheduler(wall=True)
+    render = Renderer(page, Scheduler())
+    storage = Storage(directory / f"webhooks-{size}.sqlite3")
+    stub = StubWebhookServer(WEBHOOK_DELAY, WEBHOOK_FAIL_EVERY)
+    webhooks = Webhooks([stub.url], backoff=WEBHOOK_DELAY)
+    store = AlarmStore(storage, scheduler, webhooks=webhooks)
+    alarm = Alarm(SilentSound(), page, scheduler, store, render=render)
+    page.add(alarm.alarm())
+    at = (datetime.now() + timedelta(minutes=10)).time()
+    for _ in range(size):
+        alarm._add_alarm(at)
+    due = time_ns() - NS
+    for entry in alarm.alarms.values():
+        entry.time = due
+        store._schedule_alarm(entry)
+    start = perf_counter()
+    fired = scheduler.run_pending()
+    fire_ms = (perf_counter() - start) * 1000
+    _wait_until(lambda: webhooks.delivered + webhooks.failed + webhooks.dropped >= size)
+    delivered_ms = (perf_counter() - start) * 1000
+    webhooks.close()
+    stub.close()
+    alarm.close()
+    store.close()
+    storage.close()
+    return {
+        "fired": fired,
+        "fire_ms": fire_ms,
+        "delivered_ms": delivered_ms,
+        "received": len({event["id"] for event in stub.events}),
+        "requests": stub.requests,
+        "retries": webhooks.retried,
+        "failed": webhooks.failed,
+        "dropped": webhooks.dropped,
+    }
+
+
+def bench_stopwatch(size: int, ops: int = OPS) -> dict:
+    """size 件のラップを記録する時間とメモリ、その後の表示更新 1 回の時間"""
+    page, conn = stub_page()
+    scheduler = Scheduler()
+    render = Renderer(page, scheduler)
+    stopwatch = Stopwatch(page, scheduler, render=render)
+    page.add(stopwatch.stopwatch())
+    stopwatch.start()
+    start = perf_counter()
+    for _ in range(size):
+        stopwatch.lap()
+    elapsed = perf_counter() - start
+    # NOTE: tracemalloc は遅くなるので、メモリは記録し直して別に測る
+    stopwatch.reset()
+    stopwatch.start()
+    tracemalloc.start()
+    memory = tracemalloc.get_traced_memory()[0]
+    for _ in range(size):
+        stopwatch.lap()
+    memory = tracemalloc.get_traced_memory()[0] - memory
+    tracemalloc.stop()
+    result = {
+        "lap_us": elapsed / size * 1e6,
+        "bytes_per_lap": memory / size,
+        "frame": _measure(conn, render, (stopwatch._frame for _ in range(ops))),
+    }
+    stopwatch.close()
+    return result
+
+
+def bench_transfer(size: int, directory: Path) -> dict:
+    """size 件 (タイマーとアラームが半分ずつ) のファイルのインポートとエクスポート"""
+    timers = [
+        transfer.TimerEntry(f"Timer {i}", (i % 3600 + 1) * NS) for i in range(size // 2)
+    ]
+    alarms = [
+        transfer.AlarmEntry(
+            (datetime.min + timedelta(minutes=i)).time(), repeat=i % 128
+        )
+        for i in range(size - size // 2)
+    ]
+    result = {}
+    for format in transfer.FORMATS:
+        path = directory / f"transfer-{size}.{format}"
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            transfer.write_entries(file, format, timers, alarms)
+        storage = Storage(directory / f"transfer-{size}-{format}.sqlite3")
+        page, conn = stub_page()
+        render = Renderer(page, Scheduler())
+        alarm_scheduler, timer_scheduler = Scheduler(wall=True), Scheduler()
+        alarm = Alarm(
+            SilentSound(),
+            page,
+            alarm_scheduler,
+            AlarmStore(storage, alarm_scheduler),
+            render=render,
+        )
+        timer = Timer(
+            SilentSound(),
+            page,
+            timer_scheduler,
+            TimerStore(storage, timer_scheduler),
+            render=render,
+        )
+        page.add(alarm.alarm(), timer.timer())
+        transfers = Transfer(page, alarm, timer, render)
+        updates = conn.updates
+        start = perf_counter()
+        count, errors = transfers.import_file(path)
+        render.flush()
+        imported = perf_counter() - start
+        start = perf_counter()
+        transfers.export_file(directory / f"export-{size}.{format}")
+        result[format] = {
+            "import_s": imported,
+            "export_s": perf_counter() - start,
+            "imported": count,
+            "errors": len(errors),
+            "updates": conn.updates - updates,
+        }
+        timer.close()
+        alarm.close()
+        storage.close()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000])
+    parser.add_argument("--ops", type=int, default=OPS, help="計測する操作の回数")
+    parser.add_argument("--output", type=Path, help="結果の JSON を書き出すファイル")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "flet": ft.version.version,
+        "timers": {},
+        "alarms": {},
+        "burst": {},
+        "webhooks": {},
+        "stopwatch": {},
+        "transfer": {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for size in args.sizes:
+            path = Path(directory)
+            results["timers"][str(size)] = bench_timers(size, path, args.ops)
+            results["alarms"][str(size)] = bench_alarms(size, path, args.ops)
+            results["burst"][str(size)] = bench_burst(size, path)
+            results["webhooks"][str(size)] = bench_webhooks(size, path)
+            results["stopwatch"][str(size)] = bench_stopwatch(size, args.ops)
+            results["transfer"][str(size)] = bench_transfer(size, path)
+
+    text = json.dumps(results, indent=2)
+    if args.output:
+        args.output.write_text(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
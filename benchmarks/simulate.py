@@ -0,0 +1,207 @@
+"""VirtualClock で 1 日分のアラームとタイマーを実時間を待たずに発火させる
+
+python -m benchmarks.simulate [--alarms 5000] [--timers 100] [--programs 10]
+                               [--hours 24] [--ui]
+
+すべてのアラームとタイマーがちょうど締め切りの時刻に、締め切り順に
+1 回だけ発火したかを確認し、結果を JSON で出力する。既定ではスケジュールだけを
+検証し、--ui を指定すると発火時の画面更新 (ポップアップ表示と停止) も実行する。
+プログラム (50 区間) は最後の区間が、開始時刻に全区間の長さを足した時刻
+ちょうどに終わったか (区間の切り替えでずれが溜まらないか) も確認する。
+"""
+
+import argparse
+import json
+import random
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from time import perf_counter
+
+from benchmarks.stub_page import SilentSound, stub_page
+from components.alarm import Alarm
+from components.notifications import Notifications
+from components.render import Renderer
+from components.timer import Timer
+from components.types import NS, AlarmType, TimerType
+from utils.clock import VirtualClock
+from utils.scheduler import Scheduler
+from utils.storage import Storage
+from utils.stores import AlarmStore, TimerStore
+
+
+def _advance(clock: VirtualClock, schedulers: list[Scheduler], until: float) -> None:
+    """次の締め切りまで時計を進めて実行することを until (monotonic) まで繰り返す"""
+    while True:
+        upcoming = [
+            deadline - scheduler.now() + clock.monotonic()
+            for scheduler in schedulers
+            if (deadline := scheduler.next_deadline()) is not None
+        ]
+        target = min(upcoming, default=until)
+        if target > until:
+            target = until
+        clock.advance(max(0.0, target - clock.monotonic()))
+        for scheduler in schedulers:
+            scheduler.run_pending()
+        if target >= until:
+            return
+
+
+def _dismiss(notifications: Notifications) -> None:
+    """ユーザーと同じく、表示された通知の停止ボタンを押す"""
+    notifications.dialog.actions[0].on_click(None)
+
+
+def simulate(
+    alarms: int,
+    timers: int,
+    hours: float,
+    directory: Path,
+    ui: bool = False,
+    programs: int = 0,
+) -> dict:
+    rng = random.Random(0)
+    clock = VirtualClock(start=datetime(2024, 1, 1).timestamp())
+    alarm_scheduler = Scheduler(clock, wall=True, max_wait=60)
+    timer_scheduler = Scheduler(clock)
+    storage = Storage(directory / "simulate.sqlite3")
+    page, _ = stub_page()
+    # NOTE: 描画も仮想時計で動くタイマー用のスケジューラから行う
+    render = Renderer(page, timer_scheduler)
+    sound = SilentSound()
+    notifications = Notifications(page, sound, render, clock)
+    alarm_store = AlarmStore(storage, alarm_scheduler)
+    timer_store = TimerStore(storage, timer_scheduler)
+    alarm = Alarm(
+        sound,
+        page,
+        alarm_scheduler,
+        alarm_store,
+        render=render,
+        notifications=notifications,
+    )
+    timer = Timer(
+        sound,
+        page,
+        timer_scheduler,
+        timer_store,
+        render=render,
+        notifications=notifications,
+    )
+
+    fired: list[tuple[float, float]] = []
+    fire_alarm = alarm_store._fire_alarm
+    finish_timer = timer_store._finish_timer
+
+    def record_alarm(entry: AlarmType) -> None:
+        # NOTE: タイマーと比べられるよう、締め切りを monotonic 時刻に直す
+        due = entry.time - clock.time_ns() + clock.monotonic_ns()
+        fired.append((clock.monotonic_ns(), due))
+        if ui:
+            fire_alarm(entry)
+            _dismiss(notifications)
+
+    # NOTE: プログラムごとに、最後に発火した区間の締め切り
+    last_fired: dict[str, int] = {}
+
+    def record_timer(entry: TimerType) -> None:
+        fired.append((clock.monotonic_ns(), entry.end))
+        if entry.program is not None:
+            last_fired[entry.id] = entry.end
+        # NOTE: プログラムは次の区間に進める必要があるので、常に実際の処理を呼ぶ
+        if ui or entry.program is not None:
+            finish_timer(entry)
+        if ui:
+            _dismiss(notifications)
+
+    alarm_store._fire_alarm = record_alarm
+    timer_store._finish_timer = record_timer
+
+    start = perf_counter()
+    now = datetime.fromtimestamp(clock.time())
+    span = int(hours * 3600)
+    for _ in range(alarms):
+        alarm._add_alarm((now + timedelta(seconds=rng.randrange(60, span))).time())
+    for i in range(timers):
+        seconds = rng.randrange(1, span)
+        entry = TimerType(f"simulate-{i}", f"Timer {i}", seconds * NS)
+        timer._add_timer(entry)
+        timer._start_timer(entry)
+    until = clock.monotonic_ns() + span * NS
+    program_ends: dict[str, int] = {}
+    program_fires = 0
+    for i in range(programs):
+        cycle = (
+            ("Work", rng.randrange(300, 1200) * NS),
+            ("Break", rng.randrange(60, 300) * NS),
+        )
+        entry = TimerType(
+            f"program-{i}", f"Program {i}", cycle[0][1], program=cycle, rounds=25
+        )
+        timer._add_timer(entry)
+        end = timer_start = clock.monotonic_ns()
+        timer._start_timer(entry)
+        for k in range(entry.segments):
+            end += cycle[k % len(cycle)][1]
+            program_fires += end <= until
+        program_ends[entry.id] = timer_start + entry.total()
+    setup = perf_counter() - start
+
+    start = perf_counter()
+    _advance(clock, [alarm_scheduler, timer_scheduler], clock.monotonic() + span)
+    elapsed = perf_counter() - start
+
+    timer.close()
+    alarm.close()
+    timer_store.close()
+    alarm_store.close()
+    render.close()
+    storage.close()
+    end = clock.time_ns()
+    expected = sum(1 for entry in alarm.alarms.values() if entry.time <= end)
+    return {
+        "alarms": alarms,
+        "timers": timers,
+        "programs": programs,
+        "simulated_hours": hours,
+        "setup_ms": setup * 1000,
+        "elapsed_ms": elapsed * 1000,
+        "fired": len(fired),
+        "expected": expected + timers + program_fires,
+        "program_drift_ns": max(
+            (
+                abs(last_fired[id] - end)
+                for id, end in program_ends.items()
+                if end <= until
+            ),
+            default=0,
+        ),
+        "max_lateness_s": max((at - due for at, due in fired), default=0) / NS,
+        "early": sum(1 for at, due in fired if at < due),
+        "in_order": all(a[1] <= b[1] for a, b in zip(fired, fired[1:])),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.simulate")
+    parser.add_argument("--alarms", type=int, default=5000)
+    parser.add_argument("--timers", type=int, default=100)
+    parser.add_argument("--programs", type=int, default=10)
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--ui", action="store_true", help="発火時の画面更新も実行する")
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        result = simulate(
+            args.alarms,
+            args.timers,
+            args.hours,
+            Path(directory),
+            args.ui,
+            args.programs,
+        )
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
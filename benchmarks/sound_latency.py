@@ -0,0 +1,72 @@
+"""アラーム発火から最初のサンプルが再生されるまでの遅延を計測する
+
+    SDL_AUDIODRIVER=dummy python -m benchmarks.sound_latency
+
+実際に計測するのは play の呼び出し時間だけで、最初のサンプルが出力されるまでの
+遅延は計測しない (ダミーのドライバには出力がない)。SDL はバッファ 1 つ分ごとに
+ミキサーを呼ぶため、その遅延は「play の呼び出し時間 + バッファ 1 つ分の時間」を
+超えないので、この上限の推定値を first_sample_upper_bound_ms として出力する。
+比較用に、以前の pygame.mixer.music.load による再生も計測する。
+"""
+
+import json
+import os
+import statistics
+import sys
+from time import perf_counter
+
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame  # noqa: E402
+
+from utils.sound import SOUND_PATH, Sound  # noqa: E402
+
+ROUNDS = 50
+
+
+def _measure(play, stop) -> list[float]:
+    samples = []
+    for _ in range(ROUNDS):
+        start = perf_counter()
+        play()
+        samples.append((perf_counter() - start) * 1000)
+        stop()
+    return samples
+
+
+def _summary(samples: list[float], buffer_ms: float) -> dict[str, float]:
+    return {
+        "call_median_ms": statistics.median(samples),
+        "call_max_ms": max(samples),
+        # NOTE: 計測値ではなく推定の上限 (最大の呼び出し時間 + バッファ 1 つ分)
+        "first_sample_upper_bound_ms": max(samples) + buffer_ms,
+    }
+
+
+def main() -> None:
+    buffer_size = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    sound = Sound(buffer_size=buffer_size)
+    frequency, _, _ = pygame.mixer.get_init()
+    buffer_size = buffer_size or int(os.environ.get("TIMER_APP_SOUND_BUFFER", "512"))
+    buffer_ms = buffer_size / frequency * 1000
+
+    def play_music() -> None:
+        pygame.mixer.music.load(str(SOUND_PATH))
+        pygame.mixer.music.play(-1)
+
+    result = {
+        "driver": os.environ["SDL_AUDIODRIVER"],
+        "buffer_size": buffer_size,
+        "buffer_ms": buffer_ms,
+        "preloaded": _summary(
+            _measure(sound.play_alarm_sound, sound.stop_alarm_sound), buffer_ms
+        ),
+        "music_load": _summary(
+            _measure(play_music, pygame.mixer.music.stop), buffer_ms
+        ),
+    }
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import flet as ft
+from flet.core.connection import Connection
+from flet.core.protocol import Command, PageCommandsBatchResponsePayload
+
+
+class StubConnection(Connection):
+    """Flet クライアントの代わりに送信されたコマンドを記録する接続"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.updates = 0
+        self.commands = 0
+        self.bytes = 0
+        self._next_id = 0
+
+    def send_commands(
+        self, session_id: str, commands: list[Command]
+    ) -> PageCommandsBatchResponsePayload:
+        self.updates += 1
+        results = []
+        for command in commands:
+            self.commands += 1 + len(command.commands)
+            self.bytes += len(_serialize(command))
+            if command.name == "add":
+                ids = []
+                for _ in command.commands:
+                    self._next_id += 1
+                    ids.append(f"_{self._next_id}")
+                results.append(" ".join(ids))
+        return PageCommandsBatchResponsePayload(results=results, error="")
+
+    def send_command(self, session_id: str, command: Command):
+        return self.send_commands(session_id, [command])
+
+    def snapshot(self) -> tuple[int, int, int]:
+        return self.updates, self.commands, self.bytes
+
+
+def _serialize(command: Command) -> str:
+    return json.dumps(
+        [
+            command.name,
+            command.attrs,
+            command.values,
+            [_serialize(child) for child in command.commands],
+        ],
+        default=str,
+    )
+
+
+class SilentSound:
+    """音を鳴らさずに再生/停止の回数だけを数える"""
+
+    def __init__(self) -> None:
+        self.played = 0
+
+    def play_alarm_sound(self, key: str = "default") -> None:
+        self.played += 1
+
+    def stop_alarm_sound(self, key: str | None = None) -> None:
+        pass
+
+
+def stub_page() -> tuple[ft.Page, StubConnection]:
+    conn = StubConnection()
+    page = ft.Page(conn, "benchmark", loop=asyncio.new_event_loop())
+    return page, conn
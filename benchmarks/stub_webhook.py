@@ -0,0 +1,54 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from time import sleep
+
+
+class StubWebhookServer:
+    """Webhook の送信先の代わりに受け取ったイベントを記録するローカルの HTTP サーバー
+
+    delay 秒待ってから応答し、fail_every を指定すると その回数ごとに 1 回 503 を返す。
+    """
+
+    def __init__(self, delay: float = 0.0, fail_every: int = 0) -> None:
+        self.delay = delay
+        self.fail_every = fail_every
+        self.requests = 0
+        self.events: list[dict] = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self) -> None:
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                sleep(stub.delay)
+                with stub._lock:
+                    stub.requests += 1
+                    failed = stub.fail_every and stub.requests % stub.fail_every == 0
+                    if not failed:
+                        stub.events.extend(json.loads(body)["events"])
+                self.send_response(503 if failed else 204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}/hook"
+
+    def received(self) -> int:
+        with self._lock:
+            return len(self.events)
+
+    def close(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
@@ -1,194 +1,410 @@
-from datetime import datetime, timedelta
-from time import sleep
+import bisect
+import itertools
+import threading
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date, datetime
 
 import flet as ft
 
+from components.notifications import Notifications
+from components.render import Renderer
 from components.types import AlarmType
+from components.virtual_list import VirtualList
+from utils.recurrence import DAILY, DAY_NAMES, ONCE, WEEKDAYS, describe
+from utils.records import to_datetime, to_ns, until_of
+from utils.scheduler import Scheduler, alarm_scheduler
 from utils.sound import Sound
+from utils.stores import AlarmStore, alarm_store
+from utils.transfer import AlarmEntry
+
+ALARM_ROW_HEIGHT = 50
+ALARM_ROW_PADDING = 5
+
+
+def _label(alarm: AlarmType) -> str:
+    return f"Alarm set for: {to_datetime(alarm.time).strftime('%H:%M')}"
+
+
+def _repeat_label(alarm: AlarmType) -> str:
+    if not alarm.repeat:
+        return ""
+    until = until_of(alarm)
+    label = describe(alarm.repeat)
+    return f"{label} until {until.isoformat()}" if until else label
 
 
 class Alarm:
-    def __init__(self, sound: Sound, page: ft.Page):
-        self._sound = sound
+    def __init__(
+        self,
+        sound: Sound,
+        page: ft.Page,
+        scheduler: Scheduler | None = None,
+        store: AlarmStore | None = None,
+        render: Renderer | None = None,
+        notifications: Notifications | None = None,
+    ):
         self._page = page
-        self.alarms: list[AlarmType] = []
-        self.alarm_list = ft.Column(
-            spacing=10, expand=True, scroll=ft.ScrollMode.ADAPTIVE
+        # NOTE: 画面の更新は Renderer にまとめて任せ、ここでは page.update() しない
+        self._render = render or Renderer(page)
+        self._notifications = notifications or Notifications(page, sound, self._render)
+        self._scheduler = scheduler or alarm_scheduler()
+        # NOTE: 記録・発火時刻のスケジュール・保存は全セッションで共有するストアが持ち、
+        # このセッションは行の表示だけを持つ
+        self._store = store or alarm_store(self._scheduler)
+        # NOTE: id で引く索引 (ストアと同じ dict で、表示順は追加順で _sorted_keys で
+        # 管理する)
+        self.alarms = self._store.alarms
+        self._row_counter = itertools.count()
+        self._row_keys: dict[str, int] = {}
+        self._sorted_keys: list[int] = []
+        # NOTE: 行は表示範囲の分だけ作り、スクロールに合わせて使い回す
+        self._alarm_rows = VirtualList(
+            self._build_alarm_row,
+            self._bind_alarm_row,
+            item_extent=ALARM_ROW_HEIGHT + 2 * ALARM_ROW_PADDING,
+            update=self._render.mark,
+            expand=True,
+        )
+        self.alarm_list = self._alarm_rows.control
+        # NOTE: スケジューラは全セッションで共有するため、key はセッションごとに分ける
+        self._session = str(uuid.uuid4())
+        self._sync_key = f"{self._session}:sync"
+        # NOTE: 他のセッションで変更されたアラームの id (_sync で画面に反映する)
+        self._changes_lock = threading.Lock()
+        self._changes: set[str] = set()
+        self._time_picker = ft.TimePicker(
+            value=self._now().time(),
+            confirm_text="Set Alarm",
+            error_invalid_text="Invalid time selected!",
+            help_text="Pick the time for your alarm",
+            on_change=self._handle_time_selected,
+        )
+        self._load_alarms()
+
+    def _now(self) -> datetime:
+        return self._store.now()
+
+    def _load_alarms(self) -> None:
+        """ストアのアラームを並べ、以降の発火と変更の知らせを受け取る"""
+        with self._store.lock:
+            alarms = list(self.alarms.values())
+            self._store.subscribe(
+                self._session,
+                self._render.locked(
+                    lambda alarm, message: self._fire_alarm(alarm, message)
+                ),
+                self._changed,
+            )
+        for alarm in alarms:
+            self._index_alarm(alarm)
+        self._alarm_rows.reset(alarms)
+
+    def import_alarms(self, entries: Iterable[AlarmEntry]) -> int:
+        """検証済みのアラームをまとめて追加し、件数を返す
+
+        スケジューラへの登録は 1 回だけ行い、画面の更新は呼び出し側に任せる。
+        """
+        now = self._now()
+        alarms = []
+        for entry in entries:
+            at = datetime.combine(now.date(), entry.at)
+            alarm = AlarmType(
+                str(uuid.uuid4()),
+                to_ns(at.timestamp()),
+                entry.active,
+                entry.repeat,
+                entry.until.toordinal() if entry.until else None,
+            )
+            if alarm.active:
+                self._store.move_to_next(alarm, at, now)
+            self._index_alarm(alarm)
+            alarms.append(alarm)
+        self._store.add(alarms, self._session)
+        self._alarm_rows.extend(alarms)
+        return len(alarms)
+
+    def export_alarms(self) -> Iterator[AlarmEntry]:
+        # NOTE: 書き出しは別スレッドから呼ばれるので、その時点の一覧の写しをたどる
+        for alarm in tuple(self.alarms.values()):
+            yield AlarmEntry(
+                to_datetime(alarm.time).time(),
+                alarm.active,
+                alarm.repeat,
+                until_of(alarm),
+            )
+
+    def close(self) -> None:
+        """セッション終了時に、このセッションの表示の更新をやめる
+
+        アラームは他のセッションと共有しているので、スケジューラに残す。
+        """
+        self._store.unsubscribe(self._session)
+        self._scheduler.cancel(self._sync_key)
+
+    def _fire_alarm(self, alarm: AlarmType, message: str) -> None:
+        """ストアで発火したアラームの行を書き直して知らせる"""
+        # NOTE: スイッチと次の発火時刻の表示を更新する
+        self._refresh_alarm_row(alarm)
+        self._notifications.notify(alarm.id, message)
+
+    def _changed(self, ids: Iterable[str]) -> None:
+        """他のセッションでの変更を控え、スケジューラのスレッドで画面に反映する"""
+        with self._changes_lock:
+            self._changes.update(ids)
+        self._scheduler.schedule(
+            self._sync_key, self._scheduler.now(), self._render.locked(self._sync)
+        )
+
+    def _sync(self) -> None:
+        """控えておいた変更に合わせて、行を書き直す"""
+        with self._changes_lock:
+            ids, self._changes = self._changes, set()
+        added = []
+        removed = False
+        for id in ids:
+            alarm = self.alarms.get(id)
+            if alarm is None:
+                removed = self._remove_alarm_row(id) or removed
+            elif id not in self._row_keys:
+                self._index_alarm(alarm)
+                added.append(alarm)
+            else:
+                self._refresh_alarm_row(alarm)
+        if added:
+            self._alarm_rows.extend(added)
+        # NOTE: 行が増減した場合だけ一覧全体を送る
+        if added or removed:
+            self._render.mark(self.alarm_list)
+
+    def _add_alarm(self, selected_time, alarm_to_edit: AlarmType | None = None) -> None:
+        at = datetime.combine(self._now().date(), selected_time)
+
+        if alarm_to_edit:
+            with self._store.lock:
+                self._store.move_to_next(alarm_to_edit, at)
+                self._store.update(alarm_to_edit, self._session)
+            self._refresh_alarm_row(alarm_to_edit)
+            self._render.mark()
+        else:
+            alarm = AlarmType(str(uuid.uuid4()), 0)
+            self._store.move_to_next(alarm, at)
+            self._append_alarm(alarm)
+            self._render.mark()
+
+    def _build_alarm_row(self) -> ft.Container:
+        """アラームリストの 1 行分の UI を作成 (内容は _bind_alarm_row で書き込む)"""
+        row = ft.Container(
+            content=ft.Row(
+                controls=[
+                    ft.Row(
+                        controls=[
+                            ft.Switch(
+                                on_change=lambda e: self._toggle_alarm(e, row.data),
+                            ),
+                            ft.Container(
+                                content=ft.Column(
+                                    [
+                                        ft.Text("", size=16),
+                                        ft.Text("", size=12, color=ft.colors.BLUE_GREY),
+                                    ],
+                                    spacing=0,
+                                    alignment=ft.MainAxisAlignment.CENTER,
+                                ),
+                                padding=ft.Padding(5, 0, 0, 0),
+                            ),
+                        ],
+                        alignment=ft.MainAxisAlignment.START,
+                    ),
+                    ft.Row(
+                        controls=[
+                            ft.IconButton(
+                                ft.icons.REPEAT,
+                                tooltip="Repeat",
+                                on_click=lambda e: self._open_repeat_dialog(row.data),
+                            ),
+                            ft.IconButton(
+                                ft.icons.EDIT,
+                                icon_color=ft.colors.BLUE,
+                                tooltip="Edit Alarm",
+                                on_click=lambda e: self._edit_alarm(e, row.data),
+                            ),
+                            ft.IconButton(
+                                ft.icons.DELETE,
+                                icon_color=ft.colors.RED,
+                                tooltip="Delete Alarm",
+                                on_click=lambda e: self._delete_alarm(e, row.data),
+                            ),
+                        ],
+                        alignment=ft.MainAxisAlignment.END,
+                    ),
+                ],
+                spacing=10,
+                alignment=ft.MainAxisAlignment.SPACE_EVENLY,
+                width=400,
+                height=ALARM_ROW_HEIGHT,
+            ),
+            padding=ft.padding.symmetric(vertical=ALARM_ROW_PADDING),
         )
+        return row
+
+    def _bind_alarm_row(self, row: ft.Container, alarm: AlarmType) -> None:
+        switch, label = row.content.controls[0].controls
+        repeat_button = row.content.controls[1].controls[0]
+        time_text, repeat_text = label.content.controls
+        switch.value = alarm.active
+        time_text.value = _label(alarm)
+        repeat_text.value = _repeat_label(alarm)
+        repeat_text.visible = bool(alarm.repeat)
+        repeat_button.icon_color = ft.colors.BLUE if alarm.repeat else ft.colors.GREY
+
+    def _index_alarm(self, alarm: AlarmType) -> None:
+        key = next(self._row_counter)
+        self._row_keys[alarm.id] = key
+        self._sorted_keys.append(key)
 
-    def check_alarms(self) -> None:
-        while True:
-            now = datetime.now()
-            for alarm in self.alarms:
-                if alarm["active"] and now >= alarm["time"]:
-                    alarm["active"] = False
-                    alarm_text = ft.Text(
-                        f"⏰ Alarm! It's {alarm['time'].strftime('%H:%M')}",
-                        color=ft.colors.RED,
-                        size=16,
-                        weight=ft.FontWeight.BOLD,
-                    )
-                    self._page.add(alarm_text)
-                    self._show_stop_popup(alarm_text)
-                    self._sound.play_alarm_sound()
-                    self._page.update()
-                    # NOTE: アラームが止められたときにスイッチをOFFにする
-                    self._trigger_off_alarm_display(alarm)
-            sleep(1)
-
-    def _trigger_off_alarm_display(self, alarm: AlarmType) -> None:
-        if alarm["widget"] is None:
+    def _append_alarm(self, alarm: AlarmType) -> None:
+        """アラームをリストの末尾に追加"""
+        self._index_alarm(alarm)
+        self._store.add((alarm,), self._session)
+        self._alarm_rows.append(alarm)
+
+    def _remove_alarm_row(self, id: str) -> bool:
+        """行を取り除き、取り除いたかどうかを返す"""
+        key = self._row_keys.pop(id, None)
+        if key is None:
+            return False
+        index = bisect.bisect_left(self._sorted_keys, key)
+        del self._sorted_keys[index]
+        self._alarm_rows.pop(index)
+        return True
+
+    def _refresh_alarm_row(self, alarm: AlarmType) -> None:
+        """表示範囲内にあれば、そのアラームの行を書き直す"""
+        key = self._row_keys.get(alarm.id)
+        if key is None:
             return
-        alarm["widget"].controls[0].controls[0].value = False
+        row = self._alarm_rows.refresh(bisect.bisect_left(self._sorted_keys, key))
+        if row is not None:
+            self._render.mark(row)
+
+    def _toggle_alarm(self, e, alarm: AlarmType) -> None:
+        with self._store.lock:
+            alarm.active = e.control.value
+            if alarm.active:
+                self._store.move_to_next(alarm, to_datetime(alarm.time))
+            self._store.update(alarm, self._session)
+        if e.control.value and not alarm.active:
+            # NOTE: 繰り返しの終了日を過ぎていた場合はスイッチを戻す
+            self._refresh_alarm_row(alarm)
+
+    def _set_repeat(self, alarm: AlarmType, repeat: int, until: date | None) -> None:
+        with self._store.lock:
+            alarm.repeat = repeat
+            alarm.until = until.toordinal() if until else None
+            if alarm.active:
+                self._store.move_to_next(alarm, to_datetime(alarm.time))
+            self._store.update(alarm, self._session)
+        self._refresh_alarm_row(alarm)
+        self._render.mark()
 
-    def _show_stop_popup(self, alarm_text: ft.Text) -> None:
-        def stop_alarm(_) -> None:
-            self._sound.stop_alarm_sound()
+    def _open_repeat_dialog(self, alarm: AlarmType) -> None:
+        """繰り返す曜日と終了日を選ぶポップアップ"""
+        days = [
+            ft.Checkbox(label=name, value=bool(alarm.repeat & (1 << i)))
+            for i, name in enumerate(DAY_NAMES)
+        ]
+        until = until_of(alarm)
+        until_field = ft.TextField(
+            label="End date (YYYY-MM-DD)",
+            value=until.isoformat() if until else "",
+            width=220,
+        )
+        error_text = ft.Text("", color=ft.colors.RED, size=12)
+
+        def select(repeat: int) -> Callable[[ft.ControlEvent], None]:
+            def handler(_) -> None:
+                for i, day in enumerate(days):
+                    day.value = bool(repeat & (1 << i))
+                self._render.mark()
+
+            return handler
+
+        def save(_) -> None:
+            value = (until_field.value or "").strip()
+            try:
+                until = date.fromisoformat(value) if value else None
+            except ValueError:
+                error_text.value = "Invalid date!"
+                self._render.mark()
+                return
             popup.open = False
-            if self._page.controls:
-                self._page.controls.remove(alarm_text)
-            self._page.update()
+            repeat = sum(1 << i for i, day in enumerate(days) if day.value)
+            self._set_repeat(alarm, repeat, until)
+
+        def cancel(_) -> None:
+            popup.open = False
+            self._render.mark()
 
         popup = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("⏰ Alarm!"),
-            content=ft.Text("The alarm is ringing. Stop it?"),
+            title=ft.Text("Repeat"),
+            content=ft.Column(
+                [
+                    ft.Row(
+                        [
+                            ft.TextButton("Once", on_click=select(ONCE)),
+                            ft.TextButton("Daily", on_click=select(DAILY)),
+                            ft.TextButton("Weekdays", on_click=select(WEEKDAYS)),
+                        ]
+                    ),
+                    ft.Row(days, wrap=True),
+                    until_field,
+                    error_text,
+                ],
+                tight=True,
+                width=360,
+            ),
             actions=[
                 ft.ElevatedButton(
-                    text="Stop Alarm",
-                    on_click=stop_alarm,
-                    bgcolor=ft.colors.RED,
+                    text="Save",
+                    on_click=save,
+                    bgcolor=ft.colors.BLUE,
                     color=ft.colors.WHITE,
-                )
+                ),
+                ft.TextButton("Cancel", on_click=cancel),
             ],
-            actions_alignment=ft.MainAxisAlignment.CENTER,
         )
 
         self._page.dialog = popup
         popup.open = True
-        self._page.update()
-
-    def alarm(self) -> ft.Column:
-        def add_alarm(selected_time, alarm_to_edit: AlarmType | None = None) -> None:
-            now = datetime.now()
-            alarm_time = datetime.combine(now.date(), selected_time)
-
-            if alarm_time < now:
-                alarm_time += timedelta(days=1)
-
-            if alarm_to_edit:
-                alarm_to_edit["time"] = alarm_time
-                alarm_to_edit[
-                    "time_text"
-                ].value = f"Alarm set for: {alarm_time.strftime('%H:%M')}"
-                self._page.update()
-            else:
-                alarm_text = ft.Text(
-                    f"Alarm set for: {alarm_time.strftime('%H:%M')}", size=16
-                )
-                alarm: AlarmType = {
-                    "time": alarm_time,
-                    "time_text": alarm_text,
-                    "active": True,
-                    "widget": None,
-                }
-                alarm["widget"] = ft.Row(
-                    controls=[
-                        ft.Row(
-                            controls=[
-                                ft.Switch(
-                                    value=alarm["active"],
-                                    on_change=lambda e, alarm=alarm: toggle_alarm(
-                                        e, alarm
-                                    ),
-                                ),
-                                ft.Container(
-                                    content=alarm_text,
-                                    padding=ft.Padding(5, 0, 0, 0),
-                                ),
-                            ],
-                            alignment=ft.MainAxisAlignment.START,
-                        ),
-                        ft.Row(
-                            controls=[
-                                ft.IconButton(
-                                    ft.icons.EDIT,
-                                    icon_color=ft.colors.BLUE,
-                                    tooltip="Edit Alarm",
-                                    on_click=lambda e, alarm=alarm: edit_alarm(
-                                        e, alarm
-                                    ),
-                                ),
-                                ft.IconButton(
-                                    ft.icons.DELETE,
-                                    icon_color=ft.colors.RED,
-                                    tooltip="Delete Alarm",
-                                    on_click=lambda e, alarm=alarm: delete_alarm(
-                                        e, alarm
-                                    ),
-                                ),
-                            ],
-                            alignment=ft.MainAxisAlignment.END,
-                        ),
-                    ],
-                    spacing=10,
-                    alignment=ft.MainAxisAlignment.SPACE_EVENLY,
-                    width=400,
-                    height=50,
-                )
-                self.alarms.append(alarm)
-                self.alarm_list.controls.append(alarm["widget"])
-                self._page.update()
-
-        def toggle_alarm(e, alarm: AlarmType) -> None:
-            alarm["active"] = e.control.value
-            if alarm["active"]:
-                now = datetime.now()
-
-                alarm_time = alarm["time"].replace(
-                    year=now.year, month=now.month, day=now.day
-                )
-
-                if alarm_time < now:
-                    alarm_time += timedelta(days=1)
-
-                alarm["time"] = alarm_time
-
-        def delete_alarm(_, alarm: AlarmType) -> None:
-            self.alarms.remove(alarm)
-            if alarm["widget"] in self.alarm_list.controls:
-                self.alarm_list.controls.remove(alarm["widget"])
-            self._page.update()
-
-        def edit_alarm(_, alarm: AlarmType) -> None:
-            nonlocal time_picker
-            time_picker.value = datetime.now().time()
-            time_picker.on_change = lambda _: add_alarm(
-                time_picker.value, alarm_to_edit=alarm
-            )
-            time_picker.open = True
-            self._page.dialog = time_picker
-            self._page.update()
+        self._render.mark()
 
-        def handle_time_selected(_) -> None:
-            if time_picker.value:
-                add_alarm(time_picker.value)
+    def _delete_alarm(self, _, alarm: AlarmType) -> None:
+        self._store.delete(alarm, self._session)
+        self._remove_alarm_row(alarm.id)
+        self._render.mark(self.alarm_list)
 
-        time_picker = ft.TimePicker(
-            value=datetime.now().time(),
-            confirm_text="Set Alarm",
-            error_invalid_text="Invalid time selected!",
-            help_text="Pick the time for your alarm",
-            on_change=handle_time_selected,
+    def _edit_alarm(self, _, alarm: AlarmType) -> None:
+        self._time_picker.value = self._now().time()
+        self._time_picker.on_change = lambda _: self._add_alarm(
+            self._time_picker.value, alarm_to_edit=alarm
         )
+        self._time_picker.open = True
+        self._page.dialog = self._time_picker
+        self._render.mark()
+
+    def _handle_time_selected(self, _) -> None:
+        if self._time_picker.value:
+            self._add_alarm(self._time_picker.value)
 
-        def open_time_picker(_) -> None:
-            time_picker.value = datetime.now().time()
-            time_picker.on_change = handle_time_selected
-            time_picker.open = True
-            self._page.dialog = time_picker
-            self._page.update()
+    def _open_time_picker(self, _) -> None:
+        self._time_picker.value = self._now().time()
+        self._time_picker.on_change = self._handle_time_selected
+        self._time_picker.open = True
+        self._page.dialog = self._time_picker
+        self._render.mark()
 
+    def alarm(self) -> ft.Column:
         return ft.Column(
             [
                 ft.Text(
@@ -202,7 +418,7 @@ class Alarm:
                     icon=ft.icons.ALARM,
                     bgcolor=ft.colors.BLUE,
                     color=ft.colors.WHITE,
-                    on_click=open_time_picker,
+                    on_click=self._open_time_picker,
                 ),
                 self.alarm_list,
             ],
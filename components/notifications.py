@@ -0,0 +1,128 @@
+import itertools
+import threading
+from collections import deque
+from datetime import datetime
+
+import flet as ft
+
+from components.render import Renderer
+from utils.clock import SYSTEM_CLOCK, Clock
+from utils.sound import Sound
+
+# NOTE: ダイアログに並べる件数 (それ以上は件数だけを表示する)
+DIALOG_LINES = 5
+HISTORY_SIZE = 10
+SOUND_KEY = "notifications"
+
+# NOTE: 音の key は全セッションで共通なので、鳴らしているセッションをプロセスで
+# 数え、最後の 1 つが止めたときだけ音を止める
+_sound_lock = threading.Lock()
+_sounding: "set[Notifications]" = set()
+
+
+class Notifications:
+    """アラームとタイマーの発火をまとめて知らせる
+
+    同時に発火したものは 1 つのダイアログに並べ、音は鳴っていなければ 1 回だけ
+    鳴らす。ダイアログと履歴のコントロールは最初に一度だけ作り、発火のたびに
+    値だけを書き換えるので、1,000 件が同時に発火してもダイアログは 1 つで、
+    画面の更新は Renderer がまとめた 1 回になる。
+    最近の発火は HISTORY_SIZE 件までのリングバッファに残し、画面下に表示する。
+    """
+
+    def __init__(
+        self,
+        page: ft.Page,
+        sound: Sound,
+        render: Renderer,
+        clock: Clock = SYSTEM_CLOCK,
+        history_size: int = HISTORY_SIZE,
+    ) -> None:
+        self._sound = sound
+        self._render = render
+        self._clock = clock
+        # NOTE: 発火はすべてのセッションに知らされるので、音の key は全セッションで
+        # 共通にし、同時に知らされても鳴らすのは 1 回だけにする
+        self._sound_key = SOUND_KEY
+        self.ringing: dict[str, str] = {}
+        self.history: deque[tuple[datetime, str]] = deque(maxlen=history_size)
+        self._lines = [
+            ft.Text("", color=ft.colors.RED, size=16, weight=ft.FontWeight.BOLD)
+            for _ in range(DIALOG_LINES)
+        ]
+        self._more = ft.Text("", color=ft.colors.BLUE_GREY)
+        self.dialog = ft.AlertDialog(
+            modal=True,
+            title=ft.Text("⏰ Time's up!"),
+            content=ft.Column([*self._lines, self._more], tight=True),
+            actions=[
+                ft.ElevatedButton(
+                    text="Stop",
+                    bgcolor=ft.colors.RED,
+                    color=ft.colors.WHITE,
+                    on_click=lambda _: self.stop(),
+                )
+            ],
+            actions_alignment=ft.MainAxisAlignment.CENTER,
+        )
+        # NOTE: page.dialog は代入のたびにコントロールが残るので、overlay に一度だけ置く
+        page.overlay.append(self.dialog)
+        self._history_texts = [
+            ft.Text("", size=12, color=ft.colors.BLUE_GREY, visible=False)
+            for _ in range(history_size)
+        ]
+        self.history_view = ft.Column(self._history_texts, spacing=0)
+
+    def notify(self, key: str, message: str) -> None:
+        """key の発火を知らせる (同じ key が鳴っている間は 1 件として扱う)"""
+        with self._render.lock:
+            if not self.ringing:
+                self._hold_sound()
+            self.ringing.pop(key, None)
+            self.ringing[key] = message
+            self.history.append((datetime.fromtimestamp(self._clock.time()), message))
+            self._bind_dialog()
+            self._bind_history()
+            self.dialog.open = True
+            self._render.mark(self.dialog, self.history_view)
+
+    def stop(self) -> None:
+        """音を止めてダイアログを閉じる"""
+        with self._render.lock:
+            self._release_sound()
+            self.ringing.clear()
+            self.dialog.open = False
+            self._render.mark(self.dialog)
+
+    def close(self) -> None:
+        """セッション終了時に、このセッションが鳴らしている音を手放す"""
+        self._release_sound()
+
+    def _hold_sound(self) -> None:
+        # NOTE: 他のセッションがすでに鳴らしていれば、play_alarm_sound は何もしない
+        with _sound_lock:
+            _sounding.add(self)
+            self._sound.play_alarm_sound(self._sound_key)
+
+    def _release_sound(self) -> None:
+        with _sound_lock:
+            _sounding.discard(self)
+            if not any(other._sound is self._sound for other in _sounding):
+                self._sound.stop_alarm_sound(self._sound_key)
+
+    def _bind_dialog(self) -> None:
+        # NOTE: 新しいものから DIALOG_LINES 件だけを書き込む
+        latest = itertools.islice(reversed(self.ringing.values()), DIALOG_LINES)
+        for text, message in itertools.zip_longest(self._lines, latest):
+            text.visible = message is not None
+            text.value = message or ""
+        more = len(self.ringing) - DIALOG_LINES
+        self._more.visible = more > 0
+        self._more.value = f"... and {more} more" if more > 0 else ""
+
+    def _bind_history(self) -> None:
+        for text, entry in itertools.zip_longest(
+            self._history_texts, reversed(self.history)
+        ):
+            text.visible = entry is not None
+            text.value = f"{entry[0]:%H:%M:%S}  {entry[1]}" if entry else ""
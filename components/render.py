@@ -0,0 +1,107 @@
+import os
+import threading
+import uuid
+from collections.abc import Callable
+from typing import Any
+
+import flet as ft
+
+from utils import metrics
+from utils.scheduler import Scheduler, timer_scheduler
+
+_COALESCED = metrics.histogram(
+    "timer_app_render_marks",
+    "1 回の描画にまとめた更新要求の数",
+    metrics.COUNT_BUCKETS,
+)
+
+
+class Renderer:
+    """画面の更新要求をまとめ、1 フレームに最大 1 回だけ page.update() する
+
+    各スレッド (UI のイベントハンドラ・スケジューラ) はコントロールを書き換えた後に
+    mark() で更新を要求するだけで、page.update() は呼ばない。送信はスケジューラの
+    スレッドが 1/fps 秒に 1 回までまとめて行う。
+    コントロールの書き換えと送信は lock で直列化する。同期のイベントハンドラは
+    page.run_thread を通して lock を取った状態で呼ばれ、スケジューラから呼ばれる
+    処理は locked() で包んで登録する。
+    """
+
+    def __init__(
+        self,
+        page: ft.Page,
+        scheduler: Scheduler | None = None,
+        fps: float | None = None,
+    ) -> None:
+        if fps is None:
+            fps = float(os.environ.get("TIMER_APP_FPS", "30"))
+        self._page = page
+        self._scheduler = scheduler or timer_scheduler()
+        self._interval = 1 / fps
+        self._key = f"{uuid.uuid4()}:render"
+        self.lock = threading.RLock()
+        # NOTE: id をキーにして、同じコントロールの要求は 1 つにまとめる
+        self._dirty: dict[int, ft.Control] = {}
+        self._whole_page = False
+        self._marks = 0
+        self._pending = False
+        self._last_flush = float("-inf")
+        run_thread = page.run_thread
+
+        def locked_run_thread(handler, *args, **kwargs) -> None:
+            run_thread(self.locked(handler), *args, **kwargs)
+
+        page.run_thread = locked_run_thread
+
+    def locked(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        """lock を取った状態で func を呼ぶ関数を返す"""
+
+        def call(*args, **kwargs) -> Any:
+            with self.lock:
+                return func(*args, **kwargs)
+
+        return call
+
+    def mark(self, *controls: ft.Control) -> None:
+        """controls を次のフレームで送る (何も渡さない場合はページ全体)"""
+        with self.lock:
+            if controls:
+                for control in controls:
+                    self._dirty[id(control)] = control
+            else:
+                self._whole_page = True
+            self._marks += 1
+            if self._pending:
+                return
+            self._pending = True
+            # NOTE: 前回の送信から 1 フレーム経っていなければ、その時刻まで待つ
+            deadline = max(self._scheduler.now(), self._last_flush + self._interval)
+            self._scheduler.schedule(self._key, deadline, self.flush)
+
+    def flush(self) -> None:
+        """溜まっている更新をすぐに 1 回の page.update() で送る"""
+        with self.lock:
+            self._scheduler.cancel(self._key)
+            self._pending = False
+            if self._marks == 0:
+                return
+            _COALESCED.observe(self._marks)
+            # NOTE: まだ (もう) 画面にないコントロールは、追加時にまとめて送られる
+            controls = [
+                control for control in self._dirty.values() if control.page is not None
+            ]
+            whole_page = self._whole_page
+            self._dirty.clear()
+            self._whole_page = False
+            self._marks = 0
+            self._last_flush = self._scheduler.now()
+            if whole_page:
+                self._page.update()
+            elif controls:
+                self._page.update(*controls)
+
+    def close(self) -> None:
+        """セッション終了時に、予定している送信を取り消す"""
+        with self.lock:
+            self._scheduler.cancel(self._key)
+            self._pending = False
@@ -1,7 +1,7 @@
 import flet as ft
 
 
-def sidebar(func) -> ft.NavigationRail:
+def sidebar(func, trailing: ft.Control | None = None) -> ft.NavigationRail:
     rail = ft.NavigationRail(
         selected_index=0,
         label_type=ft.NavigationRailLabelType.ALL,
@@ -9,12 +9,18 @@ def sidebar(func) -> ft.NavigationRail:
         min_extended_width=100,
         group_alignment=-1,
         on_change=func,
+        trailing=trailing,
         destinations=[
             ft.NavigationRailDestination(
                 icon=ft.icons.AV_TIMER_OUTLINED,
                 selected_icon=ft.icons.AV_TIMER,
                 label="Alarm",
             ),
+            ft.NavigationRailDestination(
+                icon=ft.icons.HOURGLASS_EMPTY,
+                selected_icon=ft.icons.HOURGLASS_BOTTOM,
+                label="Timer",
+            ),
             ft.NavigationRailDestination(
                 icon=ft.icons.TIMER_OUTLINED,
                 selected_icon=ft.icons.TIMER,
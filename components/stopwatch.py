@@ -0,0 +1,265 @@
+import uuid
+from collections.abc import Sequence
+
+import flet as ft
+
+from components.render import Renderer
+from components.types import NS
+from components.virtual_list import VirtualList
+from utils.clock import Clock
+from utils.laps import Laps
+from utils.scheduler import Scheduler, timer_scheduler
+
+DISPLAY_FPS = 30
+LAP_ROW_HEIGHT = 32
+
+
+def _format_elapsed(ns: int) -> str:
+    """H:MM:SS.cc (1 時間未満は MM:SS.cc)"""
+    centiseconds = ns // (NS // 100)
+    seconds, centiseconds = divmod(centiseconds, 100)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02}:{seconds:02}.{centiseconds:02}"
+    return f"{minutes:02}:{seconds:02}.{centiseconds:02}"
+
+
+class _NewestFirst(Sequence[int]):
+    """ラップの番号を新しい順に並べたもの (番号のリストは作らない)"""
+
+    def __init__(self, laps: Laps) -> None:
+        self._laps = laps
+
+    def __len__(self) -> int:
+        return len(self._laps)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if not 0 <= index < len(self._laps):
+            raise IndexError(index)
+        return len(self._laps) - 1 - index
+
+
+class Stopwatch:
+    """経過時間を perf_counter_ns で計測するストップウォッチ
+
+    計測と表示は分けている。開始・停止・ラップでは時刻を記録するだけで、
+    表示は動作中だけ fps 回/秒の frame で数字の Text を書き換える。ラップは
+    Laps に 1 件 8 バイトで追記し、一覧・最速・最遅・平均も次の frame で
+    まとめて反映するので、ラップの記録は件数にかかわらず O(1) で済む。
+    """
+
+    def __init__(
+        self,
+        page: ft.Page,
+        scheduler: Scheduler | None = None,
+        clock: Clock | None = None,
+        render: Renderer | None = None,
+        fps: float = DISPLAY_FPS,
+    ) -> None:
+        self._scheduler = scheduler or timer_scheduler()
+        self._clock = clock or self._scheduler.clock
+        self._render = render or Renderer(page, self._scheduler)
+        self._interval = 1 / fps
+        # NOTE: スケジューラは全セッションで共有するため、key はセッションごとに分ける
+        self._frame_key = f"{uuid.uuid4()}:stopwatch"
+        self.laps = Laps()
+        self._accumulated = 0
+        self._started: int | None = None
+        self._laps_changed = False
+        self._visible = True
+        self._digits = ft.Text(
+            _format_elapsed(0),
+            size=48,
+            weight=ft.FontWeight.BOLD,
+            color=ft.colors.BLUE_GREY_900,
+            font_family="monospace",
+        )
+        self._stats = ft.Text("", size=14, color=ft.colors.BLUE_GREY_700)
+        self._toggle_button = ft.ElevatedButton(
+            text="Start",
+            icon=ft.icons.PLAY_ARROW,
+            bgcolor=ft.colors.BLUE,
+            color=ft.colors.WHITE,
+            on_click=lambda _: self.toggle(),
+        )
+        self._lap_button = ft.OutlinedButton(
+            text="Lap", icon=ft.icons.FLAG, on_click=lambda _: self._lap_or_reset()
+        )
+        self._lap_rows = VirtualList(
+            self._build_lap_row,
+            self._bind_lap_row,
+            item_extent=LAP_ROW_HEIGHT,
+            update=self._render.mark,
+            expand=True,
+        )
+        self._lap_rows.view(_NewestFirst(self.laps))
+
+    @property
+    def running(self) -> bool:
+        return self._started is not None
+
+    def elapsed(self) -> int:
+        """経過時間 (ナノ秒)"""
+        if self._started is None:
+            return self._accumulated
+        return self._accumulated + self._clock.perf_counter_ns() - self._started
+
+    def toggle(self) -> None:
+        if self.running:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self) -> None:
+        if self.running:
+            return
+        self._started = self._clock.perf_counter_ns()
+        self._toggle_button.text = "Stop"
+        self._toggle_button.icon = ft.icons.PAUSE
+        self._toggle_button.bgcolor = ft.colors.RED
+        self._lap_button.text = "Lap"
+        self._lap_button.icon = ft.icons.FLAG
+        self._render.mark(self._toggle_button, self._lap_button)
+        self._frame()
+
+    def stop(self) -> None:
+        if not self.running:
+            return
+        self._accumulated = self.elapsed()
+        self._started = None
+        self._scheduler.cancel(self._frame_key)
+        self._toggle_button.text = "Start"
+        self._toggle_button.icon = ft.icons.PLAY_ARROW
+        self._toggle_button.bgcolor = ft.colors.BLUE
+        self._lap_button.text = "Reset"
+        self._lap_button.icon = ft.icons.REFRESH
+        self._render.mark(self._toggle_button, self._lap_button)
+        # NOTE: 止めた時刻を正確に表示するため、最後の frame をすぐに描く
+        self._frame()
+
+    def lap(self) -> int:
+        """動作中ならラップを記録し、そのタイム (ナノ秒) を返す"""
+        if not self.running:
+            return 0
+        split = self.laps.add(self.elapsed())
+        # NOTE: 一覧と統計は次の frame でまとめて書き直す
+        self._laps_changed = True
+        return split
+
+    def reset(self) -> None:
+        self.stop()
+        self._accumulated = 0
+        self.laps.clear()
+        self._lap_button.text = "Lap"
+        self._lap_button.icon = ft.icons.FLAG
+        self._render.mark(self._lap_button)
+        self._laps_changed = True
+        self._frame()
+
+    def set_visible(self, visible: bool) -> None:
+        """タブが隠れている間は frame を止め、表示されたら一度書き直して再開する"""
+        self._visible = visible
+        if visible:
+            self._frame()
+        else:
+            self._scheduler.cancel(self._frame_key)
+
+    def close(self) -> None:
+        """セッション終了時に表示の更新を止める"""
+        self._scheduler.cancel(self._frame_key)
+
+    def _lap_or_reset(self) -> None:
+        if self.running:
+            self.lap()
+        else:
+            self.reset()
+
+    def _frame(self) -> None:
+        """数字を書き換え、ラップが増えていれば一覧と統計も書き直す"""
+        if not self._visible:
+            # NOTE: 隠れている間の変更は set_visible(True) の frame でまとめて反映する
+            return
+        self._digits.value = _format_elapsed(self.elapsed())
+        self._render.mark(self._digits)
+        if self._laps_changed:
+            self._laps_changed = False
+            self._lap_rows.view(_NewestFirst(self.laps))
+            self._stats.value = self._describe_stats()
+            self._render.mark(self._lap_rows.control, self._stats)
+        if self.running:
+            self._scheduler.schedule(
+                self._frame_key,
+                self._scheduler.now() + self._interval,
+                self._render.locked(self._frame),
+            )
+
+    def _describe_stats(self) -> str:
+        if not len(self.laps):
+            return ""
+        return "  ".join(
+            [
+                f"Fastest {_format_elapsed(self.laps.split(self.laps.fastest))}",
+                f"Slowest {_format_elapsed(self.laps.split(self.laps.slowest))}",
+                f"Average {_format_elapsed(self.laps.mean())}",
+            ]
+        )
+
+    def _build_lap_row(self) -> ft.Container:
+        """ラップ一覧の 1 行分の UI を作成 (内容は _bind_lap_row で書き込む)"""
+        return ft.Container(
+            content=ft.Row(
+                [
+                    ft.Text("", width=80, color=ft.colors.BLUE_GREY_700),
+                    ft.Text("", width=110, font_family="monospace"),
+                    ft.Text(
+                        "",
+                        width=110,
+                        font_family="monospace",
+                        color=ft.colors.BLUE_GREY,
+                    ),
+                ],
+                alignment=ft.MainAxisAlignment.CENTER,
+            ),
+            height=LAP_ROW_HEIGHT,
+        )
+
+    def _bind_lap_row(self, row: ft.Container, index: int) -> None:
+        number, split, total = row.content.controls
+        number.value = f"Lap {index + 1}"
+        split.value = _format_elapsed(self.laps.split(index))
+        total.value = _format_elapsed(self.laps.total(index))
+        # NOTE: ラップが 2 件以上あるときだけ、最速を緑・最遅を赤で示す
+        if len(self.laps) > 1 and index == self.laps.fastest:
+            split.color = ft.colors.GREEN
+        elif len(self.laps) > 1 and index == self.laps.slowest:
+            split.color = ft.colors.RED
+        else:
+            split.color = None
+
+    def stopwatch(self) -> ft.Container:
+        return ft.Container(
+            content=ft.Column(
+                [
+                    ft.Text(
+                        "⏱  Stop Watch",
+                        size=24,
+                        weight=ft.FontWeight.BOLD,
+                        color=ft.colors.BLUE,
+                    ),
+                    self._digits,
+                    ft.Row(
+                        [self._toggle_button, self._lap_button],
+                        alignment=ft.MainAxisAlignment.CENTER,
+                    ),
+                    self._stats,
+                    ft.Divider(height=1),
+                    self._lap_rows.control,
+                ],
+                horizontal_alignment=ft.CrossAxisAlignment.CENTER,
+                expand=True,
+            ),
+            expand=True,
+        )
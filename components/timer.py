@@ -1,244 +1,401 @@
+import bisect
+import itertools
+import threading
 import uuid
-from datetime import datetime, time, timedelta
-from time import sleep
+from collections.abc import Iterable, Iterator
+from datetime import time
 
 import flet as ft
 
-from components.types import ActiveTimerType, TimerType
+from components.notifications import Notifications
+from components.render import Renderer
+from components.types import NS, TimerType, timer_duration, timer_program
+from components.virtual_list import VirtualList
+from utils import metrics
+from utils.scheduler import Scheduler, timer_scheduler
 from utils.sound import Sound
+from utils.stores import TimerStore, timer_store
+from utils.transfer import TimerEntry
+
+
+_TICK_JITTER = metrics.histogram(
+    "timer_app_tick_jitter_seconds", "残り時間の表示更新の予定時刻からの遅れ"
+)
+TIMER_ROW_HEIGHT = 60
+TIMER_ROW_MARGIN = 10
+
+
+def _to_time(seconds: int) -> time:
+    return time(hour=seconds // 3600, minute=seconds // 60 % 60, second=seconds % 60)
+
+
+def _ceil_seconds(ns: int) -> int:
+    return -(-ns // NS)
+
+
+def _format_duration(ns: int) -> str:
+    duration = _to_time(ns // NS)
+    time_str = []
+    if duration.hour != 0:
+        time_str.append(f"{duration.hour}時間")
+    if duration.minute != 0:
+        time_str.append(f"{duration.minute}分")
+    if duration.second != 0:
+        time_str.append(f"{duration.second}秒")
+    return "".join(time_str) if time_str else "0秒"
+
+
+def _describe_timer(timer: TimerType) -> str:
+    if not timer.program:
+        return f"⏳ {_format_duration(timer.duration)}"
+    cycle = " / ".join(
+        f"{label} {_format_duration(duration)}" for label, duration in timer.program
+    )
+    return f"🔁 {cycle} × {timer.rounds}"
 
 
 class Timer:
-    def __init__(self, sound: Sound, page: ft.Page):
-        self._sound = sound
+    def __init__(
+        self,
+        sound: Sound,
+        page: ft.Page,
+        scheduler: Scheduler | None = None,
+        store: TimerStore | None = None,
+        render: Renderer | None = None,
+        notifications: Notifications | None = None,
+    ):
         self._page = page
-        self.timers: list[TimerType] = []
-        self.timer_list = ft.Column(
-            spacing=10,
+        self._scheduler = scheduler or timer_scheduler()
+        # NOTE: 画面の更新は Renderer にまとめて任せ、ここでは page.update() しない
+        self._render = render or Renderer(page, self._scheduler)
+        self._notifications = notifications or Notifications(page, sound, self._render)
+        # NOTE: 記録・終了時刻のスケジュール・保存は全セッションで共有するストアが持ち、
+        # このセッションは行とパネルの表示だけを持つ
+        self._store = store or timer_store(self._scheduler)
+        # NOTE: id で引く索引 (ストアと同じ dict で、表示順は _sorted_keys で管理する)
+        self.timers = self._store.timers
+        # NOTE: 行は表示範囲の分だけ作り、スクロールに合わせて使い回す
+        self._timer_rows = VirtualList(
+            self._build_timer_row,
+            self._bind_timer_row,
+            item_extent=TIMER_ROW_HEIGHT + 2 * TIMER_ROW_MARGIN,
+            update=self._render.mark,
             expand=True,
-            scroll=ft.ScrollMode.ADAPTIVE,
         )
+        self.timer_list = self._timer_rows.control
         self._save_button_disabled = False
         self.error_message = ft.Text(value="", size=12, color=ft.colors.RED)
-        self.active_timer: ActiveTimerType | None = None
+        # NOTE: 右側のパネルに表示しているタイマー (動作中のタイマーは複数ありうる)
+        self.active_timer: TimerType | None = None
+        self._active_panel = self._build_active_timer_panel()
         self.active_timer_content = ft.Container(
             expand=True,
-            content=None,
+            content=self._active_panel,
             alignment=ft.alignment.center,
         )
+        # NOTE: 残り時間はストアの締め切りと同じ時計で計算する
+        self._clock = self._store.clock
+        # NOTE: スケジューラは全セッションで共有するため、key はセッションごとに分ける
+        self._session = str(uuid.uuid4())
+        self._tick_key = f"{self._session}:tick"
+        self._sync_key = f"{self._session}:sync"
+        self._row_counter = itertools.count()
+        self._row_keys: dict[str, tuple[int, int]] = {}
+        self._sorted_keys: list[tuple[int, int]] = []
+        self._next_tick = 0
+        # NOTE: 他のセッションで変更されたタイマーの id (_sync で画面に反映する)
+        self._changes_lock = threading.Lock()
+        self._changes: set[str] = set()
+        self._load_timers()
+
+    def _load_timers(self) -> None:
+        """ストアのタイマーを並べ、以降の発火と変更の知らせを受け取る"""
+        with self._store.lock:
+            timers = list(self.timers.values())
+            self._store.subscribe(
+                self._session,
+                self._render.locked(
+                    lambda timer, message: self._finish_timer(timer, message)
+                ),
+                self._changed,
+            )
+        # NOTE: 起動時は 1 件ずつ挿入せず、まとめて並べ替える
+        for timer in timers:
+            self._index_timer(timer)
+        timers.sort(key=lambda timer: self._row_keys[timer.id])
+        self._sorted_keys = [self._row_keys[timer.id] for timer in timers]
+        self._timer_rows.reset(timers)
+
+    def _index_timer(self, timer: TimerType) -> None:
+        self._row_keys[timer.id] = (timer.total(), next(self._row_counter))
+
+    def import_timers(self, entries: Iterable[TimerEntry]) -> int:
+        """検証済みのタイマーをまとめて追加し、件数を返す
+
+        行の書き直しは 1 回だけ行い、画面の更新は呼び出し側に任せる。
+        """
+        timers = []
+        for entry in entries:
+            timer = TimerType(
+                str(uuid.uuid4()),
+                self._timer_name(entry.name, len(timers)),
+                entry.duration,
+            )
+            self._index_timer(timer)
+            timers.append(timer)
+        self._store.add(timers, self._session)
+        self._insert_timer_rows(timers)
+        return len(timers)
+
+    def export_timers(self) -> Iterator[TimerEntry]:
+        # NOTE: ファイルの形式は区間を表せないので、プログラムは書き出さない。
+        # 書き出しは別スレッドから呼ばれるので、その時点の一覧の写しをたどる
+        for timer in tuple(self.timers.values()):
+            if timer.program is None:
+                yield TimerEntry(timer.name, timer.duration)
+
+    def _timer_name(self, name: str | None, added: int = 0) -> str:
+        """名前が空なら連番の名前をつける (added はまだストアにない追加分の数)"""
+        name = (name or "").strip()
+        return name or f"Timer {len(self.timers) + added + 1}"
+
+    def close(self) -> None:
+        """セッション終了時に、このセッションの表示の更新をやめる
+
+        タイマーは他のセッションと共有しているので、スケジューラに残す。
+        """
+        self._store.unsubscribe(self._session)
+        self._scheduler.cancel(self._tick_key)
+        self._scheduler.cancel(self._sync_key)
+
+    def _start_timer(self, timer: TimerType) -> None:
+        self._store.start(timer, self._session)
+        if timer is self.active_timer:
+            self._schedule_tick()
+
+    def _pause_timer(self, timer: TimerType) -> None:
+        self._store.pause(timer, self._session)
+        if timer is self.active_timer:
+            self._scheduler.cancel(self._tick_key)
+
+    def _schedule_tick(self) -> None:
+        """表示中のタイマーの表示が次に変わる秒の境界をスケジュール"""
+        timer = self.active_timer
+        if timer is None or timer.end is None:
+            self._scheduler.cancel(self._tick_key)
+            return
+        remaining = _ceil_seconds(timer.end - self._clock.monotonic_ns())
+        if remaining <= 1:
+            # NOTE: 最後の 1 秒は終了時刻のコールバックで表示を更新する
+            self._scheduler.cancel(self._tick_key)
+            return
+        self._next_tick = timer.end - (remaining - 1) * NS
+        self._scheduler.schedule(
+            self._tick_key, self._next_tick / NS, self._render.locked(self._tick)
+        )
 
-    def check_timers(self) -> None:
-        while True:
-            if self.active_timer is None:
-                continue
-            if self.active_timer["active"]:
-                id = self.active_timer["id"]
-                sleep(1)
-                if not self.active_timer["active"] or self.active_timer["id"] != id:
-                    continue
-                if self.active_timer["time"] != time(hour=0, minute=0, second=0):
-                    self.active_timer["time"] = (
-                        datetime.combine(datetime.min, self.active_timer["time"])
-                        - timedelta(seconds=1)
-                    ).time()
-                    if self.active_timer["time"] == time(hour=0, minute=0, second=0):
-                        self._update_active_timer_content()
-                        self._sound.play_alarm_sound()
-                        self._show_popup()
-                        self._page.update()
-                        continue
-                    self._update_active_timer_content()
-                    self._page.update()
-
-    def _trigger_off_timer_display(self) -> None:
-        if self.active_timer and self.active_timer["active"]:
-            self.active_timer["active"] = False
-            for t in self.timers:
-                if t["id"] == self.active_timer["id"]:
-                    t["active"] = False
-            self._update_timer_list()
-            self._update_active_timer_content()
-            self._page.update()
-
-    def _show_popup(self) -> None:
-        """タイマー終了時のポップアップ表示"""
+    def _tick(self) -> None:
+        """残り時間のテキストだけを更新"""
         if self.active_timer is None:
             return
+        _TICK_JITTER.observe((self._clock.monotonic_ns() - self._next_tick) / NS)
+        self._schedule_tick()
+        self._active_time_text.value = f"{self._remaining_time(self.active_timer)}"
+        self._update_control(self._active_time_text)
+
+    def _finish_timer(self, timer: TimerType, message: str) -> None:
+        """ストアで終了した (プログラムの次の区間に進んだ) タイマーを表示して知らせる"""
+        if timer is self.active_timer:
+            self._schedule_tick()
+            self._update_active_timer_content()
+        # NOTE: プログラムが次の区間に進んだだけなら、一覧の行は書き直さない
+        if not timer.active:
+            self._update_timer_row(timer)
+        self._notifications.notify(timer.id, message)
+
+    def _changed(self, ids: Iterable[str]) -> None:
+        """他のセッションでの変更を控え、スケジューラのスレッドで画面に反映する"""
+        with self._changes_lock:
+            self._changes.update(ids)
+        self._scheduler.schedule(
+            self._sync_key, self._scheduler.now(), self._render.locked(self._sync)
+        )
 
-        def stop_sound(_) -> None:
-            if self.active_timer is None:
-                return
-            self._sound.stop_alarm_sound()
-            popup.open = False
-            self._trigger_off_timer_display()
-            self._page.update()
-
-        popup = ft.AlertDialog(
-            modal=True,
-            title=ft.Text("⏰ Timer Ended"),
-            content=ft.Text(
-                f"Timer '{self.active_timer['name']}' has reached the set time!",
-                color=ft.colors.RED,
-            ),
-            actions=[
-                ft.ElevatedButton(
-                    text="Stop Sound",
-                    bgcolor=ft.colors.RED,
-                    color=ft.colors.WHITE,
-                    on_click=stop_sound,
-                )
+    def _sync(self) -> None:
+        """控えておいた変更に合わせて、行とパネルを書き直す"""
+        with self._changes_lock:
+            ids, self._changes = self._changes, set()
+        added = []
+        for id in ids:
+            timer = self.timers.get(id)
+            if timer is None:
+                self._remove_timer_row(id)
+                if self.active_timer is not None and self.active_timer.id == id:
+                    self.active_timer = None
+                    self._scheduler.cancel(self._tick_key)
+                    self._update_active_timer_content()
+            elif id not in self._row_keys:
+                self._index_timer(timer)
+                added.append(timer)
+            else:
+                self._update_timer_row(timer)
+                if timer is self.active_timer:
+                    self._schedule_tick()
+                    self._update_active_timer_content()
+        if added:
+            self._insert_timer_rows(added)
+            self._update_control(self.timer_list)
+
+    def _build_timer_row(self) -> ft.Container:
+        """タイマーリストの 1 行分の UI を作成 (内容は _bind_timer_row で書き込む)"""
+        timer_details = ft.Column(
+            controls=[
+                ft.Text(
+                    "",
+                    size=14,
+                    weight=ft.FontWeight.BOLD,
+                    color=ft.colors.BLUE_GREY_900,
+                    no_wrap=True,
+                    overflow=ft.TextOverflow.ELLIPSIS,
+                    max_lines=1,
+                    width=200,
+                ),
+                ft.Text(
+                    "",
+                    size=14,
+                    color=ft.colors.BLUE_GREY_700,
+                ),
             ],
-            actions_alignment=ft.MainAxisAlignment.CENTER,
+            spacing=2,
         )
-        self._page.dialog = popup
-        popup.open = True
-        self._page.update()
-
-    def _update_timer_list(self) -> None:
-        """タイマーリストのUIを更新"""
-        self.timer_list.controls.clear()
-
-        for timer in sorted(self.timers, key=lambda t: t["time"]):
-            time_str = []
-            if timer["time"].hour != 0:
-                time_str.append(f"{timer['time'].hour}時間")
-            if timer["time"].minute != 0:
-                time_str.append(f"{timer['time'].minute}分")
-            if timer["time"].second != 0:
-                time_str.append(f"{timer['time'].second}秒")
-            formatted_time = "".join(time_str) if time_str else "0秒"
-
-            timer_details = ft.Column(
-                controls=[
-                    ft.Text(
-                        f"{timer['name']}",
-                        size=14,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.colors.BLUE_GREY_900,
-                        no_wrap=True,
-                        overflow=ft.TextOverflow.ELLIPSIS,
-                        max_lines=1,
-                        width=200,
-                    ),
-                    ft.Text(
-                        f"⏳ {formatted_time}",
-                        size=14,
-                        color=ft.colors.BLUE_GREY_700,
-                    ),
-                ],
-                spacing=2,
-            )
 
-            action_buttons = ft.Row(
-                controls=[
-                    ft.IconButton(
-                        icon=ft.icons.PAUSE if timer["active"] else ft.icons.PLAY_ARROW,
-                        icon_color=ft.colors.GREEN,
-                        on_click=lambda _, timer=timer: self._toggle_timer(timer),
-                    ),
-                    ft.IconButton(
-                        icon=ft.icons.DELETE,
-                        icon_color=ft.colors.RED,
-                        on_click=lambda _, timer=timer: self._delete_timer(timer),
-                    ),
-                ],
-                alignment=ft.MainAxisAlignment.END,
-            )
-
-            timer["widget"] = ft.Container(
-                content=ft.Row(
-                    controls=[timer_details, action_buttons],
-                    alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+        action_buttons = ft.Row(
+            controls=[
+                ft.IconButton(
+                    icon=ft.icons.PLAY_ARROW,
+                    icon_color=ft.colors.GREEN,
+                    on_click=lambda _: self._toggle_timer(row.data),
                 ),
-                padding=10,
-                border_radius=8,
-                bgcolor=ft.colors.BLUE_GREY_50,
-                margin=ft.margin.symmetric(vertical=5, horizontal=10),
-                shadow=ft.BoxShadow(
-                    spread_radius=1,
-                    blur_radius=3,
-                    color=ft.colors.BLUE_GREY_200,
+                ft.IconButton(
+                    icon=ft.icons.DELETE,
+                    icon_color=ft.colors.RED,
+                    on_click=lambda _: self._delete_timer(row.data),
                 ),
-            )
-
-            self.timer_list.controls.append(timer["widget"])
-
-        self._page.update()
+            ],
+            alignment=ft.MainAxisAlignment.END,
+        )
 
-    def _update_active_timer(self, timer: TimerType) -> None:
-        self.active_timer = {
-            "id": timer["id"],
-            "name": timer["name"],
-            "time": timer["time"],
-            "default_time": timer["time"],
-            "active": False,
-        }
+        row = ft.Container(
+            content=ft.Row(
+                controls=[timer_details, action_buttons],
+                alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+            ),
+            height=TIMER_ROW_HEIGHT,
+            padding=10,
+            border_radius=8,
+            bgcolor=ft.colors.BLUE_GREY_50,
+            margin=ft.margin.symmetric(vertical=TIMER_ROW_MARGIN, horizontal=10),
+            shadow=ft.BoxShadow(
+                spread_radius=1,
+                blur_radius=3,
+                color=ft.colors.BLUE_GREY_200,
+            ),
+        )
+        return row
+
+    def _bind_timer_row(self, row: ft.Container, timer: TimerType) -> None:
+        timer_details, action_buttons = row.content.controls
+        timer_details.controls[0].value = f"{timer.name}"
+        timer_details.controls[1].value = _describe_timer(timer)
+        action_buttons.controls[0].icon = (
+            ft.icons.PAUSE if timer.active else ft.icons.PLAY_ARROW
+        )
 
-    def _update_active_timer_content(self) -> None:
-        if self.active_timer is None:
+    def _add_timer(self, timer: TimerType) -> None:
+        self._index_timer(timer)
+        self._store.add((timer,), self._session)
+        self._insert_timer_rows((timer,))
+        self._update_control(self.timer_list)
+
+    def _insert_timer_rows(self, timers: Iterable[TimerType]) -> None:
+        """時間順を保つ位置にタイマーの行を挿入"""
+        indexed = []
+        for timer in timers:
+            key = self._row_keys[timer.id]
+            index = bisect.bisect_left(self._sorted_keys, key)
+            self._sorted_keys.insert(index, key)
+            indexed.append((index, timer))
+        self._timer_rows.insert_many(indexed)
+
+    def _remove_timer_row(self, id: str) -> None:
+        key = self._row_keys.pop(id, None)
+        if key is None:
             return
-
-        def refresh_timer(_) -> None:
-            if self.active_timer is None:
-                return
-            self.active_timer["time"] = self.active_timer["default_time"]
-            if self.active_timer["active"]:
-                self.active_timer["active"] = False
-                for t in self.timers:
-                    if t["id"] == self.active_timer["id"]:
-                        t["active"] = not t["active"]
-            self._update_timer_list()
-            self._update_active_timer_content()
-
-        def toggle_timer(_) -> None:
-            if self.active_timer is None:
-                return
-            if not self.active_timer["active"]:
-                self.active_timer["time"] = self.active_timer["default_time"]
-            self.active_timer["active"] = not self.active_timer["active"]
-            for t in self.timers:
-                if t["id"] == self.active_timer["id"]:
-                    t["active"] = not t["active"]
-            self._update_timer_list()
-            self._update_active_timer_content()
-
-        self.active_timer_content.content = None
-        self.active_timer_content.content = ft.Container(
+        index = bisect.bisect_left(self._sorted_keys, key)
+        del self._sorted_keys[index]
+        self._timer_rows.pop(index)
+        self._update_control(self.timer_list)
+
+    def _update_timer_row(self, timer: TimerType) -> None:
+        """表示範囲内にあれば、そのタイマーの行だけを書き直す"""
+        key = self._row_keys.get(timer.id)
+        if key is None:
+            return
+        row = self._timer_rows.refresh(bisect.bisect_left(self._sorted_keys, key))
+        if row is not None:
+            self._update_control(row)
+
+    def _update_control(self, control: ft.Control) -> None:
+        self._render.mark(control)
+
+    def _remaining_time(self, timer: TimerType) -> time:
+        return _to_time(_ceil_seconds(timer.remaining_at(self._clock.monotonic_ns())))
+
+    def _build_active_timer_panel(self) -> ft.Container:
+        """右側のパネルを一度だけ作成 (以降は値だけを書き換える)"""
+        self._active_name_text = ft.Text(
+            "",
+            size=20,
+            no_wrap=True,
+            overflow=ft.TextOverflow.ELLIPSIS,
+            max_lines=1,
+            width=200,
+            weight=ft.FontWeight.BOLD,
+            color=ft.colors.BLUE_GREY_900,
+            text_align=ft.TextAlign.CENTER,
+        )
+        self._active_time_text = ft.Text(
+            "",
+            size=20,
+            color=ft.colors.BLUE_GREY_700,
+            text_align=ft.TextAlign.CENTER,
+        )
+        self._active_segment_text = ft.Text(
+            "",
+            size=14,
+            color=ft.colors.BLUE,
+            text_align=ft.TextAlign.CENTER,
+            visible=False,
+        )
+        self._active_toggle_button = ft.IconButton(
+            icon=ft.icons.PLAY_ARROW,
+            icon_color=ft.colors.RED,
+            on_click=self._toggle_active_timer,
+        )
+        return ft.Container(
             content=ft.Column(
                 controls=[
-                    ft.Text(
-                        f"{self.active_timer['name']}",
-                        size=20,
-                        no_wrap=True,
-                        overflow=ft.TextOverflow.ELLIPSIS,
-                        max_lines=1,
-                        width=200,
-                        weight=ft.FontWeight.BOLD,
-                        color=ft.colors.BLUE_GREY_900,
-                        text_align=ft.TextAlign.CENTER,
-                    ),
-                    ft.Text(
-                        f"{self.active_timer['time']}",
-                        size=20,
-                        color=ft.colors.BLUE_GREY_700,
-                        text_align=ft.TextAlign.CENTER,
-                    ),
+                    self._active_name_text,
+                    self._active_segment_text,
+                    self._active_time_text,
                     ft.Row(
                         controls=[
                             ft.IconButton(
                                 icon=ft.icons.REFRESH,
                                 icon_color=ft.colors.GREEN,
-                                on_click=refresh_timer,
-                            ),
-                            ft.IconButton(
-                                icon=(
-                                    ft.icons.PAUSE
-                                    if self.active_timer["active"]
-                                    else ft.icons.PLAY_ARROW
-                                ),
-                                icon_color=ft.colors.RED,
-                                on_click=toggle_timer,
+                                on_click=self._refresh_active_timer,
                             ),
+                            self._active_toggle_button,
                         ],
                         alignment=ft.MainAxisAlignment.CENTER,
                     ),
@@ -250,34 +407,62 @@ class Timer:
             height=300,
             border_radius=12,
             bgcolor=ft.colors.BLUE_50,
+            visible=False,
         )
-        self._page.update()
 
-    def _trigger_off_active_timer(self, id: str) -> None:
-        if not self.active_timer:
+    def _refresh_active_timer(self, _) -> None:
+        if self.active_timer is None:
             return
-        if self.active_timer["id"] == id:
-            self.active_timer["active"] = not self.active_timer["active"]
-            self._update_active_timer_content()
-            self._page.update()
+        self._scheduler.cancel(self._tick_key)
+        self._store.reset(self.active_timer, self._session)
+        self._update_timer_row(self.active_timer)
+        self._update_active_timer_content()
 
-    def _toggle_timer(self, timer: TimerType) -> None:
-        """タイマーの動作を制御"""
-        if not timer["active"]:
-            for t in self.timers:
-                t["active"] = False
-            self._update_active_timer(timer)
+    def _toggle_active_timer(self, _) -> None:
+        if self.active_timer is None:
+            return
+        self._toggle_timer(self.active_timer)
 
-        self._trigger_off_active_timer(timer["id"])
+    def _update_active_timer_content(self) -> None:
+        """パネルに表示中のタイマーの名前・残り時間・ボタンを反映"""
+        if self.active_timer is None:
+            self._active_panel.visible = False
+        else:
+            self._active_panel.visible = True
+            self._active_name_text.value = f"{self.active_timer.name}"
+            self._active_time_text.value = f"{self._remaining_time(self.active_timer)}"
+            self._active_segment_text.visible = bool(self.active_timer.program)
+            self._active_segment_text.value = (
+                f"{self.active_timer.label}"
+                f" {self.active_timer.segment + 1}/{self.active_timer.segments}"
+            )
+            self._active_toggle_button.icon = (
+                ft.icons.PAUSE if self.active_timer.active else ft.icons.PLAY_ARROW
+            )
+        self._update_control(self._active_panel)
 
-        timer["active"] = not timer["active"]
-        self._update_timer_list()
+    def _toggle_timer(self, timer: TimerType) -> None:
+        """タイマーの動作を制御 (他のタイマーはそのまま動作を続ける)"""
+        if timer.active:
+            self._pause_timer(timer)
+        else:
+            if timer is not self.active_timer:
+                if self.active_timer is not None:
+                    self._scheduler.cancel(self._tick_key)
+                self.active_timer = timer
+            self._start_timer(timer)
+        self._update_timer_row(timer)
+        if timer is self.active_timer:
+            self._update_active_timer_content()
 
     def _delete_timer(self, timer: TimerType) -> None:
         """タイマーを削除"""
-        self.timers.remove(timer)
-        self._trigger_off_active_timer(timer["id"])
-        self._update_timer_list()
+        self._store.delete(timer, self._session)
+        if timer is self.active_timer:
+            self.active_timer = None
+            self._scheduler.cancel(self._tick_key)
+            self._update_active_timer_content()
+        self._remove_timer_row(timer.id)
 
     def timer(self) -> ft.Container:
         def open_timer_popup(_) -> None:
@@ -308,7 +493,7 @@ class Timer:
                         if current_value >= 60:
                             current_value = 59
                     value_field.value = f"{current_value:02}"
-                    self._page.update()
+                    self._render.mark()
 
                 def decrease_value(_) -> None:
                     if not value_field.value:
@@ -325,7 +510,7 @@ class Timer:
                     if current_value < 0:
                         current_value = 0
                     value_field.value = f"{current_value:02}"
-                    self._page.update()
+                    self._render.mark()
 
                 return ft.Column(
                     [
@@ -367,50 +552,34 @@ class Timer:
                     hours = int(str(hour_field.controls[1].value))
                     minutes = int(str(minute_field.controls[1].value))
                     seconds = int(str(second_field.controls[1].value))
-
-                    if (
-                        hours < 0
-                        or hours > 23
-                        or minutes < 0
-                        or minutes > 59
-                        or seconds < 0
-                        or seconds > 59
-                    ) or (hours == 0 and minutes == 0 and seconds == 0):
-                        self.error_message.value = "Invalid time entered!"
-                        self._page.update()
-                        return
-
-                    timer_time = time(hour=hours, minute=minutes, second=seconds)
-                    timer_name = (
-                        name_field.value.strip()
-                        if name_field.value
-                        else f"Timer {len(self.timers) + 1}"
-                    )
-
-                    timer: TimerType = {
-                        "id": str(uuid.uuid4()),
-                        "name": timer_name,
-                        "time": timer_time,
-                        "active": False,
-                        "widget": None,
-                    }
-
-                    self.timers.append(timer)
-                    self._update_timer_list()
-                    popup.open = False
-                    self.error_message.value = ""
-                    self._page.update()
-
                 except ValueError:
                     self._page.snack_bar = ft.SnackBar(ft.Text("Invalid time entered!"))
                     self._page.snack_bar.open = True
-                    self._page.update()
+                    self._render.mark()
+                    return
+
+                try:
+                    # NOTE: インポートと同じ規則で検証する
+                    duration = timer_duration(hours, minutes, seconds)
+                except ValueError as error:
+                    self.error_message.value = str(error)
+                    self._render.mark()
+                    return
+
+                timer = TimerType(
+                    str(uuid.uuid4()), self._timer_name(name_field.value), duration
+                )
+
+                self._add_timer(timer)
+                popup.open = False
+                self.error_message.value = ""
+                self._render.mark()
 
             def cancel_timer(_) -> None:
                 """ポップアップを閉じる"""
                 popup.open = False
                 self.error_message.value = ""
-                self._page.update()
+                self._render.mark()
 
             popup = ft.AlertDialog(
                 title=ft.Text("Add New Timer", text_align=ft.TextAlign.CENTER),
@@ -446,7 +615,73 @@ class Timer:
             )
             self._page.dialog = popup
             popup.open = True
-            self._page.update()
+            self._render.mark()
+
+        def open_program_popup(_) -> None:
+            """作業と休憩をくり返すプログラムの設定ポップアップを表示"""
+            name_field = ft.TextField(label="Program Name", value="Pomodoro")
+            work_field = ft.TextField(label="Work (min)", value="25", width=100)
+            break_field = ft.TextField(label="Break (min)", value="5", width=100)
+            rounds_field = ft.TextField(label="Rounds", value="4", width=100)
+            error_message = ft.Text(value="", size=12, color=ft.colors.RED)
+
+            def save_program(_) -> None:
+                try:
+                    work = int(str(work_field.value))
+                    rest = int(str(break_field.value or 0))
+                    rounds = int(str(rounds_field.value))
+                except ValueError:
+                    error_message.value = "Invalid time entered!"
+                    self._render.mark()
+                    return
+                try:
+                    program = timer_program(work, rest, rounds)
+                except ValueError as error:
+                    error_message.value = str(error)
+                    self._render.mark()
+                    return
+                timer = TimerType(
+                    str(uuid.uuid4()),
+                    self._timer_name(name_field.value),
+                    program[0][1],
+                    program=program,
+                    rounds=rounds,
+                )
+                self._add_timer(timer)
+                popup.open = False
+                self._render.mark()
+
+            def cancel_program(_) -> None:
+                popup.open = False
+                self._render.mark()
+
+            popup = ft.AlertDialog(
+                title=ft.Text("Add New Program", text_align=ft.TextAlign.CENTER),
+                content=ft.Column(
+                    [
+                        name_field,
+                        ft.Row(
+                            [work_field, break_field, rounds_field],
+                            alignment=ft.MainAxisAlignment.CENTER,
+                        ),
+                        error_message,
+                    ],
+                    width=340,
+                    tight=True,
+                ),
+                actions=[
+                    ft.ElevatedButton(
+                        text="Save",
+                        on_click=save_program,
+                        bgcolor=ft.colors.BLUE,
+                        color=ft.colors.WHITE,
+                    ),
+                    ft.TextButton(text="Cancel", on_click=cancel_program),
+                ],
+            )
+            self._page.dialog = popup
+            popup.open = True
+            self._render.mark()
 
         return ft.Container(
             content=ft.Column(
@@ -457,12 +692,22 @@ class Timer:
                         weight=ft.FontWeight.BOLD,
                         color=ft.colors.BLUE,
                     ),
-                    ft.ElevatedButton(
-                        text="Set Timer",
-                        icon=ft.icons.ALARM,
-                        bgcolor=ft.colors.BLUE,
-                        color=ft.colors.WHITE,
-                        on_click=open_timer_popup,
+                    ft.Row(
+                        [
+                            ft.ElevatedButton(
+                                text="Set Timer",
+                                icon=ft.icons.ALARM,
+                                bgcolor=ft.colors.BLUE,
+                                color=ft.colors.WHITE,
+                                on_click=open_timer_popup,
+                            ),
+                            ft.OutlinedButton(
+                                text="Set Program",
+                                icon=ft.icons.REPEAT,
+                                on_click=open_program_popup,
+                            ),
+                        ],
+                        alignment=ft.MainAxisAlignment.CENTER,
                     ),
                     ft.Divider(height=1),
                     ft.Row(
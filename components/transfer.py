@@ -0,0 +1,132 @@
+import threading
+from pathlib import Path
+
+import flet as ft
+
+from components.alarm import Alarm
+from components.render import Renderer
+from components.timer import Timer
+from utils import transfer
+
+
+class Transfer:
+    """ファイルからのインポートとファイルへのエクスポート
+
+    インポートは utils.transfer が読み込んだ batch ごとにタイマーとアラームを
+    まとめて追加し、画面の更新も batch ごとに 1 回だけ要求する。ファイルの
+    読み書き中も画面の更新や発火が止まらないよう、どちらも別スレッドで実行し、
+    Renderer の lock は batch や結果を反映する間だけ取る。
+    """
+
+    def __init__(
+        self, page: ft.Page, alarm: Alarm, timer: Timer, render: Renderer
+    ) -> None:
+        self._page = page
+        self._render = render
+        self._alarm = alarm
+        self._timer = timer
+        self._export_format = transfer.FORMATS[0]
+        self._import_picker = ft.FilePicker(on_result=self._on_import_picked)
+        self._export_picker = ft.FilePicker(on_result=self._on_export_picked)
+        page.overlay.extend([self._import_picker, self._export_picker])
+
+    def menu(self) -> ft.PopupMenuButton:
+        return ft.PopupMenuButton(
+            icon=ft.icons.IMPORT_EXPORT,
+            tooltip="Import / Export",
+            items=[
+                ft.PopupMenuItem(
+                    text="Import...",
+                    icon=ft.icons.FILE_OPEN,
+                    on_click=lambda _: self._import_picker.pick_files(
+                        dialog_title="Import timers and alarms",
+                        allowed_extensions=list(transfer.FORMATS),
+                    ),
+                ),
+                ft.PopupMenuItem(),
+                ft.PopupMenuItem(
+                    text="Export JSON Lines",
+                    on_click=lambda _: self._pick_export("jsonl"),
+                ),
+                ft.PopupMenuItem(
+                    text="Export CSV",
+                    on_click=lambda _: self._pick_export("csv"),
+                ),
+                ft.PopupMenuItem(
+                    text="Export iCalendar",
+                    on_click=lambda _: self._pick_export("ics"),
+                ),
+            ],
+        )
+
+    def import_file(self, path: Path | str) -> tuple[int, list[str]]:
+        """ファイルを読み込んで追加し、追加した件数と不正な項目のメッセージを返す"""
+        count = 0
+        errors: list[str] = []
+        with open(path, newline="", encoding="utf-8") as file:
+            for batch in transfer.read_batches(file, transfer.format_of(path)):
+                with self._render.lock:
+                    count += self._timer.import_timers(batch.timers)
+                    count += self._alarm.import_alarms(batch.alarms)
+                    self._render.mark()
+                errors.extend(batch.errors)
+        return count, errors
+
+    def export_file(self, path: Path | str) -> int:
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            return transfer.write_entries(
+                file,
+                transfer.format_of(path),
+                self._timer.export_timers(),
+                self._alarm.export_alarms(),
+            )
+
+    def _pick_export(self, format: str) -> None:
+        self._export_format = format
+        self._export_picker.save_file(
+            dialog_title="Export timers and alarms",
+            file_name=f"timers-and-alarms.{format}",
+            allowed_extensions=[format],
+        )
+
+    def _on_import_picked(self, e: ft.FilePickerResultEvent) -> None:
+        if not e.files or e.files[0].path is None:
+            return
+        # NOTE: イベントハンドラは lock を取った状態で呼ばれるため、別スレッドで読む
+        threading.Thread(
+            target=self._import, args=(e.files[0].path,), daemon=True
+        ).start()
+
+    def _import(self, path: str) -> None:
+        try:
+            count, errors = self.import_file(path)
+        except (OSError, ValueError) as error:
+            self._notify(f"Import failed: {error}")
+            return
+        message = f"Imported {count} entries."
+        if errors:
+            message += f" Skipped {len(errors)} invalid entries ({errors[0]})."
+        self._notify(message)
+
+    def _on_export_picked(self, e: ft.FilePickerResultEvent) -> None:
+        if not e.path:
+            return
+        path = Path(e.path)
+        if not path.suffix:
+            path = path.with_suffix(f".{self._export_format}")
+        # NOTE: 書き出しも lock を取った状態で待たないよう、別スレッドで行う
+        threading.Thread(target=self._export, args=(path,), daemon=True).start()
+
+    def _export(self, path: Path) -> None:
+        try:
+            count = self.export_file(path)
+        except (OSError, ValueError) as error:
+            self._notify(f"Export failed: {error}")
+            return
+        self._notify(f"Exported {count} entries to {path.name}.")
+
+    def _notify(self, message: str) -> None:
+        with self._render.lock:
+            self._page.snack_bar = ft.SnackBar(ft.Text(message))
+            self._page.snack_bar.open = True
+            self._render.mark()
@@ -1,28 +1,160 @@
-from datetime import datetime
-from datetime import time as t
-from typing import TypedDict
+NS = 1_000_000_000
 
-import flet as ft
 
+def timer_duration(hours: int, minutes: int, seconds: int) -> int:
+    """タイマーの設定時間をナノ秒で返す (23:59:59 まで、0 秒は不可)"""
+    if (
+        not 0 <= hours <= 23
+        or not 0 <= minutes <= 59
+        or not 0 <= seconds <= 59
+        or hours == minutes == seconds == 0
+    ):
+        raise ValueError("Invalid time entered!")
+    return (hours * 3600 + minutes * 60 + seconds) * NS
 
-class AlarmType(TypedDict):
-    time: datetime
-    time_text: ft.Text
-    active: bool
-    widget: ft.Row | None
 
+def timer_program(
+    work_minutes: int, break_minutes: int, rounds: int
+) -> tuple[tuple[str, int], ...]:
+    """作業と休憩をくり返すプログラムの 1 周分 (休憩 0 分なら作業だけ)"""
+    if not 1 <= work_minutes <= 1439 or not 0 <= break_minutes <= 1439:
+        raise ValueError("Invalid time entered!")
+    if not 1 <= rounds <= 99:
+        raise ValueError("Rounds must be between 1 and 99!")
+    program = [("Work", work_minutes * 60 * NS)]
+    if break_minutes:
+        program.append(("Break", break_minutes * 60 * NS))
+    return tuple(program)
 
-class TimerType(TypedDict):
-    id: str
-    name: str
-    time: t
-    active: bool
-    widget: ft.Container | None
 
+class AlarmType:
+    """アラーム 1 件分 (time は次に発火する壁時計の UNIX 時刻のナノ秒)
 
-class ActiveTimerType(TypedDict):
-    id: str
-    name: str
-    time: t
-    default_time: t
-    active: bool
+    repeat は繰り返す曜日のビットマスク (0 は 1 回だけ)、until は繰り返しを
+    終える日 (date.toordinal() の値)。
+    """
+
+    __slots__ = ("id", "time", "active", "repeat", "until")
+
+    def __init__(
+        self,
+        id: str,
+        time: int,
+        active: bool = True,
+        repeat: int = 0,
+        until: int | None = None,
+    ) -> None:
+        self.id = id
+        self.time = time
+        self.active = active
+        self.repeat = repeat
+        self.until = until
+
+
+class TimerType:
+    """タイマー 1 件分 (時間はすべて整数のナノ秒)
+
+    duration は設定時間、remaining は停止中の残り時間、end は動作中の終了時刻
+    (monotonic)。動作中は end だけを更新し、残り時間は必要なときに end から求める。
+    画面の行はこの記録とは別に Timer が持つ。
+    program を指定するとプログラム (区間の並び) になる。program は 1 周分の
+    (名前, 長さ) の並びで、rounds 周する。segment は実行中の区間の番号で、
+    duration はその区間の長さを表す。
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "duration",
+        "remaining",
+        "end",
+        "program",
+        "rounds",
+        "segment",
+    )
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        duration: int,
+        remaining: int | None = None,
+        end: int | None = None,
+        program: tuple[tuple[str, int], ...] | None = None,
+        rounds: int = 1,
+        segment: int = 0,
+    ) -> None:
+        self.id = id
+        self.name = name
+        self.duration = duration
+        self.remaining = duration if remaining is None else remaining
+        self.end = end
+        self.program = program
+        self.rounds = rounds
+        self.segment = segment
+
+    @property
+    def active(self) -> bool:
+        return self.end is not None
+
+    @property
+    def segments(self) -> int:
+        """区間の数 (プログラムでなければ 1)"""
+        return len(self.program) * self.rounds if self.program else 1
+
+    @property
+    def label(self) -> str:
+        """実行中の区間の名前 (プログラムでなければ空)"""
+        if not self.program:
+            return ""
+        return self.program[self.segment % len(self.program)][0]
+
+    def total(self) -> int:
+        """全区間の長さの合計"""
+        if not self.program:
+            return self.duration
+        return sum(duration for _, duration in self.program) * self.rounds
+
+    def remaining_at(self, now: int) -> int:
+        if self.end is None:
+            return self.remaining
+        return max(0, self.end - now)
+
+    def start(self, now: int) -> int:
+        """残り時間から終了時刻を決めて返す (終了済みなら最初の区間から始める)"""
+        if self.remaining <= 0:
+            self._rewind()
+        self.end = now + self.remaining
+        return self.end
+
+    def next_segment(self) -> int | None:
+        """次の区間に進めて、その終了時刻を返す (最後の区間なら None)
+
+        次の区間は発火した時刻やユーザーの操作ではなく、終わった区間の終了時刻
+        から数えるので、区間をいくつ重ねても終了時刻はずれない。
+        """
+        if self.end is None or self.segment + 1 >= self.segments:
+            return None
+        self.segment += 1
+        self.duration = self.program[self.segment % len(self.program)][1]
+        self.remaining = self.duration
+        self.end += self.duration
+        return self.end
+
+    def pause(self, now: int) -> None:
+        self.remaining = self.remaining_at(now)
+        self.end = None
+
+    def finish(self) -> None:
+        self.remaining = 0
+        self.end = None
+
+    def reset(self) -> None:
+        self._rewind()
+        self.end = None
+
+    def _rewind(self) -> None:
+        if self.program:
+            self.segment = 0
+            self.duration = self.program[0][1]
+        self.remaining = self.duration
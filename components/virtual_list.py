@@ -0,0 +1,132 @@
+import math
+from collections.abc import Callable, Iterable, Sequence
+from typing import Any
+
+import flet as ft
+
+
+class VirtualList:
+    """表示中の行と前後の余白分だけを作り、スクロールに合わせて使い回すリスト
+
+    行の高さは item_extent に固定し、表示範囲より前後の行は高さだけを持つ
+    余白のコンテナで表す。行のコントロールは build_row で作成し、bind_row で
+    表示する項目の内容を書き込む (項目は row.data で参照できる)。
+    要素数にかかわらず、画面に置くコントロールは表示範囲分だけになる。
+    スクロールで書き直した行は update (既定は control.update()) で送る。
+    """
+
+    def __init__(
+        self,
+        build_row: Callable[[], ft.Control],
+        bind_row: Callable[[ft.Control, Any], None],
+        item_extent: float,
+        visible: int = 20,
+        buffer: int = 10,
+        update: Callable[[ft.Control], None] | None = None,
+        **column_options: Any,
+    ) -> None:
+        self._build_row = build_row
+        self._update = update or (lambda control: control.update())
+        self._bind_row = bind_row
+        self._item_extent = item_extent
+        self._buffer = buffer
+        self._items: list[Any] | Sequence[Any] = []
+        self._start = 0
+        self._top = ft.Container(height=0)
+        self._bottom = ft.Container(height=0)
+        self._rows = [self._new_row() for _ in range(visible + 2 * buffer)]
+        self.control = ft.Column(
+            [self._top, *self._rows, self._bottom],
+            spacing=0,
+            scroll=ft.ScrollMode.ADAPTIVE,
+            on_scroll=self._on_scroll,
+            on_scroll_interval=50,
+            **column_options,
+        )
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def reset(self, items: Iterable[Any]) -> None:
+        self._items = list(items)
+        self._render()
+
+    def view(self, items: Sequence[Any]) -> None:
+        """items を複製せずにそのまま表示する (items が変わったら再度呼ぶ)
+
+        insert/append などの変更はできなくなるが、要素数にかかわらずメモリは増えない。
+        """
+        self._items = items
+        self._render()
+
+    def insert(self, index: int, item: Any) -> None:
+        self.insert_many(((index, item),))
+
+    def insert_many(self, indexed: Iterable[tuple[int, Any]]) -> None:
+        """(位置, 項目) の順に挿入し、行の書き直しは最後に 1 回だけ行う"""
+        for index, item in indexed:
+            self._items.insert(index, item)
+        self._render()
+
+    def append(self, item: Any) -> None:
+        self.extend((item,))
+
+    def extend(self, items: Iterable[Any]) -> None:
+        # NOTE: 末尾への追加で変わるのは追加した行か下の余白だけなので、全行は書き直さない
+        first = len(self._items)
+        self._items.extend(items)
+        end = min(len(self._items), self._start + len(self._rows))
+        for index in range(first, end):
+            self._bind(self._rows[index - self._start], index)
+        self._bottom.height = (len(self._items) - end) * self._item_extent
+
+    def pop(self, index: int) -> Any:
+        item = self._items.pop(index)
+        self._render()
+        return item
+
+    def refresh(self, index: int) -> ft.Control | None:
+        """index の項目の行を書き直して返す (表示範囲外なら None)"""
+        if not self._start <= index < self._start + len(self._rows):
+            return None
+        row = self._rows[index - self._start]
+        self._bind(row, index)
+        return row
+
+    def _new_row(self) -> ft.Control:
+        row = self._build_row()
+        row.visible = False
+        return row
+
+    def _bind(self, row: ft.Control, index: int) -> None:
+        if index < len(self._items):
+            row.visible = True
+            row.data = self._items[index]
+            self._bind_row(row, row.data)
+        else:
+            row.visible = False
+            row.data = None
+
+    def _render(self) -> None:
+        # NOTE: 値が変わらない属性は Flet が送らないので、行はすべて書き直してよい
+        self._start = min(self._start, max(0, len(self._items) - len(self._rows)))
+        for offset, row in enumerate(self._rows):
+            self._bind(row, self._start + offset)
+        end = min(len(self._items), self._start + len(self._rows))
+        self._top.height = self._start * self._item_extent
+        self._bottom.height = (len(self._items) - end) * self._item_extent
+
+    def _on_scroll(self, e: ft.OnScrollEvent) -> None:
+        needed = math.ceil(e.viewport_dimension / self._item_extent) + 2 * self._buffer
+        grow = needed - len(self._rows)
+        if grow > 0:
+            # NOTE: 画面が想定より大きい場合は行を増やす
+            rows = [self._new_row() for _ in range(grow)]
+            self._rows.extend(rows)
+            self.control.controls[-1:-1] = rows
+        start = max(0, int(e.pixels // self._item_extent) - self._buffer)
+        if start == self._start and grow <= 0:
+            return
+        self._start = start
+        self._render()
+        self._update(self.control)
@@ -0,0 +1,9 @@
+"""Flet の画面なしでタイマーとアラームを動かすデーモンと、その CLI
+
+python -m daemon serve [--port 8765 | --socket PATH] [--silent]
+python -m daemon timer add "Tea" 00:03:00 --start
+python -m daemon alarm add 07:30 --repeat Weekdays
+python -m daemon status
+
+起動を速く、メモリを小さく保つため、このパッケージからは flet を import しない。
+"""
@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+from pathlib import Path
+
+from daemon.client import Client, ClientError
+from daemon.server import serve
+from daemon.service import Service, SilentSound
+from utils import metrics
+from utils.scheduler import alarm_scheduler, timer_scheduler
+from utils.storage import default_storage
+
+DEFAULT_PORT = 8765
+
+
+def _open_sound(silent: bool):
+    if silent:
+        return SilentSound()
+    try:
+        # NOTE: pygame の読み込みは重いので、音を鳴らす場合だけ import する
+        from utils.sound import Sound
+
+        return Sound()
+    except (ImportError, RuntimeError) as error:
+        print(f"Sound is disabled: {error}", file=sys.stderr)
+        return SilentSound()
+
+
+def _serve(args: argparse.Namespace) -> None:
+    service = Service(
+        _open_sound(args.silent),
+        default_storage(),
+        timer_scheduler(),
+        alarm_scheduler(),
+    )
+    server = serve(service, args.port, args.socket)
+    metrics.start()
+    where = args.socket or f"http://127.0.0.1:{server.server_address[1]}"
+    print(f"Listening on {where}", flush=True)
+
+    stopped = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stopped.set())
+    try:
+        stopped.wait()
+    except KeyboardInterrupt:
+        pass
+    server.shutdown()
+    service.close()
+    if args.socket:
+        args.socket.unlink(missing_ok=True)
+
+
+def _call(args: argparse.Namespace, method: str, path: str, body=None):
+    try:
+        return Client(args.port, args.socket).request(method, path, body)
+    except ClientError as error:
+        sys.exit(f"Error: {error}")
+    except OSError as error:
+        sys.exit(f"Cannot connect to the daemon: {error}")
+
+
+def _request(args: argparse.Namespace, method: str, path: str, body=None) -> None:
+    result = _call(args, method, path, body)
+    if result is not None:
+        print(json.dumps(result, indent=2, ensure_ascii=False))
+
+
+def _timer(args: argparse.Namespace) -> None:
+    if args.action == "list":
+        _request(args, "GET", "/timers")
+    elif args.action == "add":
+        body = {"name": args.name, "duration": args.duration}
+        if not args.start:
+            _request(args, "POST", "/timers", body)
+            return
+        timer = _call(args, "POST", "/timers", body)
+        _request(args, "POST", f"/timers/{timer['id']}/start")
+    elif args.action == "delete":
+        _request(args, "DELETE", f"/timers/{args.id}")
+    else:
+        _request(args, "POST", f"/timers/{args.id}/{args.action}")
+
+
+def _alarm(args: argparse.Namespace) -> None:
+    if args.action == "list":
+        _request(args, "GET", "/alarms")
+    elif args.action == "add":
+        body = {
+            "time": args.time,
+            "repeat": args.repeat,
+            "until": args.until,
+            "active": not args.inactive,
+        }
+        _request(args, "POST", "/alarms", body)
+    elif args.action == "delete":
+        _request(args, "DELETE", f"/alarms/{args.id}")
+    else:
+        _request(args, "POST", f"/alarms/{args.id}/{args.action}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(prog="python -m daemon")
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=int(os.environ.get("TIMER_APP_DAEMON_PORT", DEFAULT_PORT)),
+        help="制御 API の TCP ポート (127.0.0.1)",
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        default=os.environ.get("TIMER_APP_DAEMON_SOCKET") or None,
+        help="TCP の代わりに使う Unix ソケットのパス",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    serve_parser = commands.add_parser("serve", help="デーモンを起動する")
+    serve_parser.add_argument("--silent", action="store_true", help="音を鳴らさない")
+    serve_parser.set_defaults(handler=_serve)
+
+    status_parser = commands.add_parser("status", help="件数と鳴っているもの")
+    status_parser.set_defaults(handler=lambda args: _request(args, "GET", "/status"))
+
+    stop_parser = commands.add_parser("stop", help="鳴っている音を止める")
+    stop_parser.add_argument("id", nargs="?", help="省略するとすべて止める")
+    stop_parser.set_defaults(
+        handler=lambda args: _request(args, "POST", "/stop", {"id": args.id})
+    )
+
+    timer_parser = commands.add_parser("timer", help="タイマーの操作")
+    timer_actions = timer_parser.add_subparsers(dest="action", required=True)
+    timer_actions.add_parser("list")
+    timer_add = timer_actions.add_parser("add")
+    timer_add.add_argument("name")
+    timer_add.add_argument("duration", help="HH:MM:SS")
+    timer_add.add_argument("--start", action="store_true", help="追加してすぐ開始")
+    for action in ("start", "pause", "delete"):
+        timer_actions.add_parser(action).add_argument("id")
+    timer_parser.set_defaults(handler=_timer)
+
+    alarm_parser = commands.add_parser("alarm", help="アラームの操作")
+    alarm_actions = alarm_parser.add_subparsers(dest="action", required=True)
+    alarm_actions.add_parser("list")
+    alarm_add = alarm_actions.add_parser("add")
+    alarm_add.add_argument("time", help="HH:MM")
+    alarm_add.add_argument("--repeat", default="", help="Daily, Weekdays, Mon,Wed,...")
+    alarm_add.add_argument("--until", help="繰り返しを終える日 (YYYY-MM-DD)")
+    alarm_add.add_argument("--inactive", action="store_true", help="無効の状態で追加")
+    for action in ("start", "pause", "delete"):
+        alarm_actions.add_parser(action).add_argument("id")
+    alarm_parser.set_defaults(handler=_alarm)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
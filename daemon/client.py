@@ -0,0 +1,54 @@
+import http.client
+import json
+import socket
+from pathlib import Path
+from typing import Any
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path: Path, timeout: float) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(str(self._path))
+
+
+class ClientError(Exception):
+    """制御 API がエラーを返した"""
+
+
+class Client:
+    """デーモンの制御 API を呼ぶ (socket_path があれば Unix ソケットを使う)"""
+
+    def __init__(
+        self,
+        port: int | None = None,
+        socket_path: Path | None = None,
+        host: str = "127.0.0.1",
+        timeout: float = 10,
+    ) -> None:
+        self._port = port
+        self._socket_path = socket_path
+        self._host = host
+        self._timeout = timeout
+
+    def request(self, method: str, path: str, body: dict | None = None) -> Any:
+        if self._socket_path is not None:
+            conn = _UnixConnection(self._socket_path, self._timeout)
+        else:
+            conn = http.client.HTTPConnection(
+                self._host, self._port, timeout=self._timeout
+            )
+        try:
+            data = json.dumps(body or {}).encode()
+            conn.request(method, path, data, {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            result = json.loads(response.read() or b"null")
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise ClientError(result.get("error", response.reason))
+        return result
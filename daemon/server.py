@@ -0,0 +1,113 @@
+"""デーモンの制御 API (JSON over HTTP、TCP か Unix ソケットで待ち受ける)
+
+GET    /status                      件数と鳴っているもの
+GET    /timers, /alarms             一覧
+POST   /timers, /alarms             追加 (本文はインポートの 1 件と同じ JSON)
+POST   /timers/<id>/start|pause     タイマーの開始/一時停止
+POST   /alarms/<id>/start|pause     アラームの有効化/無効化
+DELETE /timers/<id>, /alarms/<id>   削除
+POST   /stop                        音を止める (本文の id を省略するとすべて)
+"""
+
+import json
+import os
+import re
+import socketserver
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from daemon.service import Service
+
+# NOTE: (メソッド, パス, 処理, 成功時のステータス)。パスに id があれば処理に id を渡す
+_ROUTES = [
+    ("GET", r"/status", lambda service, body: service.status(), 200),
+    ("GET", r"/timers", lambda service, body: service.list_timers(), 200),
+    ("POST", r"/timers", lambda service, body: service.add_timer(body), 201),
+    ("POST", r"/timers/(?P<id>[^/]+)/start", Service.start_timer, 200),
+    ("POST", r"/timers/(?P<id>[^/]+)/pause", Service.pause_timer, 200),
+    ("DELETE", r"/timers/(?P<id>[^/]+)", Service.delete_timer, 200),
+    ("GET", r"/alarms", lambda service, body: service.list_alarms(), 200),
+    ("POST", r"/alarms", lambda service, body: service.add_alarm(body), 201),
+    ("POST", r"/alarms/(?P<id>[^/]+)/start", Service.start_alarm, 200),
+    ("POST", r"/alarms/(?P<id>[^/]+)/pause", Service.pause_alarm, 200),
+    ("DELETE", r"/alarms/(?P<id>[^/]+)", Service.delete_alarm, 200),
+    ("POST", r"/stop", lambda service, body: service.stop(body.get("id")), 200),
+]
+_COMPILED = [
+    (method, re.compile(path), action, status)
+    for method, path, action, status in _ROUTES
+]
+
+
+class _UnixHTTPServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def serve(
+    service: Service,
+    port: int | None = None,
+    socket_path: Path | None = None,
+    host: str = "127.0.0.1",
+) -> socketserver.BaseServer:
+    """制御 API のサーバーを別スレッドで起動する (socket_path があれば Unix ソケット)"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            self._dispatch("GET")
+
+        def do_POST(self) -> None:
+            self._dispatch("POST")
+
+        def do_DELETE(self) -> None:
+            self._dispatch("DELETE")
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+        def _dispatch(self, method: str) -> None:
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                body = json.loads(self.rfile.read(length) or b"{}")
+                if not isinstance(body, dict):
+                    raise ValueError("Expected a JSON object")
+            except ValueError as error:
+                self._reply(400, {"error": str(error)})
+                return
+            path = self.path.split("?", 1)[0].rstrip("/")
+            for route_method, pattern, action, status in _COMPILED:
+                match = pattern.fullmatch(path)
+                if match is None or route_method != method:
+                    continue
+                try:
+                    if "id" in match.groupdict():
+                        result = action(service, match["id"])
+                    else:
+                        result = action(service, body)
+                except KeyError:
+                    self._reply(404, {"error": "Not found"})
+                except ValueError as error:
+                    self._reply(400, {"error": str(error)})
+                else:
+                    self._reply(status, result)
+                return
+            self._reply(404, {"error": "Not found"})
+
+        def _reply(self, status: int, result: Any) -> None:
+            data = json.dumps(result, ensure_ascii=False).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    if socket_path is not None:
+        # NOTE: 前回の起動で残ったソケットファイルは消してから作り直す
+        socket_path.unlink(missing_ok=True)
+        server: socketserver.BaseServer = _UnixHTTPServer(str(socket_path), Handler)
+        os.chmod(socket_path, 0o600)
+    else:
+        server = ThreadingHTTPServer((host, port or 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,213 @@
+import threading
+import uuid
+from collections.abc import Iterable
+from datetime import datetime
+from typing import TYPE_CHECKING, Any
+
+from components.types import NS, AlarmType, TimerType
+from utils import records, transfer
+from utils.clock import Clock
+from utils.recurrence import describe
+from utils.records import to_datetime, until_of
+from utils.scheduler import Scheduler
+from utils.storage import Storage
+from utils.stores import AlarmStore, TimerStore
+from utils.webhooks import Webhooks
+
+if TYPE_CHECKING:
+    from utils.sound import Sound
+
+
+class SilentSound:
+    """音声デバイスがない場合に使う、何も鳴らさないサウンド"""
+
+    def play_alarm_sound(self, key: str = "default") -> None:
+        pass
+
+    def stop_alarm_sound(self, key: str | None = None) -> None:
+        pass
+
+
+# NOTE: デーモンはストアを購読する唯一の相手で、他のセッションからの変更はない
+_LISTENER = "daemon"
+
+
+def _ignore(ids: Iterable[str]) -> None:
+    pass
+
+
+class Service:
+    """画面を持たずにタイマーとアラームを動かす
+
+    記録・スケジュール・保存・Webhook への送信はアプリと同じ TimerStore /
+    AlarmStore に任せ、ここでは制御 API から呼ばれる操作を受け付ける。発火した
+    ものは音を鳴らして、止められるまで ringing に残す。
+    """
+
+    def __init__(
+        self,
+        sound: "Sound | SilentSound",
+        storage: Storage,
+        timer_scheduler: Scheduler,
+        alarm_scheduler: Scheduler,
+        webhooks: Webhooks | None = None,
+    ) -> None:
+        self._sound = sound
+        self._clock: Clock = timer_scheduler.clock
+        self._timers = TimerStore(storage, timer_scheduler, webhooks=webhooks)
+        self._alarms = AlarmStore(storage, alarm_scheduler, webhooks=webhooks)
+        self.timers = self._timers.timers
+        self.alarms = self._alarms.alarms
+        # NOTE: 制御 API のスレッドとスケジューラのスレッドから呼ばれる
+        self._lock = threading.Lock()
+        self.ringing: dict[str, str] = {}
+        self._timers.subscribe(
+            _LISTENER, lambda timer, message: self._ring(timer.id, message), _ignore
+        )
+        self._alarms.subscribe(
+            _LISTENER, lambda alarm, message: self._ring(alarm.id, message), _ignore
+        )
+
+    def close(self) -> None:
+        for store in (self._timers, self._alarms):
+            store.unsubscribe(_LISTENER)
+            store.close()
+        self._sound.stop_alarm_sound()
+
+    def status(self) -> dict[str, Any]:
+        with self._timers.lock:
+            timers = len(self.timers)
+            running = sum(timer.active for timer in self.timers.values())
+        with self._alarms.lock:
+            alarms = len(self.alarms)
+            active = sum(alarm.active for alarm in self.alarms.values())
+        with self._lock:
+            ringing = [
+                {"id": id, "message": message} for id, message in self.ringing.items()
+            ]
+        return {
+            "timers": timers,
+            "running_timers": running,
+            "alarms": alarms,
+            "active_alarms": active,
+            "ringing": ringing,
+        }
+
+    def list_timers(self) -> list[dict[str, Any]]:
+        with self._timers.lock:
+            return [self._describe_timer(timer) for timer in self.timers.values()]
+
+    def add_timer(self, fields: dict[str, Any]) -> dict[str, Any]:
+        """fields はインポートの 1 件と同じ形式 (name, duration)"""
+        entry = transfer.timer_entry(fields)
+        with self._timers.lock:
+            name = entry.name or f"Timer {len(self.timers) + 1}"
+            timer = TimerType(str(uuid.uuid4()), name, entry.duration)
+            self._timers.add((timer,))
+            return self._describe_timer(timer)
+
+    def start_timer(self, id: str) -> dict[str, Any]:
+        with self._timers.lock:
+            timer = self.timers[id]
+            if not timer.active:
+                self._timers.start(timer)
+            return self._describe_timer(timer)
+
+    def pause_timer(self, id: str) -> dict[str, Any]:
+        with self._timers.lock:
+            timer = self.timers[id]
+            if timer.active:
+                self._timers.pause(timer)
+            return self._describe_timer(timer)
+
+    def delete_timer(self, id: str) -> None:
+        with self._timers.lock:
+            self._timers.delete(self.timers[id])
+        self.stop(id)
+
+    def list_alarms(self) -> list[dict[str, Any]]:
+        with self._alarms.lock:
+            return [self._describe_alarm(alarm) for alarm in self.alarms.values()]
+
+    def add_alarm(self, fields: dict[str, Any]) -> dict[str, Any]:
+        """fields はインポートの 1 件と同じ形式 (time, active, repeat, until)"""
+        entry = transfer.alarm_entry(fields)
+        with self._alarms.lock:
+            now = self._alarms.now()
+            at = datetime.combine(now.date(), entry.at)
+            alarm = AlarmType(
+                str(uuid.uuid4()),
+                records.to_ns(at.timestamp()),
+                entry.active,
+                entry.repeat,
+                entry.until.toordinal() if entry.until else None,
+            )
+            if alarm.active:
+                self._alarms.move_to_next(alarm, at, now)
+            self._alarms.add((alarm,))
+            return self._describe_alarm(alarm)
+
+    def start_alarm(self, id: str) -> dict[str, Any]:
+        """アラームを有効にする (次に来るその時刻に鳴らす)"""
+        with self._alarms.lock:
+            alarm = self.alarms[id]
+            alarm.active = True
+            self._alarms.move_to_next(alarm, to_datetime(alarm.time))
+            self._alarms.update(alarm)
+            return self._describe_alarm(alarm)
+
+    def pause_alarm(self, id: str) -> dict[str, Any]:
+        """アラームを無効にする"""
+        with self._alarms.lock:
+            alarm = self.alarms[id]
+            alarm.active = False
+            self._alarms.update(alarm)
+            return self._describe_alarm(alarm)
+
+    def delete_alarm(self, id: str) -> None:
+        with self._alarms.lock:
+            self._alarms.delete(self.alarms[id])
+        self.stop(id)
+
+    def stop(self, id: str | None = None) -> None:
+        """鳴っている音を止める (None の場合はすべて止める)"""
+        with self._lock:
+            self._sound.stop_alarm_sound(id)
+            if id is None:
+                self.ringing.clear()
+            else:
+                self.ringing.pop(id, None)
+
+    def _ring(self, id: str, message: str) -> None:
+        """ストアが発火を知らせたときに呼ばれる (Webhook への送信はストアが行う)"""
+        with self._lock:
+            self.ringing[id] = message
+            self._sound.play_alarm_sound(id)
+        print(f"[{self._alarms.now():%Y-%m-%d %H:%M:%S}] {message} ({id})", flush=True)
+
+    def _describe_timer(self, timer: TimerType) -> dict[str, Any]:
+        remaining = timer.remaining_at(self._clock.monotonic_ns())
+        return {
+            "id": timer.id,
+            "name": timer.name,
+            "duration": timer.duration / NS,
+            "remaining": -(-remaining // NS),
+            "running": timer.active,
+            "segment": (
+                f"{timer.label} {timer.segment + 1}/{timer.segments}"
+                if timer.program
+                else None
+            ),
+            "ringing": timer.id in self.ringing,
+        }
+
+    def _describe_alarm(self, alarm: AlarmType) -> dict[str, Any]:
+        until = until_of(alarm)
+        return {
+            "id": alarm.id,
+            "time": to_datetime(alarm.time).isoformat(timespec="minutes"),
+            "active": alarm.active,
+            "repeat": describe(alarm.repeat),
+            "until": until.isoformat() if until else None,
+            "ringing": alarm.id in self.ringing,
+        }
@@ -1,36 +1,92 @@
-import threading
+import os
 
 import flet as ft
 
 from components.alarm import Alarm
+from components.notifications import Notifications
+from components.render import Renderer
 from components.sidebar import sidebar
+from components.stopwatch import Stopwatch
 from components.timer import Timer
+from components.transfer import Transfer
+from utils import metrics
+from utils.scheduler import async_alarm_scheduler, async_timer_scheduler
 from utils.sound import Sound
 
 sound = Sound()
 
 
 def main(page: ft.Page):
+    # NOTE: 同じページの Alarm と Timer は Renderer と通知を共有する
+    render = Renderer(page)
+    notifications = Notifications(page, sound, render)
+    build_page(
+        page,
+        render,
+        notifications,
+        Alarm(sound, page, render=render, notifications=notifications),
+        Timer(sound, page, render=render, notifications=notifications),
+        Stopwatch(page, render=render),
+    )
+
+
+async def main_async(page: ft.Page):
+    """スケジューラを Flet のイベントループ上のタスクとして動かす"""
+    render = Renderer(page, async_timer_scheduler())
+    notifications = Notifications(page, sound, render)
+    build_page(
+        page,
+        render,
+        notifications,
+        Alarm(
+            sound,
+            page,
+            async_alarm_scheduler(),
+            render=render,
+            notifications=notifications,
+        ),
+        Timer(
+            sound,
+            page,
+            async_timer_scheduler(),
+            render=render,
+            notifications=notifications,
+        ),
+        Stopwatch(page, async_timer_scheduler(), render=render),
+    )
+
+
+def build_page(
+    page: ft.Page,
+    render: Renderer,
+    notifications: Notifications,
+    alarm: Alarm,
+    timer: Timer,
+    stopwatch: Stopwatch,
+):
+    metrics.instrument_page(page)
     page.title = "Alarm Manager"
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
-    alarm = Alarm(sound, page)
-    timer = Timer(sound, page)
+    # NOTE: 画面は一度だけ作成し、切り替えは表示/非表示だけで行う
+    views = [alarm.alarm(), timer.timer(), stopwatch.stopwatch()]
+
+    def select(selected_index: int) -> None:
+        for index, view in enumerate(views):
+            view.visible = index == selected_index
+        # NOTE: ストップウォッチは表示されている間だけ数字を書き換える
+        stopwatch.set_visible(views[2].visible)
+
+    select(0)
     content = ft.Container(
+        content=ft.Column(views, expand=True),
         expand=True,
     )
-    selected_index = 0
-    content.content = alarm.alarm()
 
     def on_change(e: ft.ControlEvent):
-        nonlocal selected_index
-        selected_index = e.control.selected_index
-        if selected_index == 0:
-            content.content = alarm.alarm()
-        else:
-            content.content = timer.timer()
-        page.update()
-
-    rail = sidebar(on_change)
+        select(e.control.selected_index)
+        render.mark(content)
+
+    rail = sidebar(on_change, Transfer(page, alarm, timer, render).menu())
     page.add(
         ft.Row(
             [
@@ -39,13 +95,22 @@ def main(page: ft.Page):
                 content,
             ],
             expand=True,
-        )
+        ),
+        notifications.history_view,
     )
 
-    alarm_thread = threading.Thread(target=alarm.check_alarms, daemon=True)
-    timer_thread = threading.Thread(target=timer.check_timers, daemon=True)
-    alarm_thread.start()
-    timer_thread.start()
+    def on_close(_):
+        # NOTE: スケジューラのスレッドは全セッションで共有しているので、
+        # セッションが閉じたらそのセッションの登録だけを外す
+        alarm.close()
+        timer.close()
+        stopwatch.close()
+        notifications.close()
+        render.close()
+
+    page.on_close = on_close
 
 
-ft.app(target=main)
+metrics.start()
+# NOTE: TIMER_APP_ASYNC=1 で asyncio 版のスケジューラを使う
+ft.app(target=main_async if os.environ.get("TIMER_APP_ASYNC") == "1" else main)
@@ -0,0 +1,107 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.stub_page import SilentSound, stub_page
+from components.alarm import Alarm
+from components.notifications import Notifications
+from components.render import Renderer
+from components.timer import Timer
+from utils.clock import VirtualClock
+from utils.scheduler import Scheduler
+from utils.storage import Storage
+from utils.stores import AlarmStore, TimerStore
+
+
+def pytest_configure(config) -> None:
+    # NOTE: ft.colors / ft.icons の非推奨の警告はアプリ全体で移行するまで表示しない
+    config.addinivalue_line(
+        "filterwarnings", "ignore:.*enum is deprecated:DeprecationWarning"
+    )
+
+
+class RecordingWebhooks:
+    """Webhook に送る代わりに、発火したものの id と遅れを記録する"""
+
+    def __init__(self) -> None:
+        self.targets: list[str] = []
+        self.lateness: list[float] = []
+
+    def fired(self, clock, kind, target, name, message, lateness) -> None:
+        self.targets.append(target)
+        self.lateness.append(lateness)
+
+
+@pytest.fixture
+def clock() -> VirtualClock:
+    return VirtualClock(start=datetime(2024, 1, 1, 9).timestamp())
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = Storage(tmp_path / "data.sqlite3", batch_delay=0)
+    yield storage
+    storage.close()
+
+
+@pytest.fixture
+def app(clock, storage):
+    """1 つのプロセスの状態 (スケジューラは start() せず run() で進める)"""
+    timer_scheduler = Scheduler(clock)
+    alarm_scheduler = Scheduler(clock, wall=True)
+    webhooks = RecordingWebhooks()
+
+    def run(seconds: float = 0) -> None:
+        clock.advance(seconds)
+        for scheduler in (alarm_scheduler, timer_scheduler):
+            scheduler.run_pending()
+
+    return SimpleNamespace(
+        clock=clock,
+        timer_scheduler=timer_scheduler,
+        alarm_scheduler=alarm_scheduler,
+        webhooks=webhooks,
+        timers=TimerStore(storage, timer_scheduler, webhooks=webhooks),
+        alarms=AlarmStore(storage, alarm_scheduler, webhooks=webhooks),
+        run=run,
+    )
+
+
+@pytest.fixture
+def open_session(app):
+    """app のストアを共有するセッション (ブラウザのタブ 1 つ分) を開く"""
+
+    def open() -> SimpleNamespace:
+        page, conn = stub_page()
+        sound = SilentSound()
+        render = Renderer(page, app.timer_scheduler)
+        notifications = Notifications(page, sound, render, app.clock)
+        alarm = Alarm(
+            sound,
+            page,
+            app.alarm_scheduler,
+            app.alarms,
+            render=render,
+            notifications=notifications,
+        )
+        timer = Timer(
+            sound,
+            page,
+            app.timer_scheduler,
+            app.timers,
+            render=render,
+            notifications=notifications,
+        )
+        page.add(alarm.alarm(), timer.timer())
+        return SimpleNamespace(
+            page=page,
+            conn=conn,
+            sound=sound,
+            render=render,
+            notifications=notifications,
+            alarm=alarm,
+            timer=timer,
+        )
+
+    return open
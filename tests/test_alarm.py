@@ -0,0 +1,27 @@
+from datetime import time
+
+
+def _switch(row):
+    return row.content.controls[0].controls[0]
+
+
+def test_fired_alarm_row_is_marked(app, open_session, monkeypatch):
+    session = open_session()
+    session.alarm._add_alarm(time(9, 1))
+    app.run()
+    session.render.flush()
+    row = session.alarm._alarm_rows._rows[0]
+    assert _switch(row).value
+
+    marked = []
+    mark = session.render.mark
+
+    def spy(*controls):
+        marked.extend(controls)
+        mark(*controls)
+
+    monkeypatch.setattr(session.render, "mark", spy)
+    app.run(60)
+    # NOTE: 1 回きりのアラームは発火するとスイッチが OFF になり、その行が送られる
+    assert not _switch(row).value
+    assert any(control is row for control in marked)
@@ -0,0 +1,41 @@
+from benchmarks.stub_page import stub_page
+from components.notifications import Notifications
+from components.render import Renderer
+
+
+class SharedSound:
+    """プロセスで 1 つの Sound の代わりに、鳴っている key を記録する"""
+
+    def __init__(self) -> None:
+        self.playing: set[str] = set()
+
+    def play_alarm_sound(self, key: str = "default") -> None:
+        self.playing.add(key)
+
+    def stop_alarm_sound(self, key: str | None = None) -> None:
+        if key is None:
+            self.playing.clear()
+        else:
+            self.playing.discard(key)
+
+
+def test_sound_stops_when_the_last_session_stops(app):
+    sound = SharedSound()
+    first, second = (
+        Notifications(page, sound, Renderer(page, app.timer_scheduler), app.clock)
+        for page, _ in (stub_page(), stub_page())
+    )
+    first.notify("a", "A")
+    second.notify("a", "A")
+    # NOTE: 他のタブが止めても、まだ鳴っているタブがあれば音は止めない
+    first.stop()
+    assert sound.playing
+    first.notify("b", "B")
+    second.stop()
+    assert sound.playing
+    first.stop()
+    assert not sound.playing
+
+    second.notify("c", "C")
+    second.close()
+    assert not sound.playing
@@ -0,0 +1,45 @@
+import pytest
+
+from benchmarks.stub_page import SilentSound
+from daemon.service import Service
+
+
+@pytest.fixture
+def service(app, storage):
+    service = Service(
+        SilentSound(), storage, app.timer_scheduler, app.alarm_scheduler, app.webhooks
+    )
+    yield service
+    service.close()
+
+
+def test_timer_rings_once(app, service):
+    timer = service.add_timer({"name": "Tea", "duration": "00:03:00"})
+    service.start_timer(timer["id"])
+    app.run(180)
+    assert app.webhooks.targets == [timer["id"]]
+    assert service.status()["ringing"] == [
+        {"id": timer["id"], "message": "Timer 'Tea' has reached the set time!"}
+    ]
+
+
+@pytest.mark.parametrize("action", ["pause_timer", "delete_timer"])
+def test_timer_changed_after_pop_is_not_rung(app, service, action):
+    id = service.add_timer({"name": "Tea", "duration": "00:03:00"})["id"]
+    service.start_timer(id)
+    timer = service.timers[id]
+    app.clock.advance(180)
+    # NOTE: スケジューラが取り出した直後に制御 API から操作された場合
+    getattr(service, action)(id)
+    service._timers._finish_timer(timer)
+    assert app.webhooks.targets == [] and service.ringing == {}
+
+
+@pytest.mark.parametrize("action", ["pause_alarm", "delete_alarm"])
+def test_alarm_changed_after_pop_is_not_rung(app, service, action):
+    id = service.add_alarm({"time": "09:01"})["id"]
+    alarm = service.alarms[id]
+    app.clock.advance(60)
+    getattr(service, action)(id)
+    service._alarms._fire_alarm(alarm)
+    assert app.webhooks.targets == [] and service.ringing == {}
@@ -0,0 +1,26 @@
+from benchmarks.stub_page import stub_page
+from components.render import Renderer
+from components.stopwatch import Stopwatch
+
+
+def test_hidden_stopwatch_stops_redrawing(app):
+    page, _ = stub_page()
+    render = Renderer(page, app.timer_scheduler)
+    stopwatch = Stopwatch(page, app.timer_scheduler, render=render)
+    page.add(stopwatch.stopwatch())
+    marked = []
+    render.mark = lambda *controls: marked.extend(controls)
+    stopwatch.start()
+    stopwatch.set_visible(False)
+    stopwatch.lap()
+    marked.clear()
+    app.run(1)
+    assert stopwatch._digits not in marked
+    assert app.timer_scheduler.next_deadline() is None
+
+    # NOTE: 表示されたら、その時点の経過時間とラップで一度書き直して再開する
+    stopwatch.set_visible(True)
+    assert stopwatch._digits.value == "00:01.00"
+    assert stopwatch._stats in marked
+    assert app.timer_scheduler.next_deadline() is not None
+    stopwatch.close()
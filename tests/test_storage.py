@@ -0,0 +1,29 @@
+import sqlite3
+from contextlib import closing
+from time import sleep
+
+from utils import storage
+from utils.storage import Storage
+
+
+def test_write_is_retried_while_database_is_locked(tmp_path, monkeypatch, capfd):
+    monkeypatch.setattr(storage, "BUSY_TIMEOUT", 0.05)
+    monkeypatch.setattr(storage, "RETRY_DELAY", 0.05)
+    path = tmp_path / "data.sqlite3"
+    db = Storage(path, batch_delay=0)
+    # NOTE: 別の接続 (デーモンなど) が書き込みのロックを持っている状態にする
+    with closing(sqlite3.connect(path)) as other:
+        other.execute("BEGIN IMMEDIATE")
+        db.save_alarm("a", 1.0, True)
+        db.save_alarm("b", 2.0, True)
+        sleep(0.3)
+        other.rollback()
+    assert "database is locked" in capfd.readouterr().err
+    # NOTE: ロックが外れた後の書き込みも失われない
+    db.save_alarm("a", 3.0, False)
+    db.close()
+    db = Storage(path)
+    rows = {row["id"]: row for row in db.load_alarms()}
+    db.close()
+    assert rows["a"]["time"] == 3.0 and not rows["a"]["active"]
+    assert rows["b"]["time"] == 2.0
@@ -0,0 +1,88 @@
+from datetime import time
+from types import SimpleNamespace
+
+from components.types import NS, TimerType
+from utils.recurrence import DAILY
+
+
+def test_alarm_fires_once_for_all_sessions(app, open_session):
+    first, second = open_session(), open_session()
+    first.alarm._add_alarm(time(9, 1))
+    (alarm,) = app.alarms.alarms.values()
+    app.run()
+    # NOTE: 他のセッションにも行が追加される
+    assert alarm.id in second.alarm._row_keys
+
+    app.run(60)
+    assert app.webhooks.targets == [alarm.id]
+    assert not alarm.active
+    for session in (first, second):
+        assert alarm.id in session.notifications.ringing
+
+
+def test_alarm_deleted_in_one_session_is_removed_from_others(app, open_session):
+    first, second = open_session(), open_session()
+    first.alarm._add_alarm(time(9, 1))
+    (alarm,) = app.alarms.alarms.values()
+    app.run()
+    second.alarm._delete_alarm(None, alarm)
+    app.run()
+    assert alarm.id not in first.alarm._row_keys
+    # NOTE: 削除したアラームは、どのセッションが開いていても鳴らない
+    app.run(60)
+    assert app.webhooks.targets == []
+
+
+def test_timer_started_in_one_session_finishes_once(app, open_session):
+    first, second = open_session(), open_session()
+    timer = TimerType("t", "Tea", 180 * NS)
+    first.timer._add_timer(timer)
+    app.run()
+    assert second.timer.timers["t"] is timer
+    second.timer._toggle_timer(timer)
+    app.run()
+    # NOTE: 他のセッションの行も動作中の表示になる
+    row = first.timer._timer_rows._rows[0]
+    assert row.content.controls[1].controls[0].icon == "pause"
+
+    app.run(180)
+    assert app.webhooks.targets == ["t"]
+    assert not timer.active
+    assert "t" in first.notifications.ringing and "t" in second.notifications.ringing
+
+
+def test_closed_session_stops_receiving_fires(app, open_session):
+    first, second = open_session(), open_session()
+    first.alarm._add_alarm(time(9, 1))
+    first.alarm.close()
+    first.timer.close()
+    app.run(60)
+    assert len(app.webhooks.targets) == 1
+    assert not first.notifications.ringing and second.notifications.ringing
+
+
+def test_stale_rows_do_not_restore_deleted_records(app, open_session, storage):
+    first, second = open_session(), open_session()
+    first.alarm._add_alarm(time(9, 1))
+    first.timer._add_timer(TimerType("t", "Tea", 180 * NS))
+    (alarm,) = app.alarms.alarms.values()
+    timer = app.timers.timers["t"]
+    app.run()
+    second.alarm._delete_alarm(None, alarm)
+    second.timer._delete_timer(timer)
+
+    # NOTE: first はまだ削除を反映していない行から操作する
+    first.alarm._add_alarm(time(9, 2), alarm_to_edit=alarm)
+    first.alarm._toggle_alarm(
+        SimpleNamespace(control=SimpleNamespace(value=True)), alarm
+    )
+    first.alarm._set_repeat(alarm, DAILY, None)
+    first.timer._toggle_timer(timer)
+    first.timer._refresh_active_timer(None)
+    first.timer._toggle_timer(timer)
+
+    app.run(3600)
+    assert app.webhooks.targets == []
+    assert not app.alarms.alarms and not app.timers.timers
+    storage.close()
+    assert storage.load_alarms() == [] and storage.load_timers() == []
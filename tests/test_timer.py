@@ -0,0 +1,59 @@
+import random
+
+from components.types import NS, TimerType
+
+# NOTE: スケジューラは締め切りから最大 WAKEUP_JITTER 秒遅れて起き、表示の更新は
+# 毎回最大 STALL 秒かかる (描画や GIL の待ちで負荷が高い状態)
+WAKEUP_JITTER = 0.002
+STALL = 0.05
+HOUR = 3600
+
+
+def _run_jittered(app, rng: random.Random, seconds: float) -> None:
+    """締め切りのたびに少し遅れて起きながら、seconds 秒分の時計を進める"""
+    until = app.clock.monotonic() + seconds
+    while True:
+        deadline = app.timer_scheduler.next_deadline()
+        if deadline is None or deadline > until:
+            break
+        wait = max(0.0, deadline - app.clock.monotonic())
+        app.clock.advance(wait + rng.uniform(0, WAKEUP_JITTER))
+        app.timer_scheduler.run_pending()
+    app.clock.advance(max(0.0, until - app.clock.monotonic()))
+
+
+def test_hour_timer_finishes_on_its_deadline(app, open_session, monkeypatch):
+    rng = random.Random(0)
+    session = open_session()
+    tick = session.timer._tick
+    ticks = []
+
+    def slow_tick() -> None:
+        ticks.append(app.clock.monotonic_ns())
+        tick()
+        app.clock.advance(rng.uniform(0, STALL))
+
+    monkeypatch.setattr(session.timer, "_tick", slow_tick)
+    timer = TimerType("hour", "Hour", HOUR * NS)
+    session.timer._add_timer(timer)
+    start = app.clock.monotonic_ns()
+    session.timer._toggle_timer(timer)
+
+    # NOTE: 途中で 10 分止めても、止める前の残り時間から再開する
+    _run_jittered(app, rng, HOUR / 2)
+    session.timer._toggle_timer(timer)
+    paused = app.clock.monotonic_ns()
+    app.clock.advance(600)
+    resumed = app.clock.monotonic_ns()
+    session.timer._toggle_timer(timer)
+    end = timer.end
+    assert end == start + HOUR * NS + (resumed - paused)
+    _run_jittered(app, rng, HOUR)
+
+    assert app.webhooks.targets == ["hour"]
+    (lateness,) = app.webhooks.lateness
+    assert 0 <= lateness <= WAKEUP_JITTER
+    # NOTE: 表示の更新が遅れても、次の更新は終了時刻から数えた秒の境界に予定される
+    after = [at for at in ticks if at > resumed]
+    assert len(after) >= HOUR / 2 - 2
+    assert all(-(end - at) % NS <= WAKEUP_JITTER * NS for at in after)
@@ -0,0 +1,136 @@
+import asyncio
+import math
+import threading
+import time as _time
+import weakref
+
+
+class Clock:
+    """壁時計・monotonic 時刻・待機をまとめた時刻の取得元
+
+    Timer・Alarm・Scheduler はこのインターフェースだけを通して時刻を扱うため、
+    VirtualClock に差し替えると実時間を待たずにスケジュールを検証できる。
+    """
+
+    def time(self) -> float:
+        """壁時計 (UNIX 時刻の秒)"""
+        return _time.time()
+
+    def monotonic(self) -> float:
+        """巻き戻らない時刻 (秒)"""
+        return _time.monotonic()
+
+    def time_ns(self) -> int:
+        return _time.time_ns()
+
+    def monotonic_ns(self) -> int:
+        return _time.monotonic_ns()
+
+    def perf_counter_ns(self) -> int:
+        """経過時間の計測用の、分解能が最も高い時刻 (ナノ秒)"""
+        return _time.perf_counter_ns()
+
+    def sleep(self, seconds: float) -> None:
+        _time.sleep(seconds)
+
+    def condition(self) -> threading.Condition:
+        """wait() で待つための Condition を作る"""
+        return threading.Condition()
+
+    def wait(self, condition: threading.Condition, timeout: float | None) -> None:
+        """condition の通知か timeout 秒の経過まで待つ (ロックを保持して呼ぶ)"""
+        condition.wait(timeout)
+
+    def event(self) -> asyncio.Event:
+        """wait_async() で待つための Event を作る (イベントループ上で呼ぶ)"""
+        return asyncio.Event()
+
+    async def wait_async(self, event: asyncio.Event, timeout: float | None) -> None:
+        """event がセットされるか timeout 秒が経過するまで待つ"""
+        try:
+            await asyncio.wait_for(event.wait(), timeout)
+        except TimeoutError:
+            pass
+
+
+SYSTEM_CLOCK = Clock()
+
+
+class VirtualClock(Clock):
+    """advance() を呼んだときだけ進む時計
+
+    壁時計と monotonic 時刻は同じだけ進む。待機中のスレッドは時計が進むたびに
+    起こされ、締め切りを確認し直す。
+    """
+
+    def __init__(self, start: float | None = None) -> None:
+        # NOTE: 進めた時間が丸めで消えないよう、内部では整数のナノ秒で持つ
+        self._wall = _time.time_ns() if start is None else round(start * 1e9)
+        self._monotonic = 0
+        self._lock = threading.Lock()
+        self._advanced = threading.Condition(self._lock)
+        self._conditions: weakref.WeakSet[threading.Condition] = weakref.WeakSet()
+        self._events: weakref.WeakKeyDictionary[
+            asyncio.Event, asyncio.AbstractEventLoop
+        ] = weakref.WeakKeyDictionary()
+
+    def time(self) -> float:
+        return self._wall / 1e9
+
+    def monotonic(self) -> float:
+        return self._monotonic / 1e9
+
+    def time_ns(self) -> int:
+        return self._wall
+
+    def monotonic_ns(self) -> int:
+        return self._monotonic
+
+    def perf_counter_ns(self) -> int:
+        return self._monotonic
+
+    def sleep(self, seconds: float) -> None:
+        """時計が seconds 秒進むまで待つ"""
+        with self._advanced:
+            until = self._monotonic + math.ceil(seconds * 1e9)
+            while self._monotonic < until:
+                self._advanced.wait()
+
+    def condition(self) -> threading.Condition:
+        # NOTE: 作った Condition は advance() のたびに通知する。待機の直前ではなく
+        # 作成時に登録するので、時刻の読み取りと待機の間に進んでも取りこぼさない
+        condition = threading.Condition()
+        with self._lock:
+            self._conditions.add(condition)
+        return condition
+
+    def wait(self, condition: threading.Condition, timeout: float | None) -> None:
+        # NOTE: timeout は仮想時間なので、実時間では待たずに advance() の通知を待つ
+        condition.wait()
+
+    def event(self) -> asyncio.Event:
+        event = asyncio.Event()
+        with self._lock:
+            self._events[event] = asyncio.get_running_loop()
+        return event
+
+    async def wait_async(self, event: asyncio.Event, timeout: float | None) -> None:
+        await event.wait()
+
+    def advance(self, seconds: float) -> None:
+        """時計を seconds 秒進め、待機中のスレッドを起こす"""
+        if seconds < 0:
+            raise ValueError("VirtualClock cannot go backwards")
+        step = math.ceil(seconds * 1e9)
+        with self._advanced:
+            self._wall += step
+            self._monotonic += step
+            conditions = list(self._conditions)
+            events = list(self._events.items())
+            self._advanced.notify_all()
+        for condition in conditions:
+            with condition:
+                condition.notify_all()
+        for event, loop in events:
+            if not loop.is_closed():
+                loop.call_soon_threadsafe(event.set)
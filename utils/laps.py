@@ -0,0 +1,48 @@
+from array import array
+
+
+class Laps:
+    """ストップウォッチのラップを 1 件 8 バイトで保持する
+
+    各ラップを押した時点の経過時間 (ナノ秒) を array('q') に追記し、ラップの
+    タイム (split) は前の値との差で求める。最速・最遅・平均は追加のたびに
+    更新するので、件数にかかわらず O(1) で参照できる。
+    """
+
+    def __init__(self) -> None:
+        self._marks = array("q")
+        self.fastest = -1
+        self.slowest = -1
+
+    def __len__(self) -> int:
+        return len(self._marks)
+
+    def add(self, elapsed: int) -> int:
+        """経過時間 elapsed (ナノ秒) でラップを記録し、そのラップのタイムを返す"""
+        split = elapsed - (self._marks[-1] if self._marks else 0)
+        self._marks.append(elapsed)
+        index = len(self._marks) - 1
+        if self.fastest < 0 or split < self.split(self.fastest):
+            self.fastest = index
+        if self.slowest < 0 or split > self.split(self.slowest):
+            self.slowest = index
+        return split
+
+    def clear(self) -> None:
+        self._marks = array("q")
+        self.fastest = -1
+        self.slowest = -1
+
+    def split(self, index: int) -> int:
+        """index 番目のラップのタイム (ナノ秒)"""
+        return self._marks[index] - (self._marks[index - 1] if index > 0 else 0)
+
+    def total(self, index: int) -> int:
+        """index 番目のラップを記録した時点の経過時間 (ナノ秒)"""
+        return self._marks[index]
+
+    def mean(self) -> int:
+        """ラップのタイムの平均 (ナノ秒、ラップがなければ 0)"""
+        if not self._marks:
+            return 0
+        return self._marks[-1] // len(self._marks)
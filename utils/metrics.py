@@ -0,0 +1,233 @@
+"""スケジュールと描画の計測値 (カウンタ・ヒストグラム・ゲージ)
+
+TIMER_APP_METRICS_PORT を指定するとローカルの HTTP (/metrics) で、
+TIMER_APP_METRICS_FILE を指定すると TIMER_APP_METRICS_INTERVAL 秒 (既定 15) ごとに
+ファイルへ、Prometheus のテキスト形式で出力する。どちらも指定しない場合は無効で、
+計測用の関数は何もしないオブジェクトを返す。
+"""
+
+import bisect
+import math
+import os
+import threading
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from time import perf_counter, sleep
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import flet as ft
+
+SECONDS_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000)
+
+
+class Counter:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        return [f"{name}{labels} {self.value:g}"]
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self._lock = threading.Lock()
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, value)] += 1
+            self.sum += value
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        with self._lock:
+            counts, total = list(self.counts), self.sum
+        lines = []
+        cumulative = 0
+        for bound, count in zip((*self.buckets, math.inf), counts):
+            cumulative += count
+            le = "+Inf" if bound == math.inf else f"{bound:g}"
+            lines.append(f"{name}_bucket{_with_label(labels, 'le', le)} {cumulative}")
+        lines.append(f"{name}_sum{labels} {total:g}")
+        lines.append(f"{name}_count{labels} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """出力のたびに callback を呼んで値を求める"""
+
+    def __init__(self, callback: Callable[[], float]) -> None:
+        self._callback = callback
+
+    def samples(self, name: str, labels: str) -> list[str]:
+        return [f"{name}{labels} {self._callback():g}"]
+
+
+class _Disabled:
+    """無効時に返す、何もしない計測オブジェクト"""
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+_DISABLED = _Disabled()
+
+
+class Registry:
+    def __init__(self, enabled: bool) -> None:
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._families: dict[str, tuple[str, str, dict[str, object]]] = {}
+
+    def counter(self, name: str, help: str, **labels: str) -> Counter | _Disabled:
+        return self._get(name, help, "counter", labels, Counter)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        buckets: tuple[float, ...] = SECONDS_BUCKETS,
+        **labels: str,
+    ) -> Histogram | _Disabled:
+        return self._get(name, help, "histogram", labels, lambda: Histogram(buckets))
+
+    def gauge(
+        self, name: str, help: str, callback: Callable[[], float], **labels: str
+    ) -> None:
+        self._get(name, help, "gauge", labels, lambda: Gauge(callback))
+
+    def render(self) -> str:
+        """Prometheus のテキスト形式"""
+        with self._lock:
+            families = [
+                (name, help, kind, list(series.items()))
+                for name, (help, kind, series) in self._families.items()
+            ]
+        lines = []
+        for name, help, kind, series in families:
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, metric in series:
+                lines.extend(metric.samples(name, labels))
+        return "\n".join(lines) + "\n"
+
+    def _get(self, name, help, kind, labels, factory):
+        if not self.enabled:
+            return _DISABLED
+        key = _format_labels(labels)
+        with self._lock:
+            _, _, series = self._families.setdefault(name, (help, kind, {}))
+            if key not in series:
+                series[key] = factory()
+            return series[key]
+
+
+def _format_labels(labels: dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in sorted(labels.items())) + "}"
+
+
+def _with_label(labels: str, key: str, value: str) -> str:
+    label = f'{key}="{value}"'
+    return f"{{{label}}}" if not labels else f"{labels[:-1]},{label}}}"
+
+
+_port = os.environ.get("TIMER_APP_METRICS_PORT")
+_file = os.environ.get("TIMER_APP_METRICS_FILE")
+REGISTRY = Registry(enabled=bool(_port or _file))
+
+counter = REGISTRY.counter
+histogram = REGISTRY.histogram
+gauge = REGISTRY.gauge
+
+
+def start() -> None:
+    """環境変数で指定された出力先 (HTTP / ファイル) を起動する"""
+    if _port:
+        serve(int(_port))
+    if _file:
+        interval = float(os.environ.get("TIMER_APP_METRICS_INTERVAL", "15"))
+        dump_periodically(Path(_file), interval)
+
+
+def serve(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """GET /metrics で計測値を返す HTTP サーバーを別スレッドで起動する"""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            if self.path != "/metrics":
+                self.send_error(404)
+                return
+            body = REGISTRY.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args) -> None:
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def dump_periodically(path: Path, interval: float) -> None:
+    """interval 秒ごとに計測値を path に書き出す"""
+
+    def loop() -> None:
+        while True:
+            sleep(interval)
+            temporary = path.with_suffix(path.suffix + ".tmp")
+            temporary.write_text(REGISTRY.render())
+            temporary.replace(path)
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    threading.Thread(target=loop, daemon=True).start()
+
+
+def instrument_page(page: "ft.Page") -> None:
+    """page.update() (コントロールの update() を含む) の所要時間と対象数を計測する"""
+    if not REGISTRY.enabled:
+        return
+    duration = histogram(
+        "timer_app_update_duration_seconds", "page.update() にかかった時間"
+    )
+    controls = histogram(
+        "timer_app_update_controls",
+        "page.update() 1 回で差分を取ったコントロール数",
+        COUNT_BUCKETS,
+    )
+    update = page.update
+
+    def timed_update(*targets: "ft.Control") -> None:
+        start = perf_counter()
+        update(*targets)
+        duration.observe(perf_counter() - start)
+        controls.observe(_count_controls(targets or (page,)))
+
+    page.update = timed_update
+
+
+def _count_controls(roots) -> int:
+    count = 0
+    stack = list(roots)
+    while stack:
+        control = stack.pop()
+        count += 1
+        stack.extend(control._get_children())
+    return count
@@ -0,0 +1,115 @@
+"""タイマーとアラームの記録の復元・保存と発火時刻の計算 (Flet に依存しない)
+
+画面 (components) とデーモン (daemon) の両方から使う。
+"""
+
+import json
+from datetime import date, datetime
+
+from components.types import NS, AlarmType, TimerType
+from utils.clock import Clock
+from utils.recurrence import next_occurrence
+from utils.storage import Storage
+
+
+def to_datetime(ns: int) -> datetime:
+    return datetime.fromtimestamp(ns / NS)
+
+
+def to_ns(seconds: float) -> int:
+    # NOTE: float の秒に NS を掛けると丸め誤差が出るため、マイクロ秒単位で変換する
+    return round(seconds * 1_000_000) * 1000
+
+
+def until_of(alarm: AlarmType) -> date | None:
+    return date.fromordinal(alarm.until) if alarm.until else None
+
+
+def load_timers(storage: Storage, clock: Clock) -> list[TimerType]:
+    """保存済みのタイマーを復元する (動作中のものは保存した終了時刻から再開)"""
+    now = clock.time_ns()
+    monotonic = clock.monotonic_ns()
+    timers = []
+    for row in storage.load_timers():
+        program = None
+        if row["program"]:
+            program = tuple(
+                (label, seconds * NS) for label, seconds in json.loads(row["program"])
+            )
+        timer = TimerType(
+            row["id"],
+            row["name"],
+            row["duration"] * NS,
+            round(row["remaining"] * NS),
+            program=program,
+            rounds=row["rounds"],
+            segment=row["segment"],
+        )
+        if row["end_at"] is not None:
+            offset = round(row["end_at"] * NS) - now
+            # NOTE: プログラムは止まっていた間に終わった区間の分も正確に進めるよう、
+            # 過ぎた終了時刻もそのまま使う
+            timer.end = monotonic + (offset if program else max(0, offset))
+        timers.append(timer)
+    return timers
+
+
+def save_timer(storage: Storage, clock: Clock, timer: TimerType) -> None:
+    end_at = None
+    if timer.end is not None:
+        end_at = (clock.time_ns() + timer.end - clock.monotonic_ns()) / NS
+    program = None
+    if timer.program:
+        program = json.dumps(
+            [[label, duration // NS] for label, duration in timer.program]
+        )
+    storage.save_timer(
+        timer.id,
+        timer.name,
+        timer.duration // NS,
+        timer.remaining / NS,
+        end_at,
+        timer.active,
+        program,
+        timer.rounds,
+        timer.segment,
+    )
+
+
+def load_alarms(storage: Storage) -> list[AlarmType]:
+    alarms = []
+    for row in storage.load_alarms():
+        until = row["until"]
+        alarms.append(
+            AlarmType(
+                row["id"],
+                to_ns(row["time"]),
+                bool(row["active"]),
+                row["repeat"],
+                date.fromisoformat(until).toordinal() if until else None,
+            )
+        )
+    return alarms
+
+
+def save_alarm(storage: Storage, alarm: AlarmType) -> None:
+    until = until_of(alarm)
+    storage.save_alarm(
+        alarm.id,
+        alarm.time / NS,
+        alarm.active,
+        alarm.repeat,
+        until.isoformat() if until else None,
+    )
+
+
+def move_to_next(alarm: AlarmType, at: datetime, after: datetime) -> None:
+    """at の時刻で after より後に発火する日時に合わせる
+
+    繰り返しの終了日を過ぎている場合は無効にする。
+    """
+    next_time = next_occurrence(at, alarm.repeat, after, until_of(alarm))
+    if next_time is None:
+        alarm.active = False
+    else:
+        alarm.time = to_ns(next_time.timestamp())
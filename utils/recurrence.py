@@ -0,0 +1,58 @@
+"""アラームの繰り返し (曜日のビットマスク) と次の発火日時の計算
+
+repeat は月曜を bit 0、日曜を bit 6 とする曜日のビットマスクで、0 は繰り返しなし。
+"""
+
+from datetime import date, datetime, timedelta
+
+DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+ONCE = 0
+DAILY = 0b1111111
+WEEKDAYS = 0b0011111
+
+
+def next_occurrence(
+    at: datetime, repeat: int, after: datetime, until: date | None = None
+) -> datetime | None:
+    """at の時刻で、after より後の最初の発火日時を返す (until を過ぎる場合は None)
+
+    繰り返しなしの場合は毎日と同じく、次にその時刻になる日時を返す。
+    曜日はビットマスクを回転して最下位ビットを取るだけなので、登録数や
+    曜日の数によらず定数時間で求まる。
+    """
+    candidate = datetime.combine(after.date(), at.time())
+    if candidate <= after:
+        candidate += timedelta(days=1)
+    mask = repeat or DAILY
+    weekday = candidate.weekday()
+    rotated = ((mask >> weekday) | (mask << (7 - weekday))) & DAILY
+    candidate += timedelta(days=(rotated & -rotated).bit_length() - 1)
+    if until is not None and candidate.date() > until:
+        return None
+    return candidate
+
+
+def describe(repeat: int) -> str:
+    if repeat == DAILY:
+        return "Daily"
+    if repeat == WEEKDAYS:
+        return "Weekdays"
+    return ", ".join(name for i, name in enumerate(DAY_NAMES) if repeat & (1 << i))
+
+
+def parse(text: str) -> int:
+    """describe() の文字列 (または曜日名のカンマ区切り) をビットマスクに戻す"""
+    text = text.strip()
+    if not text:
+        return ONCE
+    if text == "Daily":
+        return DAILY
+    if text == "Weekdays":
+        return WEEKDAYS
+    repeat = 0
+    for name in text.split(","):
+        name = name.strip().title()
+        if name not in DAY_NAMES:
+            raise ValueError(f"Unknown day: {name!r}")
+        repeat |= 1 << DAY_NAMES.index(name)
+    return repeat
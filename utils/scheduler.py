@@ -0,0 +1,238 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import traceback
+from collections.abc import Callable, Iterable
+
+from utils import metrics
+from utils.clock import SYSTEM_CLOCK, Clock
+
+
+class Scheduler:
+    """締め切り時刻ごとにコールバックを実行するスケジューラ
+
+    締め切りは clock の monotonic 時刻 (タイマー)、wall=True の場合は壁時計
+    (アラーム) で指定する。壁時計は変更されうるため、max_wait を指定すると
+    待機をその秒数で区切って時刻を確認し直す。
+    """
+
+    def __init__(
+        self,
+        clock: Clock = SYSTEM_CLOCK,
+        wall: bool = False,
+        max_wait: float | None = None,
+    ) -> None:
+        self._clock = clock
+        self._now = clock.time if wall else clock.monotonic
+        self._max_wait = max_wait
+        self._heap: list[tuple[float, int, str]] = []
+        self._entries: dict[str, tuple[int, float, Callable[[], None]]] = {}
+        self._counter = itertools.count()
+        self._condition = clock.condition()
+        self._wakeups = metrics.counter(
+            "timer_app_scheduler_wakeups_total",
+            "スケジューラが待機から起きた回数",
+            scheduler="alarm" if wall else "timer",
+        )
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        """ワーカースレッドを起動する (起動済みなら何もしない)"""
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self.run, daemon=True)
+                self._thread.start()
+
+    def schedule(self, key: str, deadline: float, callback: Callable[[], None]) -> None:
+        """key に締め切りを登録する (同じ key の登録は置き換える)"""
+        with self._condition:
+            seq = next(self._counter)
+            self._entries[key] = (seq, deadline, callback)
+            heapq.heappush(self._heap, (deadline, seq, key))
+            self._compact()
+            self._notify()
+
+    def schedule_many(
+        self, items: Iterable[tuple[str, float, Callable[[], None]]]
+    ) -> None:
+        """まとめて登録する (ヒープの作り直しと通知は 1 回だけ)"""
+        with self._condition:
+            for key, deadline, callback in items:
+                seq = next(self._counter)
+                self._entries[key] = (seq, deadline, callback)
+                self._heap.append((deadline, seq, key))
+            heapq.heapify(self._heap)
+            self._compact()
+            self._notify()
+
+    def cancel(self, key: str) -> None:
+        """key の登録を取り消す (ヒープ上のエントリは取り出し時に破棄)"""
+        with self._condition:
+            if self._entries.pop(key, None) is not None:
+                self._compact()
+                self._notify()
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+
+    def now(self) -> float:
+        """締め切りと同じ基準の現在時刻"""
+        return self._now()
+
+    def next_deadline(self) -> float | None:
+        """次の締め切り (登録がなければ None)"""
+        with self._condition:
+            self._discard_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def run_pending(self) -> int:
+        """期限が来たコールバックを呼び出し元のスレッドで実行し、その数を返す
+
+        start() せずに VirtualClock と組み合わせると、時計を進めるたびに
+        決まった順序でコールバックを実行できる。
+        """
+        count = 0
+        while True:
+            with self._condition:
+                callback, _ = self._next_due()
+            if callback is None:
+                return count
+            self._call(callback)
+            count += 1
+
+    def run(self) -> None:
+        """締め切りか状態変化まで待機し、期限が来たコールバックを実行する"""
+        while True:
+            with self._condition:
+                callback = self._wait_next()
+            self._call(callback)
+
+    def _call(self, callback: Callable[[], None]) -> None:
+        try:
+            callback()
+        except Exception:
+            # NOTE: 1 つのセッションの失敗で共有スレッドを止めない
+            traceback.print_exc()
+
+    def _notify(self) -> None:
+        self._condition.notify()
+
+    def _wait_next(self) -> Callable[[], None]:
+        while True:
+            callback, timeout = self._next_due()
+            if callback is not None:
+                return callback
+            self._clock.wait(self._condition, timeout)
+            self._wakeups.inc()
+
+    def _next_due(self) -> tuple[Callable[[], None] | None, float | None]:
+        """期限が来たコールバック、または次の締め切りまでの待ち時間を返す"""
+        self._discard_stale()
+        if not self._heap:
+            return None, self._max_wait
+        deadline, _, key = self._heap[0]
+        timeout = deadline - self._now()
+        if timeout > 0:
+            if self._max_wait is not None:
+                timeout = min(timeout, self._max_wait)
+            return None, timeout
+        heapq.heappop(self._heap)
+        _, _, callback = self._entries.pop(key)
+        return callback, None
+
+    def _discard_stale(self) -> None:
+        while self._heap:
+            _, seq, key = self._heap[0]
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _compact(self) -> None:
+        # NOTE: 取り消し・再登録で無効なエントリが溜まりすぎたらヒープを作り直す
+        if len(self._heap) <= 2 * len(self._entries) + 64:
+            return
+        self._heap = [
+            (deadline, seq, key) for key, (seq, deadline, _) in self._entries.items()
+        ]
+        heapq.heapify(self._heap)
+
+
+class AsyncScheduler(Scheduler):
+    """Scheduler と同じ登録方法で、asyncio のタスクとして締め切りを待つスケジューラ
+
+    schedule/cancel はイベントループ外のスレッド (Flet の同期イベントハンドラ)
+    からも呼ばれるため、待機中のタスクは call_soon_threadsafe で起こす。
+    """
+
+    def __init__(
+        self,
+        clock: Clock = SYSTEM_CLOCK,
+        wall: bool = False,
+        max_wait: float | None = None,
+    ) -> None:
+        super().__init__(clock, wall, max_wait)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    def start(self) -> None:
+        """実行中のイベントループにタスクを登録する (登録済みなら何もしない)"""
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def run(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = self._clock.event()
+        while True:
+            with self._condition:
+                callback, timeout = self._next_due()
+                if callback is None:
+                    self._wakeup.clear()
+            if callback is not None:
+                self._call(callback)
+                continue
+            await self._clock.wait_async(self._wakeup, timeout)
+            self._wakeups.inc()
+
+    def _notify(self) -> None:
+        if self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+
+_shared_lock = threading.Lock()
+_shared: dict[str, Scheduler] = {}
+
+
+def _shared_scheduler(name: str, factory: Callable[[], Scheduler]) -> Scheduler:
+    with _shared_lock:
+        scheduler = _shared.get(name)
+        if scheduler is None:
+            scheduler = _shared[name] = factory()
+            scheduler.start()
+        return scheduler
+
+
+def timer_scheduler() -> Scheduler:
+    """全セッションで共有するタイマー用 (monotonic) のスケジューラ"""
+    return _shared_scheduler("timer", Scheduler)
+
+
+def alarm_scheduler() -> Scheduler:
+    """全セッションで共有するアラーム用 (壁時計) のスケジューラ"""
+    # NOTE: 壁時計の変更に追従できるよう、待機は最大 60 秒で区切る
+    return _shared_scheduler("alarm", lambda: Scheduler(wall=True, max_wait=60))
+
+
+def async_timer_scheduler() -> Scheduler:
+    """timer_scheduler の asyncio 版 (イベントループ上で呼ぶ)"""
+    return _shared_scheduler("async_timer", AsyncScheduler)
+
+
+def async_alarm_scheduler() -> Scheduler:
+    """alarm_scheduler の asyncio 版 (イベントループ上で呼ぶ)"""
+    return _shared_scheduler(
+        "async_alarm", lambda: AsyncScheduler(wall=True, max_wait=60)
+    )
@@ -1,14 +1,74 @@
+import os
+import sys
+import threading
+from pathlib import Path
+
 import pygame
 
+# NOTE: flet pack (PyInstaller) でまとめた場合は展開先のディレクトリに置かれる
+BASE_DIR = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parent.parent))
+SOUND_PATH = BASE_DIR / "sound.wav"
+
+DEFAULT_KEY = "default"
+
 
 class Sound:
-    def __init__(self):
+    """アラーム音を再生する
+
+    音声は起動時に一度だけデコードしてメモリに保持し、鳴らすたびにチャンネルを
+    割り当てる。key ごとにチャンネルを持つので、複数のアラームやタイマーを
+    同時に鳴らし、個別に止められる。
+    """
+
+    def __init__(
+        self,
+        path: Path = SOUND_PATH,
+        buffer_size: int | None = None,
+        channels: int = 8,
+    ):
+        if buffer_size is None:
+            buffer_size = int(os.environ.get("TIMER_APP_SOUND_BUFFER", "512"))
+        # NOTE: バッファが小さいほど再生開始までの遅延が短くなる
+        pygame.mixer.pre_init(buffer=buffer_size)
         pygame.mixer.init()
+        pygame.mixer.set_num_channels(channels)
+        self._sample = pygame.mixer.Sound(str(path))
+        self._pool = [pygame.mixer.Channel(i) for i in range(channels)]
+        # NOTE: key ごとのチャンネルの番号 (鳴らし始めた順に並ぶ)
+        self._channels: dict[str, int] = {}
+        # NOTE: 各セッションのスレッドとスケジューラのスレッドから呼ばれる
+        self._lock = threading.Lock()
+
+    def play_alarm_sound(self, key: str = DEFAULT_KEY) -> None:
+        with self._lock:
+            index = self._channels.get(key)
+            if index is not None and self._pool[index].get_busy():
+                return
+            index = self._free_channel()
+            # NOTE: 他の key が使っていたチャンネルを奪う場合は、その key との対応を
+            # 外す (残すと、その key を止めたときにこの key の音が止まってしまう)
+            for other in [k for k, i in self._channels.items() if i == index]:
+                del self._channels[other]
+            self._pool[index].play(self._sample, loops=-1)
+            self._channels.pop(key, None)
+            self._channels[key] = index
 
-    def play_alarm_sound(self) -> None:
-        pygame.mixer.music.load("sound.wav")
-        pygame.mixer.music.play(-1)
+    def stop_alarm_sound(self, key: str | None = None) -> None:
+        """key の音を止める (None の場合はすべて止める)"""
+        with self._lock:
+            if key is None:
+                for index in self._channels.values():
+                    self._pool[index].stop()
+                self._channels.clear()
+                return
+            index = self._channels.pop(key, None)
+            if index is not None:
+                self._pool[index].stop()
 
-    def stop_alarm_sound(self) -> None:
-        if pygame.mixer.music.get_busy():
-            pygame.mixer.music.stop()
+    def _free_channel(self) -> int:
+        """空いているチャンネルの番号 (_lock を持って呼ぶ)"""
+        for index, channel in enumerate(self._pool):
+            if not channel.get_busy():
+                return index
+        # NOTE: 空きがなければ、最も前から鳴っている key のチャンネルを使う
+        return next(iter(self._channels.values()), 0)
@@ -0,0 +1,235 @@
+import atexit
+import os
+import sqlite3
+import sys
+import threading
+import traceback
+from contextlib import closing
+from pathlib import Path
+from time import sleep
+from typing import Any
+
+DEFAULT_PATH = Path.home() / ".flet-timer-app" / "data.sqlite3"
+# NOTE: 他のプロセス (デーモンなど) が書き込み中の場合にロックの解放を待つ秒数
+BUSY_TIMEOUT = 5.0
+# NOTE: 書き込みに失敗したら RETRY_DELAY 秒から倍々に延ばし、MAX_RETRY_DELAY 秒で止める。
+# 終了時は CLOSE_RETRIES 回やり直しても反映できなければ諦める
+RETRY_DELAY = 0.5
+MAX_RETRY_DELAY = 30.0
+CLOSE_RETRIES = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS timers (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    duration INTEGER NOT NULL,
+    remaining REAL NOT NULL,
+    end_at REAL,
+    active INTEGER NOT NULL,
+    program TEXT,
+    rounds INTEGER NOT NULL DEFAULT 1,
+    segment INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS alarms (
+    id TEXT PRIMARY KEY,
+    time REAL NOT NULL,
+    active INTEGER NOT NULL,
+    repeat INTEGER NOT NULL DEFAULT 0,
+    until TEXT
+);
+"""
+
+# NOTE: 以前のバージョンで作られたテーブルに足りない列
+MIGRATIONS = {
+    "timers": {
+        "program": "TEXT",
+        "rounds": "INTEGER NOT NULL DEFAULT 1",
+        "segment": "INTEGER NOT NULL DEFAULT 0",
+    },
+    "alarms": {
+        "repeat": "INTEGER NOT NULL DEFAULT 0",
+        "until": "TEXT",
+    },
+}
+
+
+class Storage:
+    """タイマーとアラームを SQLite (WAL モード) に保存する
+
+    書き込みは key ごとに最新の内容だけを保持し、専用スレッドが 1 トランザクションに
+    まとめて反映する。UI スレッドやスケジューラのスレッドは書き込みを待たない。
+    反映に失敗した書き込み (データベースのロックなど) は、その間に新しい内容が
+    来ていなければ戻して、間隔を空けてやり直す。
+    """
+
+    def __init__(self, path: Path | str = DEFAULT_PATH, batch_delay: float = 0.2):
+        self._path = Path(path)
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._batch_delay = batch_delay
+        self._pending: dict[tuple[str, str], tuple[str, tuple[Any, ...]]] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            _migrate(conn)
+        self._thread = threading.Thread(target=self._write_loop, daemon=True)
+        self._thread.start()
+
+    def load_timers(self) -> list[sqlite3.Row]:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT id, name, duration, remaining, end_at, active, program,"
+                " rounds, segment FROM timers ORDER BY rowid"
+            ).fetchall()
+
+    def load_alarms(self) -> list[sqlite3.Row]:
+        with closing(self._connect()) as conn:
+            return conn.execute(
+                "SELECT id, time, active, repeat, until FROM alarms ORDER BY rowid"
+            ).fetchall()
+
+    def save_timer(
+        self,
+        id: str,
+        name: str,
+        duration: int,
+        remaining: float,
+        end_at: float | None,
+        active: bool,
+        program: str | None = None,
+        rounds: int = 1,
+        segment: int = 0,
+    ) -> None:
+        """end_at は壁時計 (time.time) の終了時刻。再起動後もそこから再開する
+
+        program はプログラムの 1 周分 ([名前, 秒] の並び) の JSON、segment は
+        実行中の区間の番号。
+        """
+        self._put(
+            ("timers", id),
+            "INSERT INTO timers"
+            " (id, name, duration, remaining, end_at, active, program, rounds, segment)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET"
+            " name=excluded.name, duration=excluded.duration,"
+            " remaining=excluded.remaining, end_at=excluded.end_at,"
+            " active=excluded.active, program=excluded.program,"
+            " rounds=excluded.rounds, segment=excluded.segment",
+            (
+                id,
+                name,
+                duration,
+                remaining,
+                end_at,
+                int(active),
+                program,
+                rounds,
+                segment,
+            ),
+        )
+
+    def delete_timer(self, id: str) -> None:
+        self._put(("timers", id), "DELETE FROM timers WHERE id = ?", (id,))
+
+    def save_alarm(
+        self,
+        id: str,
+        time: float,
+        active: bool,
+        repeat: int = 0,
+        until: str | None = None,
+    ) -> None:
+        """repeat は曜日のビットマスク、until は繰り返しを終える日 (ISO 形式)"""
+        self._put(
+            ("alarms", id),
+            "INSERT INTO alarms (id, time, active, repeat, until)"
+            " VALUES (?, ?, ?, ?, ?) ON CONFLICT(id) DO UPDATE SET"
+            " time=excluded.time, active=excluded.active,"
+            " repeat=excluded.repeat, until=excluded.until",
+            (id, time, int(active), repeat, until),
+        )
+
+    def delete_alarm(self, id: str) -> None:
+        self._put(("alarms", id), "DELETE FROM alarms WHERE id = ?", (id,))
+
+    def close(self) -> None:
+        """未反映の書き込みをすべて反映して書き込みスレッドを止める"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify()
+        self._thread.join()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self._path, timeout=BUSY_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _put(self, key: tuple[str, str], sql: str, params: tuple[Any, ...]) -> None:
+        with self._condition:
+            self._pending[key] = (sql, params)
+            self._condition.notify()
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        conn.execute("PRAGMA synchronous=NORMAL")
+        failures = 0
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                closed = self._closed
+            if not closed:
+                # NOTE: 連続した操作を 1 回の書き込みにまとめる
+                sleep(self._batch_delay)
+            with self._condition:
+                pending = list(self._pending.items())
+                self._pending.clear()
+                closed = self._closed
+            try:
+                if pending:
+                    with conn:
+                        for sql, params in (value for _, value in pending):
+                            conn.execute(sql, params)
+            except sqlite3.Error:
+                # NOTE: 1 回の失敗で書き込みスレッドを止めない
+                traceback.print_exc()
+                failures += 1
+                if closed and failures > CLOSE_RETRIES:
+                    print(f"Dropped {len(pending)} unsaved changes.", file=sys.stderr)
+                    conn.close()
+                    return
+                with self._condition:
+                    for key, value in pending:
+                        self._pending.setdefault(key, value)
+                    # NOTE: close() が呼ばれたら待たずにやり直す
+                    if not self._closed:
+                        self._condition.wait(
+                            min(RETRY_DELAY * 2 ** (failures - 1), MAX_RETRY_DELAY)
+                        )
+                continue
+            failures = 0
+            if closed:
+                conn.close()
+                return
+
+
+def _migrate(conn: sqlite3.Connection) -> None:
+    for table, columns in MIGRATIONS.items():
+        existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+        for name, definition in columns.items():
+            if name not in existing:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+
+
+_shared_lock = threading.Lock()
+_storage: Storage | None = None
+
+
+def default_storage() -> Storage:
+    """全セッションで共有するストレージ (TIMER_APP_DB で保存先を変更できる)"""
+    global _storage
+    with _shared_lock:
+        if _storage is None:
+            _storage = Storage(os.environ.get("TIMER_APP_DB", DEFAULT_PATH))
+            atexit.register(_storage.close)
+        return _storage
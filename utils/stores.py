@@ -0,0 +1,367 @@
+"""全セッションで共有するタイマーとアラームの記録 (Flet に依存しない)
+
+Web 版では 1 つのプロセスで複数のセッション (タブ) が開く。記録の読み込み・
+スケジューラへの登録・保存・発火の処理と Webhook への送信はストアがプロセスで
+1 回だけ行い、各セッションの Timer・Alarm は subscribe() して、発火と
+他のセッションでの変更の知らせを受けて自分の画面だけを書き直す。
+"""
+
+import threading
+import weakref
+from collections.abc import Callable, Iterable
+from datetime import datetime
+
+from components.types import NS, AlarmType, TimerType
+from utils import metrics, records
+from utils.clock import Clock
+from utils.records import to_datetime
+from utils.scheduler import Scheduler
+from utils.storage import Storage, default_storage
+from utils.webhooks import Webhooks, default_webhooks
+
+_FIRE_LATENESS = {
+    kind: metrics.histogram(
+        "timer_app_fire_lateness_seconds", "締め切りから発火までの遅れ", kind=kind
+    )
+    for kind in ("timer", "alarm")
+}
+
+_timer_stores: "weakref.WeakSet[TimerStore]" = weakref.WeakSet()
+_alarm_stores: "weakref.WeakSet[AlarmStore]" = weakref.WeakSet()
+# NOTE: 値は /metrics を返すスレッドで読むので、一覧は写しをとってからたどる
+metrics.gauge(
+    "timer_app_active_timers",
+    "動作中のタイマー数",
+    lambda: sum(
+        timer.active
+        for store in tuple(_timer_stores)
+        for timer in tuple(store.timers.values())
+    ),
+)
+metrics.gauge(
+    "timer_app_active_alarms",
+    "有効なアラーム数",
+    lambda: sum(
+        alarm.active
+        for store in tuple(_alarm_stores)
+        for alarm in tuple(store.alarms.values())
+    ),
+)
+
+
+class _Store:
+    """TimerStore と AlarmStore に共通する、購読しているセッションの管理"""
+
+    def __init__(
+        self,
+        storage: Storage,
+        scheduler: Scheduler,
+        clock: Clock | None,
+        webhooks: Webhooks | None,
+    ) -> None:
+        self._storage = storage
+        self._scheduler = scheduler
+        # NOTE: 締め切りはスケジューラと同じ時計で計算する
+        self._clock = clock or scheduler.clock
+        self._webhooks = webhooks or default_webhooks()
+        # NOTE: 各セッションのイベントハンドラとスケジューラのスレッドから呼ばれる
+        self.lock = threading.RLock()
+        self._listeners: dict[str, tuple[Callable, Callable]] = {}
+
+    @property
+    def clock(self) -> Clock:
+        return self._clock
+
+    def subscribe(
+        self,
+        key: str,
+        fired: Callable[..., None],
+        changed: Callable[[Iterable[str]], None],
+    ) -> None:
+        """key のセッションに発火 (fired) と他のセッションでの変更 (changed) を知らせる
+
+        fired は発火した記録と通知のメッセージを受け取り、ストアの lock を離した
+        状態でスケジューラのスレッドから呼ばれる。changed は変更された記録の id を
+        受け取り、変更したセッションのスレッドから lock を持ったまま呼ばれるので、
+        画面の書き換えはせずに受け取った id を控えるだけにする。
+        """
+        with self.lock:
+            self._listeners[key] = (fired, changed)
+
+    def unsubscribe(self, key: str) -> None:
+        with self.lock:
+            self._listeners.pop(key, None)
+
+    def _changed(self, origin: str | None, ids: Iterable[str]) -> None:
+        """origin 以外のセッションに変更を知らせる (lock を持って呼ぶ)"""
+        ids = list(ids)
+        for key, (_, changed) in self._listeners.items():
+            if key != origin:
+                changed(ids)
+
+    def _fired(self) -> list[Callable[..., None]]:
+        """発火を知らせる相手 (lock を持って呼び、lock を離してから呼び出す)"""
+        return [fired for fired, _ in self._listeners.values()]
+
+
+class TimerStore(_Store):
+    """プロセスで 1 つのタイマーの記録と、その終了時刻のスケジュール
+
+    スケジューラには記録の id ごとに 1 回だけ登録するので、セッションがいくつ
+    開いていても終了・保存・Webhook への送信は 1 回になる。
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        scheduler: Scheduler,
+        clock: Clock | None = None,
+        webhooks: Webhooks | None = None,
+    ) -> None:
+        super().__init__(storage, scheduler, clock, webhooks)
+        self.timers = {
+            timer.id: timer for timer in records.load_timers(storage, self._clock)
+        }
+        scheduler.schedule_many(
+            (self._key(timer), timer.end / NS, self._finish_callback(timer))
+            for timer in self.timers.values()
+            if timer.end is not None
+        )
+        _timer_stores.add(self)
+
+    def close(self) -> None:
+        """すべてのタイマーをスケジューラから外す"""
+        with self.lock:
+            for timer in self.timers.values():
+                self._scheduler.cancel(self._key(timer))
+
+    def add(self, timers: Iterable[TimerType], origin: str | None = None) -> None:
+        with self.lock:
+            timers = list(timers)
+            for timer in timers:
+                self.timers[timer.id] = timer
+                self._save(timer)
+            self._changed(origin, (timer.id for timer in timers))
+
+    def start(self, timer: TimerType, origin: str | None = None) -> None:
+        """残り時間から締め切りを計算し、終了時刻をスケジュール"""
+        with self.lock:
+            if not self._stored(timer):
+                return
+            end = timer.start(self._clock.monotonic_ns())
+            self._scheduler.schedule(
+                self._key(timer), end / NS, self._finish_callback(timer)
+            )
+            self._save(timer)
+            self._changed(origin, (timer.id,))
+
+    def pause(self, timer: TimerType, origin: str | None = None) -> None:
+        """残り時間を保存してスケジュールを取り消す"""
+        with self.lock:
+            if not self._stored(timer):
+                return
+            timer.pause(self._clock.monotonic_ns())
+            self._scheduler.cancel(self._key(timer))
+            self._save(timer)
+            self._changed(origin, (timer.id,))
+
+    def reset(self, timer: TimerType, origin: str | None = None) -> None:
+        """止めて最初の区間の長さに戻す"""
+        with self.lock:
+            if not self._stored(timer):
+                return
+            timer.reset()
+            self._scheduler.cancel(self._key(timer))
+            self._save(timer)
+            self._changed(origin, (timer.id,))
+
+    def delete(self, timer: TimerType, origin: str | None = None) -> None:
+        with self.lock:
+            if self.timers.pop(timer.id, None) is None:
+                return
+            self._scheduler.cancel(self._key(timer))
+            self._storage.delete_timer(timer.id)
+            self._changed(origin, (timer.id,))
+
+    def _stored(self, timer: TimerType) -> bool:
+        """timer がまだストアにあるか (他のセッションで削除された行の操作は無視する)"""
+        return self.timers.get(timer.id) is timer
+
+    def _key(self, timer: TimerType) -> str:
+        return f"timer:{timer.id}"
+
+    def _finish_callback(self, timer: TimerType) -> Callable[[], None]:
+        return lambda: self._finish_timer(timer)
+
+    def _save(self, timer: TimerType) -> None:
+        records.save_timer(self._storage, self._clock, timer)
+
+    def _finish_timer(self, timer: TimerType) -> None:
+        with self.lock:
+            # NOTE: 取り出された直後に止められた (削除された) 場合は何もしない
+            if timer.end is None or not self._stored(timer):
+                return
+            lateness = (self._clock.monotonic_ns() - timer.end) / NS
+            _FIRE_LATENESS["timer"].observe(lateness)
+            finished = timer.label
+            end = timer.next_segment()
+            if end is not None:
+                # NOTE: プログラムは終わった区間の終了時刻から次の区間を始める
+                self._scheduler.schedule(
+                    self._key(timer), end / NS, self._finish_callback(timer)
+                )
+                message = f"{timer.name}: {finished} finished, {timer.label} started"
+            else:
+                timer.finish()
+                message = f"Timer '{timer.name}' has reached the set time!"
+            self._save(timer)
+            self._webhooks.fired(
+                self._clock, "timer", timer.id, timer.name, message, lateness
+            )
+            listeners = self._fired()
+        for fired in listeners:
+            fired(timer, message)
+
+
+class AlarmStore(_Store):
+    """プロセスで 1 つのアラームの記録と、その発火時刻のスケジュール
+
+    アラームを書き換えるセッションは lock を取ってから値を変え、update() で
+    登録し直す。
+    """
+
+    def __init__(
+        self,
+        storage: Storage,
+        scheduler: Scheduler,
+        clock: Clock | None = None,
+        webhooks: Webhooks | None = None,
+    ) -> None:
+        super().__init__(storage, scheduler, clock, webhooks)
+        self.alarms = {alarm.id: alarm for alarm in records.load_alarms(storage)}
+        self._schedule_many(self.alarms.values())
+        _alarm_stores.add(self)
+
+    def now(self) -> datetime:
+        return datetime.fromtimestamp(self._clock.time())
+
+    def close(self) -> None:
+        """すべてのアラームをスケジューラから外す"""
+        with self.lock:
+            for alarm in self.alarms.values():
+                self._scheduler.cancel(self._key(alarm))
+
+    def add(self, alarms: Iterable[AlarmType], origin: str | None = None) -> None:
+        with self.lock:
+            alarms = list(alarms)
+            for alarm in alarms:
+                self.alarms[alarm.id] = alarm
+                self._save(alarm)
+            # NOTE: schedule_many はヒープ全体を作り直すので、1 件なら schedule を使う
+            if len(alarms) == 1:
+                self._schedule_alarm(alarms[0])
+            else:
+                self._schedule_many(alarms)
+            self._changed(origin, (alarm.id for alarm in alarms))
+
+    def update(self, alarm: AlarmType, origin: str | None = None) -> None:
+        """書き換えたアラームを登録し直して保存する"""
+        with self.lock:
+            if not self._stored(alarm):
+                return
+            self._schedule_alarm(alarm)
+            self._save(alarm)
+            self._changed(origin, (alarm.id,))
+
+    def delete(self, alarm: AlarmType, origin: str | None = None) -> None:
+        with self.lock:
+            if self.alarms.pop(alarm.id, None) is None:
+                return
+            self._scheduler.cancel(self._key(alarm))
+            self._storage.delete_alarm(alarm.id)
+            self._changed(origin, (alarm.id,))
+
+    def move_to_next(
+        self, alarm: AlarmType, at: datetime, after: datetime | None = None
+    ) -> None:
+        """at の時刻で次に発火する日時に合わせる (繰り返しの終了日を過ぎたら無効にする)"""
+        records.move_to_next(alarm, at, after or self.now())
+
+    def _schedule_many(self, alarms: Iterable[AlarmType]) -> None:
+        self._scheduler.schedule_many(
+            (self._key(alarm), alarm.time / NS, self._fire_callback(alarm))
+            for alarm in alarms
+            if alarm.active
+        )
+
+    def _schedule_alarm(self, alarm: AlarmType) -> None:
+        """アラームの状態に合わせて発火時刻を登録/取消"""
+        if alarm.active:
+            self._scheduler.schedule(
+                self._key(alarm), alarm.time / NS, self._fire_callback(alarm)
+            )
+        else:
+            self._scheduler.cancel(self._key(alarm))
+
+    def _stored(self, alarm: AlarmType) -> bool:
+        """alarm がまだストアにあるか (他のセッションで削除された行の操作は無視する)"""
+        return self.alarms.get(alarm.id) is alarm
+
+    def _key(self, alarm: AlarmType) -> str:
+        return f"alarm:{alarm.id}"
+
+    def _fire_callback(self, alarm: AlarmType) -> Callable[[], None]:
+        return lambda: self._fire_alarm(alarm)
+
+    def _save(self, alarm: AlarmType) -> None:
+        records.save_alarm(self._storage, alarm)
+
+    def _fire_alarm(self, alarm: AlarmType) -> None:
+        with self.lock:
+            # NOTE: 取り出された直後に無効にされた (削除された) 場合は何もしない
+            if not alarm.active or not self._stored(alarm):
+                return
+            lateness = (self._clock.time_ns() - alarm.time) / NS
+            _FIRE_LATENESS["alarm"].observe(lateness)
+            fired_at = to_datetime(alarm.time)
+            if alarm.repeat:
+                # NOTE: 繰り返しのアラームは次の発火日時だけを求めて登録し直す
+                self.move_to_next(alarm, fired_at)
+            else:
+                alarm.active = False
+            self._schedule_alarm(alarm)
+            self._save(alarm)
+            name = fired_at.strftime("%H:%M")
+            message = f"⏰ Alarm! It's {name}"
+            self._webhooks.fired(
+                self._clock, "alarm", alarm.id, name, message, lateness
+            )
+            listeners = self._fired()
+        for fired in listeners:
+            fired(alarm, message)
+
+
+_shared_lock = threading.Lock()
+_shared: dict[tuple[str, Scheduler], _Store] = {}
+
+
+def timer_store(scheduler: Scheduler) -> TimerStore:
+    """scheduler で動かす、全セッションで共有するタイマーの記録"""
+    with _shared_lock:
+        store = _shared.get(("timer", scheduler))
+        if store is None:
+            store = _shared["timer", scheduler] = TimerStore(
+                default_storage(), scheduler
+            )
+        return store
+
+
+def alarm_store(scheduler: Scheduler) -> AlarmStore:
+    """scheduler で動かす、全セッションで共有するアラームの記録"""
+    with _shared_lock:
+        store = _shared.get(("alarm", scheduler))
+        if store is None:
+            store = _shared["alarm", scheduler] = AlarmStore(
+                default_storage(), scheduler
+            )
+        return store
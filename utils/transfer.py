@@ -0,0 +1,381 @@
+"""タイマーとアラームの一括インポート/エクスポート (JSON Lines・CSV・iCalendar)
+
+ファイルは 1 行 (iCalendar は 1 件) ずつ読み書きし、全体をメモリに載せない。
+読み込んだ項目は batch_size 件ごとにまとめて検証し、Batch として返す。
+どの形式も 1 件が 1 つのタイマーかアラームで、type 列 ("timer" / "alarm") で区別する。
+
+    type,name,duration,time,active,repeat,until
+    timer,Tea,00:03:00,,,,
+    alarm,,,07:30,true,Weekdays,2025-03-31
+
+duration は HH:MM:SS、time は HH:MM、repeat は曜日名のカンマ区切り
+("Daily" / "Weekdays" も可)、until は繰り返しを終える日 (YYYY-MM-DD)。
+iCalendar ではタイマーを VTODO (DURATION)、アラームを VEVENT (DTSTART と RRULE) で表す。
+"""
+
+import csv
+import itertools
+import json
+import re
+import uuid
+from collections.abc import Iterable, Iterator
+from datetime import UTC, date, datetime, time
+from pathlib import Path
+from typing import Any, NamedTuple, TextIO
+
+from components.types import NS, timer_duration
+from utils.recurrence import DAILY, describe, parse
+
+FORMATS = ("jsonl", "csv", "ics")
+BATCH_SIZE = 2000
+CSV_FIELDS = ("type", "name", "duration", "time", "active", "repeat", "until")
+ICS_DAYS = ("MO", "TU", "WE", "TH", "FR", "SA", "SU")
+
+_ICS_DURATION = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?")
+
+
+class TimerEntry(NamedTuple):
+    name: str
+    duration: int
+
+
+class AlarmEntry(NamedTuple):
+    at: time
+    active: bool = True
+    repeat: int = 0
+    until: date | None = None
+
+
+class Batch(NamedTuple):
+    timers: list[TimerEntry]
+    alarms: list[AlarmEntry]
+    errors: list[str]
+
+
+def format_of(path: Path | str) -> str:
+    """拡張子から形式を決める"""
+    format = Path(path).suffix.lstrip(".").lower()
+    if format == "ical":
+        format = "ics"
+    if format not in FORMATS:
+        raise ValueError(f"Unsupported file type: {Path(path).name}")
+    return format
+
+
+def read_batches(
+    file: TextIO, format: str, batch_size: int = BATCH_SIZE
+) -> Iterator[Batch]:
+    """file を読みながら、batch_size 件ごとに検証した結果を返す
+
+    不正な項目は読み飛ばし、行番号つきのメッセージを Batch.errors に入れる。
+    """
+    records = _READERS[format](file)
+    while chunk := list(itertools.islice(records, batch_size)):
+        yield _validate(chunk)
+
+
+def write_entries(
+    file: TextIO,
+    format: str,
+    timers: Iterable[TimerEntry],
+    alarms: Iterable[AlarmEntry],
+) -> int:
+    """タイマーとアラームを順に書き出し、書き出した件数を返す
+
+    file は newline="" で開くこと (CSV と iCalendar は改行に CRLF を使う)。
+    """
+    return _WRITERS[format](file, timers, alarms)
+
+
+def _validate(chunk: list[tuple[int, dict[str, Any] | ValueError]]) -> Batch:
+    batch = Batch([], [], [])
+    for line, fields in chunk:
+        try:
+            if isinstance(fields, ValueError):
+                raise fields
+            kind = fields.get("type")
+            if kind == "timer":
+                batch.timers.append(timer_entry(fields))
+            elif kind == "alarm":
+                batch.alarms.append(alarm_entry(fields))
+            else:
+                raise ValueError(f"Unknown type: {kind!r}")
+        except (ValueError, TypeError) as error:
+            batch.errors.append(f"line {line}: {error}")
+    return batch
+
+
+def timer_entry(fields: dict[str, Any]) -> TimerEntry:
+    """1 件分の項目 (name, duration) を検証する (不正なら ValueError)"""
+    parts = str(fields.get("duration") or "").split(":")
+    if len(parts) != 3:
+        raise ValueError("duration must be HH:MM:SS")
+    hours, minutes, seconds = (int(part) for part in parts)
+    name = str(fields.get("name") or "").strip()
+    return TimerEntry(name, timer_duration(hours, minutes, seconds))
+
+
+def alarm_entry(fields: dict[str, Any]) -> AlarmEntry:
+    """1 件分の項目 (time, active, repeat, until) を検証する (不正なら ValueError)"""
+    at = time.fromisoformat(str(fields.get("time") or ""))
+    repeat = fields.get("repeat") or 0
+    if not isinstance(repeat, int):
+        repeat = parse(str(repeat))
+    if not 0 <= repeat <= DAILY:
+        raise ValueError(f"Invalid repeat: {repeat}")
+    # NOTE: 繰り返さないアラームの終了日は意味がないので捨てる
+    until = fields.get("until") if repeat else None
+    return AlarmEntry(
+        at.replace(second=0, microsecond=0),
+        _to_bool(fields.get("active", True)),
+        repeat,
+        date.fromisoformat(str(until)) if until else None,
+    )
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("", "true", "1", "yes"):
+        return True
+    if text in ("false", "0", "no"):
+        return False
+    raise ValueError(f"Invalid active: {value!r}")
+
+
+def _format_duration(ns: int) -> str:
+    hours, rest = divmod(ns // NS, 3600)
+    return f"{hours:02}:{rest // 60:02}:{rest % 60:02}"
+
+
+def _timer_fields(entry: TimerEntry) -> dict[str, Any]:
+    return {
+        "type": "timer",
+        "name": entry.name,
+        "duration": _format_duration(entry.duration),
+    }
+
+
+def _alarm_fields(entry: AlarmEntry) -> dict[str, Any]:
+    return {
+        "type": "alarm",
+        "time": entry.at.isoformat("minutes"),
+        "active": entry.active,
+        "repeat": describe(entry.repeat),
+        "until": entry.until.isoformat() if entry.until else None,
+    }
+
+
+def _read_jsonl(file: TextIO) -> Iterator[tuple[int, dict[str, Any] | ValueError]]:
+    for line, text in enumerate(file, 1):
+        if not text.strip():
+            continue
+        try:
+            fields = json.loads(text)
+        except ValueError as error:
+            yield line, ValueError(f"Invalid JSON: {error.args[0]}")
+            continue
+        if not isinstance(fields, dict):
+            yield line, ValueError("Expected a JSON object")
+            continue
+        yield line, fields
+
+
+def _write_jsonl(
+    file: TextIO, timers: Iterable[TimerEntry], alarms: Iterable[AlarmEntry]
+) -> int:
+    count = 0
+    for fields in itertools.chain(
+        map(_timer_fields, timers), map(_alarm_fields, alarms)
+    ):
+        file.write(json.dumps(fields, ensure_ascii=False) + "\n")
+        count += 1
+    return count
+
+
+def _read_csv(file: TextIO) -> Iterator[tuple[int, dict[str, Any] | ValueError]]:
+    reader = csv.DictReader(file)
+    for fields in reader:
+        yield reader.line_num, fields
+
+
+def _write_csv(
+    file: TextIO, timers: Iterable[TimerEntry], alarms: Iterable[AlarmEntry]
+) -> int:
+    writer = csv.DictWriter(file, CSV_FIELDS)
+    writer.writeheader()
+    count = 0
+    for fields in itertools.chain(
+        map(_timer_fields, timers), map(_alarm_fields, alarms)
+    ):
+        if fields["type"] == "alarm":
+            fields["active"] = str(fields["active"]).lower()
+        writer.writerow(fields)
+        count += 1
+    return count
+
+
+def _read_ics(file: TextIO) -> Iterator[tuple[int, dict[str, Any] | ValueError]]:
+    component: dict[str, tuple[str, str]] | None = None
+    kind = ""
+    start = 0
+    for line, name, params, value in _unfold(file):
+        if name == "BEGIN" and value in ("VTODO", "VEVENT"):
+            component, kind, start = {}, value, line
+        elif name == "END" and value == kind and component is not None:
+            try:
+                fields: dict[str, Any] | ValueError = _from_ics(kind, component)
+            except ValueError as error:
+                fields = error
+            yield start, fields
+            component, kind = None, ""
+        elif component is not None:
+            component.setdefault(name, (params, value))
+
+
+def _unfold(file: TextIO) -> Iterator[tuple[int, str, str, str]]:
+    """折り返された行をつなげ、(行番号, 名前, パラメータ, 値) に分ける"""
+    pending: tuple[int, str] | None = None
+    for line, text in enumerate(file, 1):
+        text = text.rstrip("\r\n")
+        if text[:1] in (" ", "\t") and pending is not None:
+            pending = (pending[0], pending[1] + text[1:])
+            continue
+        if pending is not None:
+            yield _split_property(*pending)
+        pending = (line, text)
+    if pending is not None:
+        yield _split_property(*pending)
+
+
+def _split_property(line: int, text: str) -> tuple[int, str, str, str]:
+    head, _, value = text.partition(":")
+    name, _, params = head.partition(";")
+    return line, name.upper(), params, value
+
+
+def _from_ics(kind: str, component: dict[str, tuple[str, str]]) -> dict[str, Any]:
+    if kind == "VTODO":
+        match = _ICS_DURATION.fullmatch(component.get("DURATION", ("", ""))[1])
+        if match is None:
+            raise ValueError("Invalid DURATION")
+        days, hours, minutes, seconds = (int(part or 0) for part in match.groups())
+        total = ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+        hours, rest = divmod(total, 3600)
+        return {
+            "type": "timer",
+            "name": _unescape(component.get("SUMMARY", ("", ""))[1]),
+            "duration": f"{hours}:{rest // 60}:{rest % 60}",
+        }
+    start = _parse_ics_datetime(component.get("DTSTART", ("", ""))[1])
+    repeat, until = _parse_rrule(component.get("RRULE", ("", ""))[1], start)
+    return {
+        "type": "alarm",
+        "time": start.time().isoformat("minutes"),
+        "active": component.get("STATUS", ("", ""))[1].upper() != "CANCELLED",
+        "repeat": repeat,
+        "until": until,
+    }
+
+
+def _parse_ics_datetime(value: str) -> datetime:
+    if not value:
+        raise ValueError("Missing DTSTART")
+    if value.endswith("Z"):
+        # NOTE: UTC の時刻はローカル時刻に直す (TZID つきの時刻はそのまま扱う)
+        utc = datetime.strptime(value, "%Y%m%dT%H%M%SZ").replace(tzinfo=UTC)
+        return utc.astimezone().replace(tzinfo=None)
+    return datetime.strptime(value[:15], "%Y%m%dT%H%M%S")
+
+
+def _parse_rrule(value: str, start: datetime) -> tuple[int, str | None]:
+    if not value:
+        return 0, None
+    rule = dict(part.partition("=")[::2] for part in value.upper().split(";"))
+    frequency = rule.get("FREQ")
+    if frequency not in ("DAILY", "WEEKLY"):
+        raise ValueError(f"Unsupported RRULE: {value}")
+    if "BYDAY" in rule:
+        repeat = 0
+        for day in rule["BYDAY"].split(","):
+            if day not in ICS_DAYS:
+                raise ValueError(f"Unsupported BYDAY: {day}")
+            repeat |= 1 << ICS_DAYS.index(day)
+    else:
+        repeat = DAILY if frequency == "DAILY" else 1 << start.weekday()
+    until = rule.get("UNTIL")
+    if until:
+        until = datetime.strptime(until[:8], "%Y%m%d").date().isoformat()
+    return repeat, until or None
+
+
+def _write_ics(
+    file: TextIO, timers: Iterable[TimerEntry], alarms: Iterable[AlarmEntry]
+) -> int:
+    stamp = datetime.now(UTC).strftime("%Y%m%dT%H%M%SZ")
+    today = date.today()
+
+    def component(kind: str, *properties: str) -> None:
+        lines = [f"BEGIN:{kind}", f"UID:{uuid.uuid4()}", f"DTSTAMP:{stamp}"]
+        lines.extend(properties)
+        lines.append(f"END:{kind}")
+        file.write("".join(_fold(line) for line in lines))
+
+    file.write(_fold("BEGIN:VCALENDAR") + _fold("VERSION:2.0"))
+    file.write(_fold("PRODID:-//flet-timer-app//EN"))
+    count = 0
+    for timer in timers:
+        seconds = timer.duration // NS
+        component(
+            "VTODO",
+            f"SUMMARY:{_escape(timer.name)}",
+            f"DURATION:PT{seconds // 3600}H{seconds // 60 % 60}M{seconds % 60}S",
+        )
+        count += 1
+    for alarm in alarms:
+        properties = [
+            "SUMMARY:Alarm",
+            f"DTSTART:{datetime.combine(today, alarm.at):%Y%m%dT%H%M%S}",
+        ]
+        if alarm.repeat:
+            days = ",".join(
+                day for i, day in enumerate(ICS_DAYS) if alarm.repeat & (1 << i)
+            )
+            rule = f"RRULE:FREQ=WEEKLY;BYDAY={days}"
+            if alarm.until:
+                rule += f";UNTIL={alarm.until:%Y%m%d}T235959"
+            properties.append(rule)
+        if not alarm.active:
+            properties.append("STATUS:CANCELLED")
+        component("VEVENT", *properties)
+        count += 1
+    file.write(_fold("END:VCALENDAR"))
+    return count
+
+
+def _fold(line: str) -> str:
+    """75 文字ごとに折り返す (続きの行は空白で始める)"""
+    if len(line) <= 75:
+        return line + "\r\n"
+    chunks = [line[:75]] + [" " + line[i : i + 74] for i in range(75, len(line), 74)]
+    return "".join(chunk + "\r\n" for chunk in chunks)
+
+
+def _escape(text: str) -> str:
+    return (
+        text.replace("\\", "\\\\")
+        .replace(";", "\\;")
+        .replace(",", "\\,")
+        .replace("\n", "\\n")
+    )
+
+
+def _unescape(text: str) -> str:
+    return re.sub(
+        r"\\(.)", lambda m: "\n" if m.group(1) in "nN" else m.group(1), text
+    ).strip()
+
+
+_READERS = {"jsonl": _read_jsonl, "csv": _read_csv, "ics": _read_ics}
+_WRITERS = {"jsonl": _write_jsonl, "csv": _write_csv, "ics": _write_ics}
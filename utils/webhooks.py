@@ -0,0 +1,350 @@
+"""アラームとタイマーの発火を外部に知らせる Webhook
+
+TIMER_APP_WEBHOOK_URLS (カンマ区切り) を指定すると、発火のたびにイベントを JSON で
+POST する。指定しない場合は無効で、publish() は何もしない。キューの上限・1 回の
+POST にまとめる件数・ワーカー数・再送回数・タイムアウトは TIMER_APP_WEBHOOK_QUEUE・
+TIMER_APP_WEBHOOK_BATCH・TIMER_APP_WEBHOOK_WORKERS・TIMER_APP_WEBHOOK_RETRIES・
+TIMER_APP_WEBHOOK_TIMEOUT で変更できる。
+"""
+
+import asyncio
+import atexit
+import itertools
+import json
+import os
+import re
+import threading
+import uuid
+from collections import deque
+from collections.abc import Iterable, Mapping
+from datetime import UTC, datetime
+from time import monotonic
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from utils import metrics
+from utils.clock import Clock
+
+if TYPE_CHECKING:
+    import httpx
+
+QUEUE_SIZE = 10000
+BATCH_SIZE = 100
+WORKERS = 4
+RETRIES = 3
+TIMEOUT = 5.0
+# NOTE: 再送までの待ち時間は RETRY_BACKOFF 秒から倍々に延ばし、MAX_BACKOFF 秒で止める
+RETRY_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+DRAIN_TIMEOUT = 5.0
+
+_EVENTS = {
+    result: metrics.counter(
+        "timer_app_webhook_events_total",
+        "Webhook のイベント数 (delivered: 送信済み, failed: 失敗, dropped: 破棄)",
+        result=result,
+    )
+    for result in ("delivered", "failed", "dropped")
+}
+_RETRIES = metrics.counter("timer_app_webhook_retries_total", "Webhook の再送回数")
+_LATENCY = metrics.histogram(
+    "timer_app_webhook_delivery_seconds", "発火から Webhook の送信完了までの時間"
+)
+_BATCH = metrics.histogram(
+    "timer_app_webhook_batch_events",
+    "1 回の POST にまとめたイベントの数",
+    metrics.COUNT_BUCKETS,
+)
+
+
+class FireEvent:
+    """発火 1 件分の記録 (JSON への変換は送信側のスレッドで行う)"""
+
+    __slots__ = ("kind", "target", "name", "message", "fired_at", "lateness", "queued")
+
+    def __init__(
+        self,
+        kind: str,
+        target: str,
+        name: str,
+        message: str,
+        fired_at: float,
+        lateness: float,
+    ) -> None:
+        self.kind = kind
+        self.target = target
+        self.name = name
+        self.message = message
+        self.fired_at = fired_at
+        self.lateness = lateness
+        self.queued = monotonic()
+
+    def to_json(self, id: str) -> dict[str, Any]:
+        """送信する形式 (id は受信側で再送による重複を除くのに使う)"""
+        return {
+            "id": id,
+            "type": self.kind,
+            "target": self.target,
+            "name": self.name,
+            "message": self.message,
+            "deadline": _isoformat(self.fired_at - self.lateness),
+            "fired_at": _isoformat(self.fired_at),
+            "lateness": round(self.lateness, 6),
+        }
+
+
+def _isoformat(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, UTC).isoformat(timespec="milliseconds")
+
+
+def _retry_after(response: "httpx.Response") -> float | None:
+    try:
+        return min(float(response.headers["Retry-After"]), MAX_BACKOFF)
+    except (KeyError, ValueError):
+        return None
+
+
+class Webhooks:
+    """発火イベントを溜めて、専用スレッドのイベントループから Webhook に送る
+
+    publish() はスケジューラのスレッドから呼ばれ、上限つきのキューに積むだけで
+    すぐに戻る。送信は専用スレッドのイベントループ上で workers 個のワーカーが行い、
+    溜まっているイベントを最大 batch_size 件ずつ 1 回の POST にまとめる。接続は
+    1 つの httpx.AsyncClient で使い回し、接続エラー・429・5xx は間隔を倍々に
+    空けて retries 回まで送り直す。送信先が遅くてキューが一杯になった場合は
+    古いイベントから捨てるので、発火の処理が送信を待つことはない。
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        queue_size: int = QUEUE_SIZE,
+        batch_size: int = BATCH_SIZE,
+        workers: int = WORKERS,
+        retries: int = RETRIES,
+        timeout: float = TIMEOUT,
+        backoff: float = RETRY_BACKOFF,
+    ) -> None:
+        self.urls = list(urls)
+        for url in self.urls:
+            parts = urlsplit(url)
+            if parts.scheme not in ("http", "https") or not parts.netloc:
+                raise ValueError(f"Invalid webhook URL: {url}")
+        if min(queue_size, batch_size, workers) < 1 or retries < 0:
+            raise ValueError("Invalid webhook settings!")
+        self._queue_size = queue_size
+        self._batch_size = batch_size
+        self._workers = workers
+        self._retries = retries
+        self._timeout = timeout
+        self._backoff = backoff
+        # NOTE: asyncio.Queue は別スレッドから積めないので、deque をロックで守り、
+        # 空から 1 件になったときだけイベントループを起こす
+        self._lock = threading.Lock()
+        self._queue: deque[FireEvent] = deque()
+        # NOTE: イベントの id はこのインスタンスの id と通し番号で作る
+        self._id_prefix = uuid.uuid4().hex
+        self._ids = itertools.count()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup = asyncio.Event()
+        self._closed = asyncio.Event()
+        self._closing = False
+        self._drain_timeout = DRAIN_TIMEOUT
+        self._done = None
+        self.delivered = 0
+        self.failed = 0
+        self.dropped = 0
+        self.requests = 0
+        self.retried = 0
+        if self.urls:
+            metrics.gauge(
+                "timer_app_webhook_queue_depth",
+                "送信を待っている Webhook のイベント数",
+                lambda: len(self._queue),
+            )
+            # NOTE: httpx の読み込みと接続の準備が発火と重ならないよう、最初に済ませる
+            self._start()
+
+    def fired(
+        self,
+        clock: Clock,
+        kind: str,
+        target: str,
+        name: str,
+        message: str,
+        lateness: float,
+    ) -> None:
+        """発火を知らせる (無効な場合はイベントも作らない)"""
+        if self.urls:
+            self.publish(FireEvent(kind, target, name, message, clock.time(), lateness))
+
+    def publish(self, event: FireEvent) -> None:
+        """event を送信待ちのキューに積む (送信は待たない)"""
+        if not self.urls:
+            return
+        with self._lock:
+            if self._closing:
+                self._drop(1)
+                return
+            if len(self._queue) >= self._queue_size:
+                self._queue.popleft()
+                self._drop(1)
+            self._queue.append(event)
+            wake = len(self._queue) == 1
+        if wake:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def pending(self) -> int:
+        """送信を待っているイベントの数"""
+        with self._lock:
+            return len(self._queue)
+
+    def close(self, timeout: float = DRAIN_TIMEOUT) -> None:
+        """溜まっているイベントを最大 timeout 秒まで送ってから止める"""
+        with self._lock:
+            if self._loop is None or self._closing:
+                return
+            self._closing = True
+            self._drain_timeout = timeout
+        loop = self._loop
+        loop.call_soon_threadsafe(self._closed.set)
+        loop.call_soon_threadsafe(self._wakeup.set)
+        try:
+            self._done.result(timeout + TIMEOUT)
+        except TimeoutError:
+            pass
+        loop.call_soon_threadsafe(loop.stop)
+
+    def _start(self) -> None:
+        """接続を準備し、送信用のイベントループのスレッドを起動する"""
+        # NOTE: httpx の読み込みは重いので、Webhook を使う場合だけ import する
+        import httpx
+
+        connections = self._workers * len(self.urls)
+        self._client = httpx.AsyncClient(
+            timeout=self._timeout,
+            limits=httpx.Limits(
+                max_connections=connections, max_keepalive_connections=connections
+            ),
+            headers={"Content-Type": "application/json"},
+        )
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever, name="webhooks", daemon=True
+        ).start()
+        self._done = asyncio.run_coroutine_threadsafe(self._run(), self._loop)
+
+    def _drop(self, count: int) -> None:
+        """捨てたイベントを数える (ロックを保持して呼ぶ)"""
+        self.dropped += count
+        _EVENTS["dropped"].inc(count)
+
+    def _take(self) -> list[FireEvent]:
+        with self._lock:
+            count = min(len(self._queue), self._batch_size)
+            return [self._queue.popleft() for _ in range(count)]
+
+    async def _run(self) -> None:
+        async with self._client as client:
+            workers = [
+                asyncio.create_task(self._work(client)) for _ in range(self._workers)
+            ]
+            await self._closed.wait()
+            # NOTE: 終了時は残りを drain_timeout 秒まで送り、送りきれない分は捨てる
+            _, pending = await asyncio.wait(workers, timeout=self._drain_timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+        with self._lock:
+            self._drop(len(self._queue))
+            self._queue.clear()
+
+    async def _work(self, client: "httpx.AsyncClient") -> None:
+        while True:
+            batch = self._take()
+            if batch:
+                await self._deliver(client, batch)
+                continue
+            if self._closing:
+                return
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    async def _deliver(
+        self, client: "httpx.AsyncClient", batch: list[FireEvent]
+    ) -> None:
+        """batch を 1 回の POST で各 URL に送る"""
+        _BATCH.observe(len(batch))
+        events = [
+            event.to_json(f"{self._id_prefix}-{next(self._ids)}") for event in batch
+        ]
+        body = json.dumps({"events": events}).encode()
+        try:
+            results = await asyncio.gather(
+                *(self._post(client, url, body) for url in self.urls)
+            )
+        except asyncio.CancelledError:
+            with self._lock:
+                self._drop(len(batch))
+            raise
+        if not all(results):
+            self.failed += len(batch)
+            _EVENTS["failed"].inc(len(batch))
+            return
+        self.delivered += len(batch)
+        _EVENTS["delivered"].inc(len(batch))
+        now = monotonic()
+        for event in batch:
+            _LATENCY.observe(now - event.queued)
+
+    async def _post(self, client: "httpx.AsyncClient", url: str, body: bytes) -> bool:
+        """成功するまで最大 retries 回送り直す (送れたかどうかを返す)"""
+        import httpx
+
+        for attempt in range(self._retries + 1):
+            self.requests += 1
+            retry_after = None
+            try:
+                response = await client.post(url, content=body)
+            except httpx.HTTPError:
+                pass
+            else:
+                if response.is_success:
+                    return True
+                # NOTE: 429 と 5xx 以外 (リクエストの誤り) は送り直しても変わらない
+                if response.status_code != 429 and response.status_code < 500:
+                    return False
+                retry_after = _retry_after(response)
+            if attempt < self._retries:
+                self.retried += 1
+                _RETRIES.inc()
+                delay = min(self._backoff * 2**attempt, MAX_BACKOFF)
+                await asyncio.sleep(retry_after if retry_after is not None else delay)
+        return False
+
+
+def from_env(environ: Mapping[str, str] = os.environ) -> Webhooks:
+    """環境変数 TIMER_APP_WEBHOOK_* から Webhooks を作る"""
+    urls = re.split(r"[,\s]+", environ.get("TIMER_APP_WEBHOOK_URLS", "").strip())
+    return Webhooks(
+        [url for url in urls if url],
+        queue_size=int(environ.get("TIMER_APP_WEBHOOK_QUEUE", QUEUE_SIZE)),
+        batch_size=int(environ.get("TIMER_APP_WEBHOOK_BATCH", BATCH_SIZE)),
+        workers=int(environ.get("TIMER_APP_WEBHOOK_WORKERS", WORKERS)),
+        retries=int(environ.get("TIMER_APP_WEBHOOK_RETRIES", RETRIES)),
+        timeout=float(environ.get("TIMER_APP_WEBHOOK_TIMEOUT", TIMEOUT)),
+    )
+
+
+_shared_lock = threading.Lock()
+_shared: Webhooks | None = None
+
+
+def default_webhooks() -> Webhooks:
+    """全セッションで共有する Webhooks (終了時に残りを送ってから止める)"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = from_env()
+            atexit.register(_shared.close)
+        return _shared